@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Batch transcript generation for every student.
+The parent process streams student ids (or course / cohort keys) to a
+process pool; each worker fetches its students' rows from
+vw_student_transcript with one set-based query on a connection of its own
+and renders them to PDF. Finished student ids are appended to a state
+file in the output directory, so an interrupted or partly failed run picks
+up where it stopped.
+
+--bundle keeps the output to a handful of files however large the cohort:
+`zip` renders every transcript in memory and streams it into one
+transcripts.zip, `course` and `cohort` render one merged, bookmarked PDF per
+course (course_<id>.pdf) or per year of first enrollment (cohort_<year>.pdf).
+Finished bundles are recorded in the state file like students; a zip run
+always starts again.
+"""
+
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import groupby
+
+import pdf_transcript_generator as transcripts
+
+from records import db, telemetry  # pdf_transcript_generator puts the project root on sys.path
+
+STATE_FILE = ".batch_state"
+ZIP_FILE = "transcripts.zip"
+BUNDLES = ["none", "zip", "course", "cohort"]
+# Students handed to a worker per task; the worker fetches their rows itself
+STUDENTS_PER_TASK = 50
+
+TRANSCRIPT_QUERY = """
+    SELECT t.student_id, t.first_name, t.last_name, t.course_name, t.grade, s.gpa
+    FROM vw_student_transcript t
+    JOIN students s ON s.student_id = t.student_id
+    WHERE {where}
+    ORDER BY t.student_id, t.course_name
+"""
+
+# Every transcript-holding student, or every bundle's key, for the parent to hand out
+STUDENT_IDS_QUERY = "SELECT DISTINCT student_id FROM enrollments ORDER BY student_id"
+BUNDLE_KEY_QUERIES = {
+    "course": "SELECT DISTINCT course_id FROM enrollments ORDER BY course_id",
+    "cohort": "SELECT MIN(enrollment_date) FROM enrollments GROUP BY student_id",
+}
+# The students in one bundle, given its key's parameters
+BUNDLE_FILTERS = {
+    "course": "t.student_id IN (SELECT student_id FROM enrollments WHERE course_id = ?)",
+    "cohort": """t.student_id IN (SELECT student_id FROM enrollments GROUP BY student_id
+                                  HAVING MIN(enrollment_date) >= ? AND MIN(enrollment_date) < ?)""",
+}
+
+
+def stream_rows(conn, fetch_size, query, params=()):
+    """Yield query rows one at a time, fetched in batches"""
+    cur = conn.cursor()
+    cur.execute(db.q(query), params)
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def student_transcripts(rows):
+    """Group the ordered row stream into (student_id, first, last, gpa, [(course, grade)])"""
+    for student_id, group in groupby(rows, key=lambda r: r[0]):
+        group = list(group)
+        yield (student_id, group[0][1], group[0][2], group[0][5],
+               [(r[3], r[4]) for r in group])
+
+
+def _year(value):
+    return value.year if hasattr(value, "year") else int(str(value)[:4])
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def start_worker(backend, dsn):
+    """Process pool initializer: a connection pool of the worker's own, and the page template"""
+    db.detach(db.ConnectionPool(backend, dsn=dsn, maxsize=1))
+    transcripts.template()
+
+
+def render_students(output_dir, student_ids, fetch_size, in_memory=False):
+    """Worker entry point: fetch and render a run of students' transcripts, to
+    a file each or in memory for the zip archive. Returns
+    [(student_id, pdf bytes or None, error or None)]."""
+    where = f"t.student_id IN ({', '.join('?' * len(student_ids))})"
+    results = []
+    with db.connection() as conn:
+        rows = stream_rows(conn, fetch_size, TRANSCRIPT_QUERY.format(where=where), student_ids)
+        for student_id, first, last, gpa, courses in student_transcripts(rows):
+            try:
+                if in_memory:
+                    pdf = transcripts.render_bytes(first, last, gpa, courses)
+                else:
+                    pdf = None
+                    transcripts.render_transcript(
+                        os.path.join(output_dir, f"transcript_{student_id}.pdf"),
+                        first, last, gpa, courses)
+                results.append((student_id, pdf, None))
+            except Exception as e:
+                results.append((student_id, None, str(e)))
+    return results
+
+
+def render_bundle(output_dir, name, bundle, params, fetch_size):
+    """Worker entry point: fetch one bundle's students and render them into one
+    merged PDF, replacing any earlier copy only once complete. Returns how
+    many transcripts were drawn."""
+    path = os.path.join(output_dir, f"{name}.pdf")
+    query = TRANSCRIPT_QUERY.format(where=BUNDLE_FILTERS[bundle])
+    try:
+        with db.connection() as conn:
+            students = student_transcripts(stream_rows(conn, fetch_size, query, params))
+            count = transcripts.render_bundle(path + ".tmp", students)
+        os.replace(path + ".tmp", path)
+    except BaseException:
+        _remove(path + ".tmp")
+        raise
+    return count
+
+
+def bundle_keys(conn, bundle, fetch_size):
+    """(bundle name, query parameters) of every course or cohort, in order"""
+    rows = stream_rows(conn, fetch_size, BUNDLE_KEY_QUERIES[bundle])
+    if bundle == "course":
+        for (course_id,) in rows:
+            yield f"course_{course_id}", (course_id,)
+        return
+    for year in sorted({_year(first) for (first,) in rows}):
+        yield f"cohort_{year}", (f"{year}-01-01", f"{year + 1}-01-01")
+
+
+def student_runs(conn, fetch_size, done):
+    """Ids of the students not yet done, in runs of STUDENTS_PER_TASK"""
+    run = []
+    for (student_id,) in stream_rows(conn, fetch_size, STUDENT_IDS_QUERY):
+        if str(student_id) in done:
+            continue
+        run.append(student_id)
+        if len(run) == STUDENTS_PER_TASK:
+            yield run
+            run = []
+    if run:
+        yield run
+
+
+def load_done(state_path):
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def run(output_dir, workers=None, fetch_size=1000, restart=False, bundle="none"):
+    """Render every transcript (or bundle) not already recorded as done.
+
+    Returns (rendered, failed, seconds): transcripts drawn, and the student
+    ids or bundle names that failed. The parent only hands out student ids
+    or bundle keys; each worker fetches and renders its own rows. At most 4
+    tasks per worker are in flight, so memory stays bounded however many
+    students there are.
+    """
+    if bundle not in BUNDLES:
+        raise ValueError(f"bundle must be one of {', '.join(BUNDLES)}")
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_FILE)
+    if (restart or bundle == "zip") and os.path.exists(state_path):
+        os.remove(state_path)
+    done = load_done(state_path)
+    workers = workers or os.cpu_count() or 1
+    pool_args = (db.get_pool().backend, db.get_pool().dsn)
+
+    archive = None
+    zip_path = os.path.join(output_dir, ZIP_FILE)
+    if bundle == "zip":
+        # The PDFs are already deflated by reportlab; storing them saves a second pass
+        archive = zipfile.ZipFile(zip_path + ".tmp", "w", zipfile.ZIP_STORED)
+
+    rendered = 0
+    failed = []
+    start = time.perf_counter()
+    try:
+        with telemetry.timer("transcript.batch") as span, \
+                db.connection() as conn, \
+                ProcessPoolExecutor(max_workers=workers, initializer=start_worker,
+                                    initargs=pool_args) as pool, \
+                open(state_path, "a") as state:
+            in_flight = {}
+
+            def finished(key):
+                if archive is None:
+                    state.write(f"{key}\n")
+                    state.flush()
+
+            def collect(futures):
+                nonlocal rendered
+                for future in futures:
+                    keys = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        for key in keys:
+                            print(f"❌ {'Student ' if isinstance(key, int) else ''}{key}: {e}")
+                        failed.extend(keys)
+                        continue
+                    if isinstance(result, int):
+                        finished(keys[0])
+                        rendered += result
+                        continue
+                    for student_id, pdf, error in result:
+                        if error:
+                            print(f"❌ Student {student_id}: {error}")
+                            failed.append(student_id)
+                            continue
+                        if archive is not None:
+                            archive.writestr(f"transcript_{student_id}.pdf", pdf)
+                        finished(student_id)
+                        rendered += 1
+
+            def submit(keys, worker, *args):
+                if len(in_flight) >= workers * 4:
+                    ready, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(ready)
+                in_flight[pool.submit(worker, *args)] = keys
+
+            if bundle in BUNDLE_FILTERS:
+                for name, params in bundle_keys(conn, bundle, fetch_size):
+                    if name not in done:
+                        submit([name], render_bundle, output_dir, name, bundle, params, fetch_size)
+            else:
+                for ids in student_runs(conn, fetch_size, done):
+                    submit(ids, render_students, output_dir, ids, fetch_size, archive is not None)
+            collect(wait(in_flight).done)
+            span.rows = rendered
+    except BaseException:
+        if archive is not None:
+            archive.close()
+            _remove(zip_path + ".tmp")
+        raise
+
+    if archive is not None:
+        archive.close()
+        os.replace(zip_path + ".tmp", zip_path)
+    return rendered, failed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate PDF transcripts for all students")
+    parser.add_argument("--output-dir", default="transcripts")
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    parser.add_argument("--fetch-size", type=int, default=1000,
+                        help="rows fetched from the database per round trip")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the state file and render everything again")
+    parser.add_argument("--bundle", choices=BUNDLES, default="none",
+                        help="one zip archive, or one merged PDF per course or cohort, "
+                             "instead of a file per student")
+    args = parser.parse_args()
+
+    rendered, failed, seconds = run(args.output_dir, args.workers, args.fetch_size, args.restart,
+                                    args.bundle)
+    db.close()
+    rate = rendered / seconds if seconds else 0
+    target = os.path.join(args.output_dir, ZIP_FILE) if args.bundle == "zip" else args.output_dir
+    print(f"✅ {rendered} transcripts in {seconds:.1f}s ({rate:.1f} PDFs/s) → {target}")
+    if failed:
+        print(f"⚠️  {len(failed)} failed; run again to retry them.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
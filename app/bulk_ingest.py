@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+"""
+Bulk grade and attendance ingestion.
+
+A whole class roster, or the ETL's grades.json / attendance.xlsx sources,
+is validated in one pass and then applied set-based in one transaction:
+the rows are copied into a session temp table with a single executemany,
+student_email / course_code pairs are resolved to enrollments with one
+correlated UPDATE, and the target table is written with one
+MERGE (SQL Server) or INSERT ... SELECT (PostgreSQL, SQLite). Nothing is
+written unless every row is valid, unless --skip-invalid is given.
+
+    python app/bulk_ingest.py grades data/grades.json
+    python app/bulk_ingest.py attendance roster.csv --course-code CS101 --date 2024-10-01
+
+Rows identify an enrollment either by `enrollment_id` or by
+`student_email` + `course_code`. Roster columns missing from the file
+(course_code, attendance_date, status) can be given on the command line.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import db, materialized, partitions, quality, telemetry  # noqa: E402
+import services  # noqa: E402
+
+BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "5000"))
+
+STAGE_COLUMNS = {
+    "grades": [("row_no", "INT"), ("enrollment_id", "INT"), ("student_email", "VARCHAR(120)"),
+               ("course_code", "VARCHAR(20)"), ("grade", "DECIMAL(5,2)")],
+    "attendance": [("row_no", "INT"), ("enrollment_id", "INT"), ("student_email", "VARCHAR(120)"),
+                   ("course_code", "VARCHAR(20)"), ("attendance_date", "DATE"),
+                   ("status", "VARCHAR(10)")],
+}
+
+
+class IngestError(Exception):
+    """Rows failed validation or could not be matched to an enrollment.
+
+    `errors` is a list of (row_no, message), row numbers counting from 1.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+# ------------------ READING ------------------
+def read_rows(path):
+    """Rows of a .csv(.gz), .json, .jsonl or .xlsx file as dicts"""
+    name = path.lower()
+    if name.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        sheet = load_workbook(path, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h).strip() for h in next(rows, [])]
+        return [dict(zip(header, r)) for r in rows if any(v is not None for v in r)]
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "rt", newline="") as f:
+        if name.endswith((".jsonl", ".jsonl.gz")):
+            return [json.loads(line) for line in f if line.strip()]
+        if name.endswith((".json", ".json.gz")):
+            text = f.read()
+            return json.loads(text) if text.strip() else []
+        return list(csv.DictReader(f))
+
+
+def _text(value):
+    return None if value is None or str(value).strip() == "" else str(value).strip()
+
+
+def _date(value):
+    # openpyxl returns datetime cells; everything else arrives as text
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return _text(value)
+
+
+# ------------------ VALIDATION ------------------
+def _enrollment_key(row, defaults):
+    """(enrollment_id, student_email, course_code) or an error message"""
+    enrollment_id = _text(row.get("enrollment_id"))
+    if enrollment_id is not None:
+        try:
+            number = float(enrollment_id)  # spreadsheets hand back 12.0
+        except ValueError:
+            number = None
+        if number is None or not number.is_integer():
+            return None, "enrollment_id must be an integer"
+        return (int(number), None, None), None
+    email = _text(row.get("student_email"))
+    code = _text(row.get("course_code")) or defaults.get("course_code")
+    if not quality.is_valid_email(email):
+        return None, "missing or invalid student_email"
+    if not code:
+        return None, "missing course_code"
+    return (None, email.lower(), code.upper()), None
+
+
+def validate_grades(rows, defaults=None):
+    """One pass over grade rows; returns (stage_rows, errors)"""
+    stage, errors = [], []
+    for n, row in enumerate(rows, 1):
+        key, error = _enrollment_key(row, defaults or {})
+        if error is None:
+            try:
+                grade = float(row.get("grade"))
+                if not 0 <= grade <= 100:
+                    error = "grade must be between 0 and 100"
+            except (TypeError, ValueError):
+                error = "grade must be a number"
+        if error:
+            errors.append((n, error))
+        else:
+            stage.append((n, *key, round(grade, 2)))
+    return stage, errors
+
+
+def validate_attendance(rows, defaults=None, hot_from=None):
+    """One pass over attendance rows; returns (stage_rows, errors).
+
+    With `hot_from`, dates before it (in an archived term) are rejected.
+    """
+    defaults = defaults or {}
+    stage, errors = [], []
+    for n, row in enumerate(rows, 1):
+        key, error = _enrollment_key(row, defaults)
+        day = _date(row.get("attendance_date")) or defaults.get("attendance_date")
+        status = _text(row.get("status")) or defaults.get("status")
+        if error is None and not quality.is_valid_date(day):
+            error = "missing or invalid attendance_date"
+        if error is None and status not in quality.STATUSES:
+            error = f"status must be one of {', '.join(quality.STATUSES)}"
+        if error is None and hot_from and partitions.as_date(day) < hot_from:
+            error = f"attendance_date is in an archived term (before {hot_from})"
+        if error:
+            errors.append((n, error))
+        else:
+            stage.append((n, *key, day, status))
+    return stage, errors
+
+
+# ------------------ STAGING ------------------
+def _stage(cur, table, rows):
+    """Copy rows into a session temp table with one executemany; returns its name"""
+    columns = STAGE_COLUMNS[table]
+    if db.dialect() == "mssql":
+        # Temp tables otherwise take tempdb's collation, not the key columns'
+        columns = [(c, f"{kind} COLLATE DATABASE_DEFAULT" if kind.startswith("VARCHAR") else kind)
+                   for c, kind in columns]
+    ddl = ", ".join(f"{name} {kind} NULL" for name, kind in columns)
+    if db.dialect() == "mssql":
+        name = f"#stage_{table}"
+        cur.execute(f"IF OBJECT_ID('tempdb..{name}') IS NOT NULL DROP TABLE {name}")
+        cur.execute(f"CREATE TABLE {name} ({ddl})")
+    else:
+        name = f"stage_{table}"
+        cur.execute(f"DROP TABLE IF EXISTS {name}")
+        cur.execute(f"CREATE TEMP TABLE {name} ({ddl})")
+
+    if hasattr(cur, "fast_executemany"):
+        cur.fast_executemany = True
+    sql = db.q(f"INSERT INTO {name} ({', '.join(c for c, _ in columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+    for start in range(0, len(rows), BATCH_SIZE):
+        cur.executemany(sql, rows[start:start + BATCH_SIZE])
+    return name
+
+
+def _key_match(stage):
+    """Join condition of students/courses against the staged email and code.
+
+    SQLite declares both columns COLLATE NOCASE and SQL Server compares them
+    in the database's case-insensitive default collation. Postgres compares
+    case-sensitively, so there the columns are normalised like the stage and
+    matched through the expression indexes in
+    sql/add_key_indexes_postgres.sql.
+    """
+    if db.dialect() == "postgres":
+        return (f"LOWER(s.email) = {stage}.student_email "
+                f"AND UPPER(c.course_code) = {stage}.course_code")
+    return f"s.email = {stage}.student_email AND c.course_code = {stage}.course_code"
+
+
+def _resolve(cur, stage, skip_invalid, unique, repeated):
+    """Fill enrollment_id from email + course code in one statement.
+
+    Rows that match no enrollment, or repeat another row's values of the
+    `unique` columns (reported as `repeated`), are errors; with
+    skip_invalid they are removed from the stage instead. Emails are
+    staged lowercased and course codes uppercased; the columns are compared
+    case-insensitively without wrapping them in a function, so their unique
+    indexes serve the lookup (see _key_match).
+    """
+    cur.execute(f"""
+        UPDATE {stage} SET enrollment_id = (
+            SELECT e.enrollment_id
+            FROM enrollments e
+            JOIN students s ON s.student_id = e.student_id
+            JOIN courses c ON c.course_id = e.course_id
+            WHERE {_key_match(stage)}
+        )
+        WHERE enrollment_id IS NULL
+    """)
+    cur.execute(f"""
+        SELECT st.row_no FROM {stage} st
+        LEFT JOIN enrollments e ON e.enrollment_id = st.enrollment_id
+        WHERE e.enrollment_id IS NULL
+    """)
+    errors = [(r[0], "no matching enrollment") for r in cur.fetchall()]
+    columns = ", ".join(unique)
+    cur.execute(f"""
+        SELECT st.row_no FROM {stage} st
+        JOIN (
+            SELECT {columns} FROM {stage} GROUP BY {columns} HAVING COUNT(*) > 1
+        ) dup ON {" AND ".join(f"dup.{c} = st.{c}" for c in unique)}
+    """)
+    errors += [(r[0], repeated) for r in cur.fetchall()]
+    if errors and not skip_invalid:
+        raise IngestError(sorted(errors))
+    if errors:
+        bad = sorted({n for n, _ in errors})
+        for start in range(0, len(bad), 1000):
+            batch = bad[start:start + 1000]
+            cur.execute(db.q(f"DELETE FROM {stage} WHERE row_no IN ({', '.join('?' * len(batch))})"),
+                        batch)
+    return sorted(errors)
+
+
+def _staged_enrollments(cur, stage):
+    cur.execute(f"SELECT DISTINCT enrollment_id FROM {stage}")
+    return [r[0] for r in cur.fetchall()]
+
+
+def _drop(cur, stage):
+    cur.execute(f"DROP TABLE {stage}")
+
+
+# ------------------ APPLY ------------------
+def ingest_grades(rows, skip_invalid=False, defaults=None):
+    """Validate and upsert grade rows in one transaction.
+
+    Returns (applied, errors); raises IngestError if any row is invalid
+    and skip_invalid is false.
+    """
+    stage_rows, errors = validate_grades(rows, defaults)
+    if errors and not skip_invalid:
+        raise IngestError(errors)
+    if not stage_rows:
+        return 0, errors
+
+    with services.transaction() as conn:
+        cur = conn.cursor()
+        stage = _stage(cur, "grades", stage_rows)
+        errors += _resolve(cur, stage, skip_invalid, ["enrollment_id"],
+                           "enrollment appears more than once")
+        enrollment_ids = _staged_enrollments(cur, stage)
+        if db.dialect() == "mssql":
+            cur.execute(f"""
+                MERGE INTO grades WITH (HOLDLOCK) AS target
+                USING (SELECT enrollment_id, grade FROM {stage}) AS source
+                ON target.enrollment_id = source.enrollment_id
+                WHEN MATCHED THEN UPDATE SET grade = source.grade
+                WHEN NOT MATCHED THEN INSERT (enrollment_id, grade)
+                    VALUES (source.enrollment_id, source.grade);
+            """)
+        else:
+            # WHERE true keeps SQLite from reading ON CONFLICT as a join clause
+            cur.execute(f"""
+                INSERT INTO grades(enrollment_id, grade)
+                SELECT enrollment_id, grade FROM {stage} WHERE true
+                ON CONFLICT (enrollment_id) DO UPDATE SET grade = excluded.grade
+            """)
+        materialized.refresh_enrollments(cur, enrollment_ids)
+        cur.execute(f"""
+            SELECT DISTINCT e.student_id FROM {stage} st
+            JOIN enrollments e ON e.enrollment_id = st.enrollment_id
+        """)
+        student_ids = [r[0] for r in cur.fetchall()]
+        _drop(cur, stage)
+    services.transcripts.invalidate(*student_ids)
+    return len(enrollment_ids), sorted(errors)
+
+
+def ingest_attendance(rows, skip_invalid=False, defaults=None):
+    """Validate and insert attendance rows in one transaction.
+
+    Rows already recorded for the same enrollment and date are skipped, so
+    a roster can be re-submitted safely; a file giving one enrollment and
+    date twice is invalid. Returns (inserted, errors).
+    """
+    with services.transaction() as conn:
+        cur = conn.cursor()
+        # Checked against the boundary held in this transaction, so no term
+        # can be archived before the rows are in
+        stage_rows, errors = validate_attendance(rows, defaults, partitions.locked_hot_from(cur))
+        if errors and not skip_invalid:
+            raise IngestError(errors)
+        if not stage_rows:
+            return 0, errors
+        stage = _stage(cur, "attendance", stage_rows)
+        errors += _resolve(cur, stage, skip_invalid, ["enrollment_id", "attendance_date"],
+                           "enrollment and date appear more than once")
+        cur.execute(f"""
+            INSERT INTO attendance(enrollment_id, attendance_date, status)
+            SELECT st.enrollment_id, st.attendance_date, st.status
+            FROM {stage} st
+            LEFT JOIN attendance a
+              ON a.enrollment_id = st.enrollment_id AND a.attendance_date = st.attendance_date
+            WHERE a.attendance_id IS NULL
+        """)
+        inserted = cur.rowcount
+        materialized.refresh_enrollments(cur, _staged_enrollments(cur, stage))
+        _drop(cur, stage)
+    attendance_store = services.loaded_attendance_store()
+    if attendance_store and inserted:
+        attendance_store.discard()
+    return inserted, sorted(errors)
+
+
+def ingest_file(kind, path, skip_invalid=False, defaults=None):
+    ingest = ingest_grades if kind == "grades" else ingest_attendance
+    with telemetry.timer("ingest.file", kind=kind) as t:
+        applied, errors = ingest(read_rows(path), skip_invalid, defaults)
+        t.rows = applied
+    return applied, errors
+
+
+def print_errors(errors, limit=20):
+    for n, message in errors[:limit]:
+        print(f"   row {n}: {message}")
+    if len(errors) > limit:
+        print(f"   ... and {len(errors) - limit} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load grades or attendance from a file")
+    parser.add_argument("kind", choices=["grades", "attendance"])
+    parser.add_argument("file", help=".csv, .csv.gz, .json, .jsonl or .xlsx")
+    parser.add_argument("--course-code", help="course for rows that do not name one")
+    parser.add_argument("--date", help="attendance_date for rows that do not give one")
+    parser.add_argument("--status", choices=quality.STATUSES,
+                        help="status for rows that do not give one")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="load the valid rows instead of rejecting the whole file")
+    args = parser.parse_args()
+
+    defaults = {"course_code": args.course_code, "attendance_date": args.date,
+                "status": args.status}
+    start = time.perf_counter()
+    try:
+        applied, errors = ingest_file(args.kind, args.file, args.skip_invalid, defaults)
+    except IngestError as e:
+        print(f"❌ Nothing loaded: {e}")
+        print_errors(e.errors)
+        sys.exit(1)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        print(f"⚠️  Skipped {len(errors)} invalid row(s):")
+        print_errors(errors)
+    print(f"✅ {args.kind}: {applied} rows applied in {elapsed:.2f}s "
+          f"({applied / elapsed if elapsed else 0:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,195 +1,293 @@
 # app/cli_app.py
-import pyodbc
-from dotenv import load_dotenv
+"""
+Student records command line.
+
+Without arguments it opens the interactive menu; with a subcommand it runs
+that one operation and exits with status 1 on failure, for scripts:
+
+    python app/cli_app.py add-student Ada Lovelace ada@example.org 2004-12-10
+    python app/cli_app.py enroll 12 3
+    python app/cli_app.py grade 40 91.5
+    python app/cli_app.py attendance 40 2024-09-30 Present
+    python app/cli_app.py report csv --course-id 3 -o course3.csv
+    python app/cli_app.py transcript 12
+    python app/cli_app.py bulk grades grades.xlsx --skip-invalid
+    python app/cli_app.py at-risk --threshold 70
+    python app/cli_app.py search ada love
+    python app/cli_app.py enrollment 12 CS101
+
+Where the menu asks for a student or enrollment ID, a name, email or
+course code works too; matches come from the in-memory search index
+(records/search.py), loaded once when the menu opens.
+
+Startup stays cheap: the PDF, NumPy, Excel and bulk-ingest modules are
+imported only by the commands that use them, and no connection is opened
+before the first query (benchmarks/bench_startup.py checks both).
+"""
+
+import argparse
 import os
-import csv
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from datetime import datetime
+import sys
 
-# ------------------ ENV + DB ------------------
-load_dotenv()
-
-conn_str = f"""
-Driver={{ODBC Driver 17 for SQL Server}};
-Server=tcp:{os.getenv('DB_HOST')},1433;
-Database={os.getenv('DB_NAME')};
-Uid={os.getenv('DB_USER')};
-Pwd={os.getenv('DB_PASS')};
-Encrypt=yes;
-TrustServerCertificate=no;
-Connection Timeout=30;
-"""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import db, search  # noqa: E402
+import services  # noqa: E402
 
-conn = pyodbc.connect(conn_str)
-cur = conn.cursor()
+# ------------------ ENV + DB ------------------
+# Connections come from the shared pool in records.db and are only opened
+# on first use; settings are read from .env (DB_BACKEND, DB_HOST, ...).
+# Every command is a thin wrapper over app/services.py, the same
+# functions the HTTP API (app/server.py) serves.
 
-# ------------------ VALIDATION ------------------
-def validate_email(email):
-    return "@" in email and "." in email
 
-def validate_date(date_text):
+def run(action, *args):
+    """Run one command, printing any error; returns the exit status"""
     try:
-        datetime.strptime(date_text, "%Y-%m-%d")
-        return True
-    except ValueError:
-        return False
+        return action(*args) or 0
+    except (ValueError, services.NotFound, services.Conflict) as e:
+        print("❌", e)
+        return 1
+    except Exception as e:
+        print("❌ Error:", e)
+        return 1
+
 
 # ------------------ CRUD OPERATIONS ------------------
-def add_student():
-    print("\n➕ Add Student")
-    first = input("First name: ")
-    last = input("Last name: ")
-    email = input("Email: ")
-    dob = input("DOB (YYYY-MM-DD): ")
+def do_add_student(first, last, email, dob):
+    student_id = services.add_student(first, last, email, dob)
+    print(f"✅ Student added successfully (ID {student_id}).")
 
-    if not validate_email(email):
-        print("❌ Invalid email.")
-        return
 
-    if not validate_date(dob):
-        print("❌ Invalid date format.")
-        return
+def do_enroll_student(student_id, course_id):
+    enrollment_id = services.enroll_student(student_id, course_id)
+    print(f"✅ Enrollment successful (ID {enrollment_id}).")
+
+
+def do_record_grade(enrollment_id, grade):
+    services.record_grade(enrollment_id, grade)
+    print("✅ Grade recorded.")
+
+
+def do_mark_attendance(enrollment_id, date, status):
+    services.mark_attendance(enrollment_id, date, status)
+    print("✅ Attendance recorded.")
+
+
+def do_bulk_ingest(kind, path, skip=False, defaults=None):
+    import bulk_ingest
 
     try:
-        cur.execute("""
-            INSERT INTO students(first_name, last_name, email, dob)
-            VALUES (?, ?, ?, ?)
-        """, (first, last, email, dob))
-        conn.commit()
-        print("✅ Student added successfully.")
+        applied, errors = bulk_ingest.ingest_file(kind, path, skip, defaults or {})
+    except bulk_ingest.IngestError as e:
+        print(f"❌ Nothing loaded: {e}")
+        bulk_ingest.print_errors(e.errors)
+        return 1
+    if errors:
+        print(f"⚠️  Skipped {len(errors)} invalid row(s):")
+        bulk_ingest.print_errors(errors)
+    print(f"✅ {applied} {kind} rows applied.")
+
+
+def do_search(query, courses=False, limit=10):
+    if courses:
+        for c in services.search_courses(query, limit):
+            print(f"{c['course_id']:>8}  {c['course_code']:<10} {c['course_name']}")
+        return
+    matches = services.search_students(query, limit)
+    if not matches:
+        print("❌ No matching student.")
+        return 1
+    for m in matches:
+        print(f"{m['student_id']:>8}  {m['first_name']} {m['last_name']} <{m['email']}>")
+        for e in m["enrollments"]:
+            print(f"{'':>10}enrollment {e['enrollment_id']:<8} {e['course_code']:<10} {e['course_name']}")
+
+
+def do_find_enrollment(student_id, course):
+    print(services.find_enrollment(student_id, course))
+
+
+# ------------------ LOOKUP PROMPTS ------------------
+def pick(options, label):
+    """Let the operator choose one of `options`; None if the choice is invalid"""
+    if len(options) == 1:
+        print(f"→ {label(options[0])}")
+        return options[0]
+    for i, option in enumerate(options, 1):
+        print(f"{i:>3}. {label(option)}")
+    choice = input(f"Select 1-{len(options)}: ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(options):
+        return options[int(choice) - 1]
+    print("❌ Invalid choice.")
+    return None
+
+
+def find_student(text):
+    """The search match the operator picks for `text`, or None"""
+    try:
+        matches = services.search_students(text)
     except Exception as e:
-        conn.rollback()
         print("❌ Error:", e)
+        return None
+    if not matches:
+        print("❌ No matching student.")
+        return None
+    return pick(matches, lambda m: f"{m['first_name']} {m['last_name']} <{m['email']}> "
+                                   f"(ID {m['student_id']})")
+
+
+def ask_student(prompt="Student (ID, name or email): "):
+    """A student ID typed in, or found by name or email"""
+    text = input(prompt).strip()
+    if not text or text.isdigit():
+        return text
+    student = find_student(text)
+    return student and student["student_id"]
+
+
+def ask_course(prompt="Course (ID or code): "):
+    """A course ID typed in, or found by code or name"""
+    text = input(prompt).strip()
+    if not text or text.isdigit():
+        return text
+    try:
+        matches = services.search_courses(text)
+    except Exception as e:
+        print("❌ Error:", e)
+        return None
+    if not matches:
+        print("❌ No matching course.")
+        return None
+    course = pick(matches, lambda c: f"{c['course_code']} {c['course_name']} (ID {c['course_id']})")
+    return course and course["course_id"]
+
+
+def ask_enrollment(prompt="Enrollment (ID, or student name or email): "):
+    """An enrollment ID typed in, or picked from a student's enrollments"""
+    text = input(prompt).strip()
+    if not text or text.isdigit():
+        return text
+    student = find_student(text)
+    if student is None:
+        return None
+    if not student["enrollments"]:
+        print("❌ The student has no enrollments.")
+        return None
+    enrollment = pick(student["enrollments"],
+                      lambda e: f"{e['course_code']} {e['course_name']} (enrollment {e['enrollment_id']})")
+    return enrollment and enrollment["enrollment_id"]
+
+
+def add_student():
+    print("\n➕ Add Student")
+    first = input("First name: ")
+    last = input("Last name: ")
+    email = input("Email: ")
+    dob = input("DOB (YYYY-MM-DD): ")
+    run(do_add_student, first, last, email, dob)
 
 
 def enroll_student():
     print("\n📘 Enroll Student in Course")
-    student_id = input("Student ID: ")
-    course_id = input("Course ID: ")
-
-    try:
-        cur.execute("""
-            INSERT INTO enrollments(student_id, course_id, enrollment_date)
-            VALUES (?, ?, CAST(GETDATE() AS DATE))
-        """, (student_id, course_id))
-        conn.commit()
-        print("✅ Enrollment successful.")
-    except Exception as e:
-        conn.rollback()
-        print("❌ Error:", e)
+    student_id = ask_student()
+    if student_id is None:
+        return
+    course_id = ask_course()
+    if course_id is None:
+        return
+    run(do_enroll_student, student_id, course_id)
 
 
 def record_grade():
     print("\n📝 Record Grade")
-    enrollment_id = input("Enrollment ID: ")
-    grade = float(input("Grade (0–100): "))
-
-    if grade < 0 or grade > 100:
-        print("❌ Grade must be between 0 and 100.")
+    enrollment_id = ask_enrollment()
+    if enrollment_id is None:
         return
-
-    try:
-        cur.execute("""
-            MERGE INTO grades AS target
-            USING (SELECT ? AS enrollment_id, ? AS grade) AS source
-            ON target.enrollment_id = source.enrollment_id
-            WHEN MATCHED THEN UPDATE SET grade = source.grade
-            WHEN NOT MATCHED THEN INSERT (enrollment_id, grade) VALUES (source.enrollment_id, source.grade);
-        """, (enrollment_id, grade))
-        conn.commit()
-        print("✅ Grade recorded.")
-    except Exception as e:
-        conn.rollback()
-        print("❌ Error:", e)
+    grade = input("Grade (0–100): ")
+    run(do_record_grade, enrollment_id, grade)
 
 
 def mark_attendance():
     print("\n📅 Mark Attendance")
-    enrollment_id = input("Enrollment ID: ")
+    enrollment_id = ask_enrollment()
+    if enrollment_id is None:
+        return
     date = input("Date (YYYY-MM-DD): ")
     status = input("Status (Present / Absent / Late): ")
+    run(do_mark_attendance, enrollment_id, date, status)
 
-    if not validate_date(date):
-        print("❌ Invalid date.")
-        return
 
-    if status not in ["Present", "Absent", "Late"]:
-        print("❌ Invalid status.")
-        return
+def bulk_ingest_file(kind):
+    """Shared prompt flow for the bulk grade / attendance commands"""
+    path = input("File (.csv, .json, .xlsx): ").strip()
+    defaults = {}
+    if kind == "attendance":
+        defaults["course_code"] = input("Course code (blank if in file): ").strip() or None
+        defaults["attendance_date"] = input("Date (YYYY-MM-DD, blank if in file): ").strip() or None
+        defaults["status"] = input("Status (blank if in file): ").strip() or None
+    skip = input("Skip invalid rows instead of rejecting the file? (y/N): ").strip().lower() == "y"
+    run(do_bulk_ingest, kind, path, skip, defaults)
 
-    try:
-        cur.execute("""
-            INSERT INTO attendance(enrollment_id, attendance_date, status)
-            VALUES (?, ?, ?)
-        """, (enrollment_id, date, status))
-        conn.commit()
-        print("✅ Attendance recorded.")
-    except Exception as e:
-        conn.rollback()
-        print("❌ Error:", e)
 
-# ------------------ REPORTS ------------------
-def generate_csv_report():
-    print("\n📊 Generate CSV Report")
+def bulk_record_grades():
+    print("\n📝 Bulk Record Grades")
+    bulk_ingest_file("grades")
 
-    cur.execute("""
-        SELECT s.student_id, s.first_name, s.last_name,
-               c.course_name, g.grade
-        FROM students s
-        JOIN enrollments e ON e.student_id = s.student_id
-        JOIN courses c ON c.course_id = e.course_id
-        LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
-    """)
 
-    rows = cur.fetchall()
+def bulk_mark_attendance():
+    print("\n📅 Bulk Mark Attendance")
+    bulk_ingest_file("attendance")
 
-    with open("student_report.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Student ID", "First Name", "Last Name", "Course", "Grade"])
-        writer.writerows(rows)
+# ------------------ REPORTS ------------------
+def do_export_report(file_name, course_id=None, date_from=None, date_to=None):
+    rows = services.export_report(file_name, course_id, date_from, date_to)
+    print(f"✅ Report generated: {file_name} ({rows} rows)")
 
-    print("✅ CSV report generated: student_report.csv")
 
+def do_transcript(student_id, file_name=None):
+    pdf = services.transcript_pdf(student_id)
+    file_name = file_name or f"transcript_{student_id}.pdf"
+    with open(file_name, "wb") as f:
+        f.write(pdf)
+    print(f"✅ PDF transcript generated: {file_name}")
 
-def generate_pdf_transcript():
-    print("\n📄 Generate PDF Transcript")
-    student_id = input("Student ID: ")
 
-    cur.execute("""
-        SELECT first_name, last_name
-        FROM students WHERE student_id = ?
-    """, (student_id,))
-    student = cur.fetchone()
+def do_at_risk(threshold=None, limit=20):
+    at_risk = services.attendance_at_risk(threshold)
+    print(f"⚠️  {len(at_risk)} enrollment(s) below the attendance threshold")
+    if at_risk and limit:
+        print(f"{'enrollment':>12}{'student':>10}{'course':>8}{'attendance %':>14}{'absences':>10}")
+        for r in at_risk[:limit]:
+            print(f"{r['enrollment_id']:>12}{r['student_id']:>10}{r['course_id']:>8}"
+                  f"{r['attendance_percentage']:>14.2f}{r['absence_streak']:>10}")
 
-    if not student:
-        print("❌ Student not found.")
-        return
 
-    cur.execute("""
-        SELECT c.course_name, g.grade
-        FROM enrollments e
-        JOIN courses c ON c.course_id = e.course_id
-        LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
-        WHERE e.student_id = ?
-    """, (student_id,))
-    records = cur.fetchall()
+def generate_csv_report():
+    print("\n📊 Generate CSV Report")
+    course_id = input("Course ID (blank for all): ").strip()
+    date_from = input("Enrolled from (YYYY-MM-DD, blank for any): ").strip()
+    date_to = input("Enrolled to (YYYY-MM-DD, blank for any): ").strip()
+    file_name = input("Output file [student_report.csv] (.csv, .csv.gz or .parquet): ").strip()
+    run(do_export_report, file_name or "student_report.csv", course_id, date_from, date_to)
 
-    file_name = f"transcript_{student_id}.pdf"
-    pdf = canvas.Canvas(file_name, pagesize=A4)
 
-    pdf.drawString(50, 800, f"Transcript: {student[0]} {student[1]}")
+def generate_pdf_transcript():
+    print("\n📄 Generate PDF Transcript")
+    student_id = ask_student()
+    if student_id is None:
+        return
+    run(do_transcript, student_id)
 
-    y = 760
-    for course, grade in records:
-        pdf.drawString(50, y, f"{course}: {grade}")
-        y -= 20
+# ------------------ MENU ------------------
+def search_students():
+    print("\n🔎 Find Student")
+    text = input("Name, email or ID: ").strip()
+    run(do_search, text)
 
-    pdf.save()
-    print(f"✅ PDF transcript generated: {file_name}")
 
-# ------------------ MENU ------------------
 def menu():
+    # Name lookups in the prompts are answered from memory; load the index once up front
+    run(search.shared)
     while True:
         print("""
 =============================
@@ -201,6 +299,9 @@ STUDENT RECORDS CLI SYSTEM
 4. Mark Attendance
 5. Generate CSV Report
 6. Generate PDF Transcript
+7. Bulk Record Grades (file)
+8. Bulk Mark Attendance (roster file)
+9. Find Student
 0. Exit
 """)
         choice = input("Select option: ")
@@ -217,14 +318,103 @@ STUDENT RECORDS CLI SYSTEM
             generate_csv_report()
         elif choice == "6":
             generate_pdf_transcript()
+        elif choice == "7":
+            bulk_record_grades()
+        elif choice == "8":
+            bulk_mark_attendance()
+        elif choice == "9":
+            search_students()
         elif choice == "0":
             print("👋 Exiting system.")
             break
         else:
             print("❌ Invalid choice.")
 
-    conn.close()
+# ------------------ COMMANDS ------------------
+def parser():
+    p = argparse.ArgumentParser(description="Student records command line; "
+                                            "run without a command for the interactive menu")
+    commands = p.add_subparsers(dest="command", metavar="command")
+
+    c = commands.add_parser("add-student", help="create a student")
+    c.add_argument("first_name")
+    c.add_argument("last_name")
+    c.add_argument("email")
+    c.add_argument("dob", help="YYYY-MM-DD")
+    c.set_defaults(action=lambda a: (do_add_student, a.first_name, a.last_name, a.email, a.dob))
+
+    c = commands.add_parser("enroll", help="enroll a student in a course")
+    c.add_argument("student_id")
+    c.add_argument("course_id")
+    c.set_defaults(action=lambda a: (do_enroll_student, a.student_id, a.course_id))
+
+    c = commands.add_parser("grade", help="record the grade of an enrollment")
+    c.add_argument("enrollment_id")
+    c.add_argument("grade", help="0-100")
+    c.set_defaults(action=lambda a: (do_record_grade, a.enrollment_id, a.grade))
+
+    c = commands.add_parser("attendance", help="mark attendance for one enrollment")
+    c.add_argument("enrollment_id")
+    c.add_argument("date", help="YYYY-MM-DD")
+    c.add_argument("status", choices=["Present", "Absent", "Late"])
+    c.set_defaults(action=lambda a: (do_mark_attendance, a.enrollment_id, a.date, a.status))
+
+    c = commands.add_parser("report", help="export the student report")
+    c.add_argument("format", choices=["csv", "csv.gz", "parquet"])
+    c.add_argument("-o", "--output", help="output file (default: student_report.<format>)")
+    c.add_argument("--course-id")
+    c.add_argument("--from", dest="date_from", help="enrolled on or after (YYYY-MM-DD)")
+    c.add_argument("--to", dest="date_to", help="enrolled on or before (YYYY-MM-DD)")
+    c.set_defaults(action=lambda a: (do_export_report, a.output or f"student_report.{a.format}",
+                                     a.course_id, a.date_from, a.date_to))
+
+    c = commands.add_parser("transcript", help="render a student's PDF transcript")
+    c.add_argument("student_id")
+    c.add_argument("-o", "--output", help="output file (default: transcript_<id>.pdf)")
+    c.set_defaults(action=lambda a: (do_transcript, a.student_id, a.output))
+
+    c = commands.add_parser("bulk", help="apply a grade or attendance file")
+    c.add_argument("kind", choices=["grades", "attendance"])
+    c.add_argument("path", help=".csv, .json or .xlsx")
+    c.add_argument("--skip-invalid", action="store_true",
+                   help="skip invalid rows instead of rejecting the file")
+    c.add_argument("--course-code", help="attendance: course, if not in the file")
+    c.add_argument("--date", help="attendance: YYYY-MM-DD, if not in the file")
+    c.add_argument("--status", help="attendance: status, if not in the file")
+    c.set_defaults(action=lambda a: (do_bulk_ingest, a.kind, a.path, a.skip_invalid, {
+        "course_code": a.course_code, "attendance_date": a.date, "status": a.status,
+    } if a.kind == "attendance" else {}))
+
+    c = commands.add_parser("at-risk", help="enrollments below an attendance threshold")
+    c.add_argument("--threshold", type=float, help="percentage (default 75)")
+    c.add_argument("--limit", type=int, default=20, help="rows to list")
+    c.set_defaults(action=lambda a: (do_at_risk, a.threshold, a.limit))
+
+    c = commands.add_parser("search", help="find students by name or email, with their enrollments")
+    c.add_argument("query", nargs="+")
+    c.add_argument("--courses", action="store_true", help="find courses by code or name instead")
+    c.add_argument("--limit", type=int, default=10)
+    c.set_defaults(action=lambda a: (do_search, " ".join(a.query), a.courses, a.limit))
+
+    c = commands.add_parser("enrollment", help="print the enrollment ID of a student in a course")
+    c.add_argument("student_id")
+    c.add_argument("course", help="course ID or code")
+    c.set_defaults(action=lambda a: (do_find_enrollment, a.student_id, a.course))
+
+    commands.add_parser("menu", help="interactive menu (the default)")
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        if args.command in (None, "menu"):
+            menu()
+            return 0
+        return run(*args.action(args))
+    finally:
+        db.close()
 
 # ------------------ RUN ------------------
 if __name__ == "__main__":
-    menu()
+    sys.exit(main())
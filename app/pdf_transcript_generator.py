@@ -1,48 +1,177 @@
 from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
-import psycopg2
-from dotenv import load_dotenv
+import functools
+import io
 import os
+import sys
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import db, telemetry  # noqa: E402
+
+# TrueType font file for names outside Latin-1 (e.g. DejaVuSans.ttf); default Helvetica
+TRANSCRIPT_FONT = os.getenv("TRANSCRIPT_FONT")
+
+MARGIN = 50
+ROW_HEIGHT = 18
+GRADE_COLUMN = 80
+
+
+class PageTemplate:
+    """Fonts, layout and row capacity of a transcript page.
+
+    Built once per process by template(); every page of every transcript
+    the process renders reuses it.
+    """
+
+    def __init__(self, font_file=None):
+        self.font, self.bold = "Helvetica", "Helvetica-Bold"
+        if font_file:
+            name = os.path.splitext(os.path.basename(font_file))[0]
+            pdfmetrics.registerFont(TTFont(name, font_file))
+            self.font = self.bold = name
+        width, height = A4
+        self.left, self.right = MARGIN, width - MARGIN
+        self.top, self.bottom = height - MARGIN, MARGIN + 2 * ROW_HEIGHT
+        self.course_width = self.right - self.left - GRADE_COLUMN
+        # Rows start below the full header on the first page, the short one after
+        self.first_row_y = self.top - 56 - ROW_HEIGHT
+        self.next_row_y = self.top - 24 - ROW_HEIGHT
+        self.first_capacity = int((self.first_row_y - self.bottom) // ROW_HEIGHT) + 1
+        self.next_capacity = int((self.next_row_y - self.bottom) // ROW_HEIGHT) + 1
+
+    def pages(self, rows):
+        overflow = max(0, rows - self.first_capacity)
+        return 1 + -(-overflow // self.next_capacity)
+
+    def fit(self, text, size=10):
+        """`text` shortened with an ellipsis to fit the course column"""
+        text = str(text)
+        if pdfmetrics.stringWidth(text, self.font, size) <= self.course_width:
+            return text
+        while text and pdfmetrics.stringWidth(text + "…", self.font, size) > self.course_width:
+            text = text[:-1]
+        return text + "…"
+
+    def header(self, pdf, name, gpa):
+        pdf.setFont(self.bold, 14)
+        pdf.drawString(self.left, self.top, f"Student Transcript — {name}")
+        pdf.setFont(self.font, 11)
+        pdf.drawString(self.left, self.top - 22, f"GPA: {round(gpa, 2) if gpa is not None else 'N/A'}")
+        self.columns(pdf, self.top - 56)
+        return self.first_row_y
+
+    def continuation(self, pdf, name):
+        pdf.setFont(self.bold, 11)
+        pdf.drawString(self.left, self.top, f"Student Transcript — {name} (continued)")
+        self.columns(pdf, self.top - 24)
+        return self.next_row_y
+
+    def columns(self, pdf, y):
+        pdf.setFont(self.bold, 10)
+        pdf.drawString(self.left, y, "Course")
+        pdf.drawRightString(self.right, y, "Grade")
+        pdf.line(self.left, y - 5, self.right, y - 5)
+
+    def footer(self, pdf, name, page, pages):
+        pdf.setFont(self.font, 8)
+        pdf.drawString(self.left, MARGIN, name)
+        pdf.drawRightString(self.right, MARGIN, f"Page {page} of {pages}")
+
+
+@functools.lru_cache(maxsize=None)
+def template():
+    return PageTemplate(TRANSCRIPT_FONT)
 
-conn = psycopg2.connect(
-    dbname=os.getenv("DB_NAME"),
-    user=os.getenv("DB_USER"),
-    password=os.getenv("DB_PASS"),
-    host=os.getenv("DB_HOST"),
-)
-cur = conn.cursor()
 
 def generate_transcript(student_id):
-    cur.execute("""
-        SELECT first_name, last_name, gpa
-        FROM students
-        WHERE student_id = %s
-    """, (student_id,))
-    s = cur.fetchone()
-
-    cur.execute("""
-        SELECT c.course_name, g.grade
-        FROM grades g
-        JOIN enrollments e ON e.enrollment_id = g.enrollment_id
-        JOIN courses c ON c.course_id = e.course_id
-        WHERE e.student_id = %s
-    """, (student_id,))
-    rows = cur.fetchall()
-
-    pdf = canvas.Canvas(f"transcript_{student_id}.pdf", pagesize=A4)
-    pdf.drawString(50, 800, f"Student Transcript — {s[0]} {s[1]}")
-    pdf.drawString(50, 780, f"GPA: {round(s[2],2) if s[2] else 'N/A'}")
-
-    y = 740
-    for course, grade in rows:
-        pdf.drawString(50, y, f"{course} — {grade}")
-        y -= 20
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(db.q("""
+            SELECT first_name, last_name, gpa
+            FROM students
+            WHERE student_id = ?
+        """), (student_id,))
+        s = cur.fetchone()
+        if s is None:
+            print("Student not found.")
+            return
+
+        cur.execute(db.q("""
+            SELECT c.course_name, g.grade
+            FROM grades g
+            JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+            JOIN courses c ON c.course_id = e.course_id
+            WHERE e.student_id = ?
+            ORDER BY c.course_name
+        """), (student_id,))
+        rows = cur.fetchall()
 
-    pdf.save()
+    render_transcript(f"transcript_{student_id}.pdf", s[0], s[1], s[2], rows)
     print("Transcript generated.")
 
+def draw_transcript(pdf, first_name, last_name, gpa, rows):
+    """Draw one transcript onto a canvas from a fresh page, breaking onto
+    continuation pages when the rows reach the footer"""
+    t = template()
+    name = f"{first_name} {last_name}"
+    pages = t.pages(len(rows))
+    page = 1
+    y = t.header(pdf, name, gpa)
+    if not rows:
+        pdf.setFont(t.font, 10)
+        pdf.drawString(t.left, y, "No courses on record.")
+    for course, grade in rows:
+        if y < t.bottom:
+            t.footer(pdf, name, page, pages)
+            pdf.showPage()
+            page += 1
+            y = t.continuation(pdf, name)
+        pdf.setFont(t.font, 10)
+        pdf.drawString(t.left, y, t.fit(course))
+        pdf.drawRightString(t.right, y, "—" if grade is None else f"{float(grade):.2f}")
+        y -= ROW_HEIGHT
+    t.footer(pdf, name, page, pages)
+    pdf.showPage()
+
+def _size(target):
+    return os.path.getsize(target) if isinstance(target, str) else target.tell()
+
+def render_transcript(file_name, first_name, last_name, gpa, rows):
+    """Draw one transcript PDF to a path or binary file; rows are (course_name, grade) pairs"""
+    with telemetry.timer("transcript.render") as t:
+        pdf = canvas.Canvas(file_name, pagesize=A4)
+        draw_transcript(pdf, first_name, last_name, gpa, rows)
+        pdf.save()
+        t.rows = len(rows)
+        t.bytes = _size(file_name)
+
+def render_bytes(first_name, last_name, gpa, rows):
+    """One transcript rendered in memory; returns the PDF bytes"""
+    buffer = io.BytesIO()
+    render_transcript(buffer, first_name, last_name, gpa, rows)
+    return buffer.getvalue()
+
+def render_bundle(file_name, transcripts):
+    """Many transcripts in one multi-page PDF, each starting on a new page and
+    listed in the document outline; transcripts are
+    (student_id, first_name, last_name, gpa, rows). Returns how many were drawn."""
+    with telemetry.timer("transcript.bundle") as t:
+        pdf = canvas.Canvas(file_name, pagesize=A4)
+        pdf.showOutline()
+        count = 0
+        for student_id, first_name, last_name, gpa, rows in transcripts:
+            key = f"student_{student_id}"
+            pdf.bookmarkPage(key)
+            pdf.addOutlineEntry(f"{last_name}, {first_name}", key)
+            draw_transcript(pdf, first_name, last_name, gpa, rows)
+            count += 1
+        pdf.save()
+        t.rows = count
+        t.bytes = _size(file_name)
+    return count
+
 if __name__ == "__main__":
     sid = int(input("Enter Student ID: "))
     generate_transcript(sid)
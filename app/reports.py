@@ -0,0 +1,151 @@
+# app/reports.py
+"""
+Streaming report exports.
+Rows are pulled from the database in fetchmany-sized batches (a server-side
+cursor on PostgreSQL) and written out as they arrive, so memory use does not
+grow with the report and the first rows reach disk immediately.
+"""
+
+import csv
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import db, snapshot, telemetry  # noqa: E402
+
+REPORT_HEADER = ["Student ID", "First Name", "Last Name", "Course", "Grade"]
+
+FETCH_SIZE = 5000
+
+
+def report_query(course_id=None, date_from=None, date_to=None):
+    """Student/course/grade report SQL plus parameters for the given filters"""
+    sql = """
+        SELECT s.student_id, s.first_name, s.last_name,
+               c.course_name, g.grade
+        FROM students s
+        JOIN enrollments e ON e.student_id = s.student_id
+        JOIN courses c ON c.course_id = e.course_id
+        LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
+    """
+    where, params = [], []
+    if course_id is not None:
+        where.append("e.course_id = ?")
+        params.append(course_id)
+    if date_from:
+        where.append("e.enrollment_date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("e.enrollment_date <= ?")
+        params.append(date_to)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, params
+
+
+def stream_batches(conn, sql, params=(), fetch_size=FETCH_SIZE):
+    """Yield result rows in batches without materialising the full result"""
+    if db.dialect() == "postgres":
+        # Named cursor = server-side cursor; rows stay on the server until fetched
+        cur = conn.cursor(name="report_export")
+        cur.itersize = fetch_size
+    else:
+        cur = conn.cursor()
+    cur.execute(db.q(sql), params)
+    try:
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def snapshot_batches(snapshot_dir, course_id=None, date_from=None, date_to=None,
+                     fetch_size=FETCH_SIZE):
+    """The report rows computed from a memory-mapped snapshot, in batches"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from datetime import date
+
+    enrollments = snapshot.open_table(snapshot_dir, "enrollments")
+    if course_id is not None:
+        enrollments = enrollments.filter(pc.equal(enrollments["course_id"], course_id))
+    if date_from:
+        enrollments = enrollments.filter(pc.greater_equal(
+            enrollments["enrollment_date"], pa.scalar(date.fromisoformat(date_from))))
+    if date_to:
+        enrollments = enrollments.filter(pc.less_equal(
+            enrollments["enrollment_date"], pa.scalar(date.fromisoformat(date_to))))
+
+    students = snapshot.open_table(snapshot_dir, "students").select(
+        ["student_id", "first_name", "last_name"])
+    courses = snapshot.open_table(snapshot_dir, "courses").select(["course_id", "course_name"])
+    grades = snapshot.open_table(snapshot_dir, "grades").select(["enrollment_id", "grade"])
+    report = (enrollments.select(["enrollment_id", "student_id", "course_id"])
+              .join(students, "student_id", join_type="inner")
+              .join(courses, "course_id", join_type="inner")
+              .join(grades, "enrollment_id", join_type="left outer")
+              .select(["student_id", "first_name", "last_name", "course_name", "grade"]))
+    for batch in report.to_batches(max_chunksize=fetch_size):
+        yield list(zip(*(col.to_pylist() for col in batch.columns)))
+
+
+def write_csv(path, batches):
+    """CSV (gzip-compressed when the path ends in .gz); returns rows written"""
+    opener = gzip.open if path.endswith(".gz") else open
+    written = 0
+    with telemetry.timer("report.write", format="csv") as t:
+        with opener(path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_HEADER)
+            for rows in batches:
+                writer.writerows(rows)
+                written += len(rows)
+        t.rows, t.bytes = written, os.path.getsize(path)
+    return written
+
+
+def write_parquet(path, batches):
+    """Parquet, one row group per fetched batch; requires pyarrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("student_id", pa.int64()),
+        ("first_name", pa.string()),
+        ("last_name", pa.string()),
+        ("course", pa.string()),
+        ("grade", pa.float64()),
+    ])
+    written = 0
+    with telemetry.timer("report.write", format="parquet") as t:
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for rows in batches:
+                columns = list(zip(*rows))
+                columns[4] = [None if g is None else float(g) for g in columns[4]]
+                writer.write_batch(pa.record_batch(
+                    [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                written += len(rows)
+        t.rows, t.bytes = written, os.path.getsize(path)
+    return written
+
+
+def export_report(path="student_report.csv", course_id=None, date_from=None,
+                  date_to=None, fetch_size=FETCH_SIZE, snapshot_dir=None):
+    """Export the student report to CSV, CSV.GZ or Parquet (by extension).
+
+    With a snapshot directory the report is built from the snapshot and
+    the database is not queried. Returns the number of data rows written.
+    """
+    writer = write_parquet if path.endswith(".parquet") else write_csv
+    if snapshot_dir:
+        return writer(path, snapshot_batches(snapshot_dir, course_id, date_from,
+                                             date_to, fetch_size))
+    sql, params = report_query(course_id, date_from, date_to)
+    with db.connection() as conn:
+        return writer(path, stream_batches(conn, sql, params, fetch_size))
@@ -0,0 +1,322 @@
+# app/server.py
+"""
+HTTP API over the student-records services, as a plain ASGI application.
+
+Handlers are coroutines; the blocking database work in services.py runs on
+worker threads through asyncio.to_thread, one pooled connection and one
+transaction per request. At most `max_concurrency` requests hit the
+database at once (default: the pool size) and at most `max_queue` more
+wait for a slot; beyond that the server answers 503 straight away instead
+of letting latency grow without bound.
+
+    POST /students                      {"first_name", "last_name", "email", "dob"}
+    POST /enrollments                   {"student_id", "course_id"}
+    POST /grades                        {"enrollment_id", "grade"}
+    POST /attendance                    {"enrollment_id", "date", "status"}
+    GET  /students/search               ?q=ada+love&limit=10  ranked, with enrollments
+    GET  /courses/search                ?q=CS10&limit=10
+    GET  /students/<id>/transcript      JSON
+    GET  /students/<id>/transcript.pdf  PDF
+    GET  /courses/<id>/roster           JSON
+    GET  /reports/students.csv          ?course_id=&from=&to=  (streamed)
+    GET  /reports/at-risk               ?threshold=75  enrollments below it
+    GET  /health
+    GET  /stats/cache                   hit/miss counters per cache
+    GET  /metrics                       Prometheus metrics (TELEMETRY=1)
+
+Run with any ASGI server, e.g.
+
+    uvicorn server:app --app-dir app --workers 1
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import sys
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import cache, db, search, telemetry  # noqa: E402
+import reports  # noqa: E402
+import services  # noqa: E402
+
+MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "64"))
+MAX_BODY = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------ RESPONSES ------------------
+async def send_response(send, status, body=b"", content_type="application/json", headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status, payload, headers=()):
+    await send_response(send, status, json.dumps(payload).encode(), headers=headers)
+
+
+async def read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        if not message.get("more_body"):
+            break
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Body must be JSON") from None
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+    return payload
+
+
+def fields(payload, *names):
+    missing = [n for n in names if n not in payload]
+    if missing:
+        raise HTTPError(400, f"Missing field(s): {', '.join(missing)}")
+    return [payload[n] for n in names]
+
+
+# ------------------ HANDLERS ------------------
+async def add_student(request):
+    args = fields(await read_json(request["receive"]), "first_name", "last_name", "email", "dob")
+    student_id = await asyncio.to_thread(services.add_student, *args)
+    return 201, {"student_id": student_id}
+
+
+async def enroll_student(request):
+    args = fields(await read_json(request["receive"]), "student_id", "course_id")
+    enrollment_id = await asyncio.to_thread(services.enroll_student, *args)
+    return 201, {"enrollment_id": enrollment_id}
+
+
+async def record_grade(request):
+    args = fields(await read_json(request["receive"]), "enrollment_id", "grade")
+    await asyncio.to_thread(services.record_grade, *args)
+    return 200, {"enrollment_id": args[0], "grade": float(args[1])}
+
+
+async def mark_attendance(request):
+    args = fields(await read_json(request["receive"]), "enrollment_id", "date", "status")
+    attendance_id = await asyncio.to_thread(services.mark_attendance, *args)
+    return 201, {"attendance_id": attendance_id}
+
+
+async def transcript(request, student_id):
+    return 200, await asyncio.to_thread(services.transcript, student_id)
+
+
+async def transcript_pdf(request, student_id):
+    pdf = await asyncio.to_thread(services.transcript_pdf, student_id)
+    await send_response(request["send"], 200, pdf, "application/pdf", headers=[
+        (b"content-disposition", f'inline; filename="transcript_{student_id}.pdf"'.encode())])
+
+
+def csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def student_report(request):
+    """CSV streamed batch by batch as the rows are fetched"""
+    query = {k: v[0] for k, v in parse_qs(request["scope"]["query_string"].decode()).items()}
+    batches = services.report_batches(query.get("course_id"), query.get("from"), query.get("to"))
+    send = request["send"]
+    try:
+        rows = await asyncio.to_thread(next, batches, None)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/csv; charset=utf-8"),
+                        (b"content-disposition", b'attachment; filename="student_report.csv"')],
+        })
+        # Past this point an error can only abort the connection
+        request["started"] = True
+        body = csv_chunk([reports.REPORT_HEADER])
+        while rows is not None:
+            body += csv_chunk(rows)
+            rows = await asyncio.to_thread(next, batches, None)
+            if rows is not None:
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+                body = b""
+        await send({"type": "http.response.body", "body": body})
+    finally:
+        # Closing runs the generator's cleanup, which returns its connection
+        await asyncio.to_thread(batches.close)
+
+
+async def at_risk(request):
+    query = {k: v[0] for k, v in parse_qs(request["scope"]["query_string"].decode()).items()}
+    return 200, await asyncio.to_thread(services.attendance_at_risk, query.get("threshold"))
+
+
+async def student_search(request):
+    query = {k: v[0] for k, v in parse_qs(request["scope"]["query_string"].decode()).items()}
+    return 200, await asyncio.to_thread(services.search_students, query.get("q"), query.get("limit"))
+
+
+async def course_search(request):
+    query = {k: v[0] for k, v in parse_qs(request["scope"]["query_string"].decode()).items()}
+    return 200, await asyncio.to_thread(services.search_courses, query.get("q"), query.get("limit"))
+
+
+async def roster(request, course_id):
+    return 200, await asyncio.to_thread(services.roster, course_id)
+
+
+async def health(request):
+    return 200, {"status": "ok"}
+
+
+async def metrics(request):
+    """Prometheus text exposition of the telemetry metrics (TELEMETRY=1)"""
+    if not telemetry.enabled:
+        raise HTTPError(404, "Telemetry is disabled")
+    await send_response(request["send"], 200, telemetry.to_prometheus().encode(),
+                        content_type="text/plain; version=0.0.4")
+
+
+async def cache_stats(request):
+    return 200, cache.stats()
+
+
+ROUTES = [
+    ("POST", r"/students", add_student),
+    ("POST", r"/enrollments", enroll_student),
+    ("POST", r"/grades", record_grade),
+    ("POST", r"/attendance", mark_attendance),
+    ("GET", r"/students/search", student_search),
+    ("GET", r"/courses/search", course_search),
+    ("GET", r"/students/(\d+)/transcript", transcript),
+    ("GET", r"/students/(\d+)/transcript\.pdf", transcript_pdf),
+    ("GET", r"/courses/(\d+)/roster", roster),
+    ("GET", r"/reports/students\.csv", student_report),
+    ("GET", r"/reports/at-risk", at_risk),
+    ("GET", r"/health", health),
+    ("GET", r"/stats/cache", cache_stats),
+    ("GET", r"/metrics", metrics),
+]
+ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+
+
+def route(method, path):
+    allowed = False
+    for route_method, pattern, handler in ROUTES:
+        match = pattern.match(path)
+        if match:
+            if route_method == method:
+                return handler, match.groups()
+            allowed = True
+    raise HTTPError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+
+
+# ------------------ APPLICATION ------------------
+class App:
+    """ASGI application with bounded concurrency and a bounded wait queue"""
+
+    def __init__(self, max_concurrency=None, max_queue=MAX_QUEUE):
+        self.max_concurrency = max_concurrency or db.settings()["pool_size"]
+        self.max_queue = max_queue
+        self.waiting = 0
+        self._slots = None  # asyncio.Semaphore, created on the serving loop
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Load the search index now rather than on the first search request
+                try:
+                    await asyncio.to_thread(search.shared)
+                except Exception as e:
+                    print(f"⚠️  Search index not preloaded: {e!r}", file=sys.stderr)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                db.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def http(self, scope, receive, send):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        try:
+            handler, args = route(scope["method"], scope["path"])
+        except HTTPError as e:
+            return await send_json(send, e.status, {"error": str(e)})
+
+        # Backpressure: shed load once the wait queue is full
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            return await send_json(send, 503, {"error": "Server busy, retry shortly"},
+                                   headers=[(b"retry-after", b"1")])
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        request = {"scope": scope, "receive": receive, "send": send}
+        with telemetry.timer("http.request") as span:
+            try:
+                result = await handler(request, *args)
+            except Exception as e:
+                if request.get("started"):
+                    raise
+                result = self.error(scope, e)
+            finally:
+                self._slots.release()
+            if result is not None:
+                await send_json(send, *result)
+            span.labels = {"handler": handler.__name__, "status": result[0] if result else 200}
+
+    @staticmethod
+    def error(scope, e):
+        """(status, body) for an exception raised by a handler"""
+        if isinstance(e, HTTPError):
+            return e.status, {"error": str(e)}
+        if isinstance(e, ValueError):
+            return 400, {"error": str(e)}
+        if isinstance(e, services.NotFound):
+            return 404, {"error": str(e)}
+        if isinstance(e, services.Conflict):
+            return 409, {"error": str(e)}
+        if isinstance(e, db.PoolTimeout):
+            return 503, {"error": str(e)}
+        print(f"❌ {scope['method']} {scope['path']}: {e!r}", file=sys.stderr)
+        return 500, {"error": "Internal server error"}
+
+
+app = App()
+
+
+def main():
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required to serve the API: pip install uvicorn")
+    uvicorn.run(app, host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+# app/services.py
+"""
+Student-records operations shared by the CLI and the HTTP API (server.py).
+
+Every function runs in its own transaction on a pooled connection: it
+commits when the operation succeeds and rolls back on any error, so a
+failed request never leaves partial writes behind. Bad input raises
+ValueError, a missing record NotFound, and a write that breaks a
+unique or foreign-key constraint Conflict.
+
+Transcript and roster reads go through the read-through caches in
+records/cache.py; each write invalidates the entries it changes once its
+transaction has committed. Attendance rates come from the in-process store
+in records/attendance_store.py, which mark_attendance() updates in place.
+Students, courses and enrollments are looked up by name, email or course
+code through the search index in records/search.py, which add_student()
+and enroll_student() update in place.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import cache, db, materialized, partitions, quality, search  # noqa: E402
+import reports  # noqa: E402
+
+
+# student_id -> (first_name, last_name, gpa)
+students = cache.named("students")
+# course_id -> (course_name, course_code, credits)
+courses = cache.named("courses")
+# student_id -> [(course_id, grade)]
+transcripts = cache.named("transcripts")
+# course_id -> [(student_id, first_name, last_name, email)]
+rosters = cache.named("rosters")
+
+
+class Conflict(Exception):
+    """The write would break a uniqueness or foreign-key constraint"""
+
+
+class NotFound(LookupError):
+    """The student, course or enrollment does not exist"""
+
+
+@contextmanager
+def transaction():
+    """A pooled connection whose work is committed on success"""
+    with db.connection() as conn:
+        try:
+            yield conn
+        except Exception as e:
+            # Every DB-API driver names its constraint error IntegrityError
+            if type(e).__name__ == "IntegrityError":
+                raise Conflict(str(e)) from e
+            raise
+        conn.commit()
+
+
+def _insert(cur, table, columns, values, id_column):
+    """INSERT one row and return its generated id"""
+    cols, marks = ", ".join(columns), ", ".join("?" * len(columns))
+    if db.dialect() == "mssql":
+        cur.execute(f"INSERT INTO {table}({cols}) OUTPUT INSERTED.{id_column} VALUES ({marks})",
+                    values)
+    elif db.dialect() == "postgres":
+        cur.execute(db.q(f"INSERT INTO {table}({cols}) VALUES ({marks}) RETURNING {id_column}"),
+                    values)
+    else:
+        cur.execute(db.q(f"INSERT INTO {table}({cols}) VALUES ({marks})"), values)
+        return cur.lastrowid
+    return cur.fetchone()[0]
+
+
+def _require(cur, table, id_column, value):
+    cur.execute(db.q(f"SELECT 1 FROM {table} WHERE {id_column} = ?"), (value,))
+    if cur.fetchone() is None:
+        raise NotFound(f"{table[:-1].capitalize()} {value} not found")
+
+
+def _enrollment(cur, enrollment_id):
+    """(student_id, course_id) of an enrollment"""
+    cur.execute(db.q("SELECT student_id, course_id FROM enrollments WHERE enrollment_id = ?"),
+                (enrollment_id,))
+    row = cur.fetchone()
+    if row is None:
+        raise NotFound(f"Enrollment {enrollment_id} not found")
+    return tuple(row)
+
+
+def _student_of(cur, enrollment_id):
+    return _enrollment(cur, enrollment_id)[0]
+
+
+def loaded_attendance_store():
+    """records.attendance_store if this process has loaded it, else None.
+
+    The store pulls in NumPy, so writers only touch it once a reader has.
+    """
+    return sys.modules.get("records.attendance_store")
+
+
+def _as_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+
+
+# ------------------ WRITES ------------------
+def add_student(first_name, last_name, email, dob):
+    """Create a student; returns the new student_id"""
+    if not quality.is_valid_email(email):
+        raise ValueError("Invalid email.")
+    if not quality.is_valid_date(dob):
+        raise ValueError("Invalid date format.")
+    with transaction() as conn:
+        student_id = _insert(conn.cursor(), "students",
+                             ["first_name", "last_name", "email", "dob"],
+                             (first_name, last_name, email, dob), "student_id")
+    students.invalidate(student_id)
+    search.record_student(student_id, first_name, last_name, email)
+    return student_id
+
+
+def enroll_student(student_id, course_id):
+    """Enroll a student in a course as of today; returns the enrollment_id"""
+    student_id = _as_int(student_id, "student_id")
+    course_id = _as_int(course_id, "course_id")
+    with transaction() as conn:
+        cur = conn.cursor()
+        _require(cur, "students", "student_id", student_id)
+        _require(cur, "courses", "course_id", course_id)
+        enrollment_id = _insert(cur, "enrollments", ["student_id", "course_id", "enrollment_date"],
+                                (student_id, course_id, datetime.now().strftime("%Y-%m-%d")),
+                                "enrollment_id")
+    transcripts.invalidate(student_id)
+    rosters.invalidate(course_id)
+    search.record_enrollment(enrollment_id, student_id, course_id)
+    return enrollment_id
+
+
+def record_grade(enrollment_id, grade):
+    """Set (or replace) the grade of an enrollment"""
+    enrollment_id = _as_int(enrollment_id, "enrollment_id")
+    try:
+        grade = float(grade)
+    except (TypeError, ValueError):
+        raise ValueError("Grade must be a number.") from None
+    if grade < 0 or grade > 100:
+        raise ValueError("Grade must be between 0 and 100.")
+
+    with transaction() as conn:
+        cur = conn.cursor()
+        student_id = _student_of(cur, enrollment_id)
+        materialized.on_grade(cur, enrollment_id, grade)
+        if db.dialect() == "mssql":
+            cur.execute("""
+                MERGE INTO grades AS target
+                USING (SELECT ? AS enrollment_id, ? AS grade) AS source
+                ON target.enrollment_id = source.enrollment_id
+                WHEN MATCHED THEN UPDATE SET grade = source.grade
+                WHEN NOT MATCHED THEN INSERT (enrollment_id, grade) VALUES (source.enrollment_id, source.grade);
+            """, (enrollment_id, grade))
+        else:
+            cur.execute(db.q("""
+                INSERT INTO grades(enrollment_id, grade) VALUES (?, ?)
+                ON CONFLICT (enrollment_id) DO UPDATE SET grade = excluded.grade
+            """), (enrollment_id, grade))
+    transcripts.invalidate(student_id)
+
+
+def _attendance_on(cur, enrollment_id, attendance_date):
+    """(attendance_id, status) recorded for an enrollment on a day, or None.
+
+    The row, or on SQL Server the gap where it would go, stays locked until
+    the transaction ends, so concurrent marks of one day update in turn.
+    """
+    if db.dialect() == "mssql":
+        sql = """
+            SELECT attendance_id, status FROM attendance WITH (UPDLOCK, HOLDLOCK)
+            WHERE enrollment_id = ? AND attendance_date = ?
+        """
+    else:
+        sql = "SELECT attendance_id, status FROM attendance WHERE enrollment_id = ? AND attendance_date = ?"
+        if db.dialect() == "postgres":
+            sql += " FOR UPDATE"
+    cur.execute(db.q(sql), (enrollment_id, attendance_date))
+    row = cur.fetchone()
+    return None if row is None else tuple(row)
+
+
+def mark_attendance(enrollment_id, attendance_date, status):
+    """Record an enrollment's attendance on a day; returns the attendance_id.
+
+    There is one row per enrollment and day: marking a day again replaces
+    its status, as the attendance store does.
+    """
+    enrollment_id = _as_int(enrollment_id, "enrollment_id")
+    if not quality.is_valid_date(attendance_date):
+        raise ValueError("Invalid date.")
+    if status not in quality.STATUSES:
+        raise ValueError("Invalid status.")
+
+    with transaction() as conn:
+        cur = conn.cursor()
+        partitions.check_hot(attendance_date, cur)
+        student_id, course_id = _enrollment(cur, enrollment_id)
+        existing = _attendance_on(cur, enrollment_id, attendance_date)
+        if existing is None:
+            previous = None
+            attendance_id = _insert(cur, "attendance",
+                                    ["enrollment_id", "attendance_date", "status"],
+                                    (enrollment_id, attendance_date, status), "attendance_id")
+        else:
+            attendance_id, previous = existing
+            cur.execute(db.q("UPDATE attendance SET status = ? WHERE attendance_id = ?"),
+                        (status, attendance_id))
+        materialized.on_attendance(cur, enrollment_id, status, previous)
+    attendance_store = loaded_attendance_store()
+    if attendance_store:
+        attendance_store.record(enrollment_id, attendance_date, status, student_id, course_id)
+    return attendance_id
+
+
+# ------------------ READS ------------------
+def _load_student(student_id):
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute(db.q("""
+            SELECT first_name, last_name, gpa
+            FROM students WHERE student_id = ?
+        """), (student_id,))
+        row = cur.fetchone()
+    if not row:
+        raise NotFound(f"Student {student_id} not found")
+    first, last, gpa = row
+    return first, last, None if gpa is None else float(gpa)
+
+
+def _load_transcript(student_id):
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute(db.q("""
+            SELECT e.course_id, g.grade
+            FROM enrollments e
+            LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
+            WHERE e.student_id = ?
+        """), (student_id,))
+        return [(course_id, None if grade is None else float(grade))
+                for course_id, grade in cur.fetchall()]
+
+
+def _load_courses(course_ids):
+    loaded = {}
+    with transaction() as conn:
+        cur = conn.cursor()
+        for start in range(0, len(course_ids), 1000):
+            batch = course_ids[start:start + 1000]
+            cur.execute(db.q(f"""
+                SELECT course_id, course_name, course_code, credits
+                FROM courses WHERE course_id IN ({", ".join("?" * len(batch))})
+            """), batch)
+            loaded.update({r[0]: tuple(r[1:]) for r in cur.fetchall()})
+    return loaded
+
+
+def _load_roster(course_id):
+    with transaction() as conn:
+        cur = conn.cursor()
+        cur.execute(db.q("""
+            SELECT s.student_id, s.first_name, s.last_name, s.email
+            FROM enrollments e
+            JOIN students s ON s.student_id = e.student_id
+            WHERE e.course_id = ?
+            ORDER BY s.last_name, s.first_name
+        """), (course_id,))
+        return [tuple(r) for r in cur.fetchall()]
+
+
+def transcript(student_id):
+    """A student's name, GPA and (course_name, grade) rows.
+
+    Student, enrollment/grade and course-name lookups are cached
+    separately, so a new grade reloads only that student's rows.
+    """
+    student_id = _as_int(student_id, "student_id")
+    first, last, gpa = students.get_or_load(student_id, lambda: _load_student(student_id))
+    rows = transcripts.get_or_load(student_id, lambda: _load_transcript(student_id))
+    names = courses.get_many(sorted({course_id for course_id, _ in rows}), _load_courses)
+    return {
+        "student_id": student_id,
+        "first_name": first,
+        "last_name": last,
+        "gpa": gpa,
+        "courses": sorted(((names[course_id][0], grade) for course_id, grade in rows
+                           if course_id in names), key=lambda row: row[0]),
+    }
+
+
+def roster(course_id):
+    """A course and the students enrolled in it"""
+    course_id = _as_int(course_id, "course_id")
+    found = courses.get_many([course_id], _load_courses)
+    if course_id not in found:
+        raise NotFound(f"Course {course_id} not found")
+    name, code, credits = found[course_id]
+    enrolled = rosters.get_or_load(course_id, lambda: _load_roster(course_id))
+    return {
+        "course_id": course_id,
+        "course_name": name,
+        "course_code": code,
+        "credits": credits,
+        "students": [dict(zip(["student_id", "first_name", "last_name", "email"], s))
+                     for s in enrolled],
+    }
+
+
+def attendance_at_risk(threshold=None):
+    """Enrollments below the attendance threshold, lowest first, with each
+    one's current run of absences; answered from the attendance store"""
+    from records import attendance_store
+
+    if threshold is None or threshold == "":
+        threshold = attendance_store.AT_RISK_BELOW
+    try:
+        threshold = float(threshold)
+    except (TypeError, ValueError):
+        raise ValueError("threshold must be a number") from None
+    # One view, so the streaks line up with the at-risk rows under concurrent marks
+    store = attendance_store.shared().view()
+    at_risk = store.at_risk(threshold)
+    absences, _ = store.streaks("Absent")
+    at_risk["absence_streak"] = absences[store.rows_of(at_risk["enrollment_id"])]
+    order = at_risk["attendance_percentage"].argsort(kind="stable")
+    columns = {name: values[order].tolist() for name, values in at_risk.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def _limit(limit):
+    limit = _as_int(limit, "limit") if limit not in (None, "") else 10
+    if limit < 1:
+        raise ValueError("limit must be positive.")
+    return limit
+
+
+def search_students(query, limit=10):
+    """Students whose name or email best match `query`, each with their enrollments"""
+    if not str(query or "").strip():
+        raise ValueError("Search text is required.")
+    index = search.shared()
+    return [dict(s, enrollments=index.enrollments_of(s["student_id"]))
+            for s in index.find_students(query, _limit(limit))]
+
+
+def search_courses(query, limit=10):
+    """Courses whose code or name best match `query`"""
+    if not str(query or "").strip():
+        raise ValueError("Search text is required.")
+    return search.shared().find_courses(query, _limit(limit))
+
+
+def find_enrollment(student_id, course):
+    """The enrollment_id of a student in a course given by id or code"""
+    student_id = _as_int(student_id, "student_id")
+    index = search.shared()
+    try:
+        course_id = index.course_id(course)
+    except LookupError as e:
+        raise NotFound(str(e)) from None
+    try:
+        return index.enrollment_id(student_id, course_id)
+    except LookupError as e:
+        # Possibly enrolled by another process since the index was loaded
+        with transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(db.q("SELECT enrollment_id FROM enrollments WHERE student_id = ? AND course_id = ?"),
+                        (student_id, course_id))
+            row = cur.fetchone()
+        if row is None:
+            raise NotFound(str(e)) from None
+        index.add_enrollment(row[0], student_id, course_id)
+        return row[0]
+
+
+def transcript_pdf(student_id):
+    """The transcript rendered as PDF bytes"""
+    from pdf_transcript_generator import render_bytes
+
+    t = transcript(student_id)
+    return render_bytes(t["first_name"], t["last_name"], t["gpa"], t["courses"])
+
+
+def report_batches(course_id=None, date_from=None, date_to=None,
+                   fetch_size=reports.FETCH_SIZE):
+    """Stream the student report as row batches.
+
+    Filters are validated up front; the connection is held only while the
+    generator is being consumed.
+    """
+    if course_id is not None and course_id != "":
+        course_id = _as_int(course_id, "course_id")
+    else:
+        course_id = None
+    if any(d and not quality.is_valid_date(d) for d in (date_from, date_to)):
+        raise ValueError("Invalid date format.")
+    sql, params = reports.report_query(course_id, date_from or None, date_to or None)
+
+    def batches():
+        with transaction() as conn:
+            yield from reports.stream_batches(conn, sql, params, fetch_size)
+    return batches()
+
+
+def export_report(path, course_id=None, date_from=None, date_to=None):
+    """Write the student report to a file; returns the number of rows"""
+    batches = report_batches(course_id, date_from, date_to)
+    writer = reports.write_parquet if path.endswith(".parquet") else reports.write_csv
+    return writer(path, batches)
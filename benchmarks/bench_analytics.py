@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Benchmark: credit-weighted GPA via the equivalent SQL GROUP BY vs. the
+vectorised analytics engine (bulk fetch + pandas groupby), on the local
+SQLite stand-in at increasing scale.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), "app"))
+
+import analytics  # noqa: E402
+import standin  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--per-student", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'grades':>10}{'sql s':>10}{'fetch s':>10}{'compute s':>11}{'grades/s':>14}  match")
+    with tempfile.TemporaryDirectory() as tmp:
+        for students in args.students:
+            conn = standin.create_db(os.path.join(tmp, f"bench_{students}.db"))
+            grades = standin.seed(conn, students=students, courses=50,
+                                  per_student=args.per_student, sessions=0)
+
+            sql_rows, sql_s = timed(lambda: conn.execute(analytics.GPA_SQL).fetchall())
+            df, fetch_s = timed(lambda: analytics.fetch_grades(conn))
+            gpa, compute_s = timed(lambda: analytics.compute_gpa(df))
+            conn.close()
+
+            expected = dict(sql_rows)
+            match = len(expected) == len(gpa) and np.allclose(
+                gpa.to_numpy(), [expected[i] for i in gpa.index])
+            print(f"{grades:>10}{sql_s:>10.3f}{fetch_s:>10.3f}{compute_s:>11.3f}"
+                  f"{grades / compute_s:>14.0f}  {'✅' if match else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
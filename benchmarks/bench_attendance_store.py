@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark: attendance rates and the below-75% check from the in-process
+attendance store vs. SQL (the summary-table view and a GROUP BY over the
+attendance rows), plus the store's memory against a DataFrame of the same
+rows, on the local SQLite stand-in at increasing scale.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import standin
+from records import attendance_store, db, materialized  # standin puts the project root on sys.path
+
+GROUP_BY_SQL = """
+    SELECT enrollment_id,
+           ROUND(SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2)
+    FROM attendance
+    GROUP BY enrollment_id
+"""
+VIEW_SQL = """
+    SELECT e.enrollment_id, v.attendance_percentage
+    FROM vw_at_risk_students v
+    JOIN courses c ON c.course_name = v.course_name
+    JOIN enrollments e ON e.student_id = v.student_id AND e.course_id = c.course_id
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[2_000, 10_000, 40_000])
+    parser.add_argument("--per-student", type=int, default=5)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--marks", type=int, default=10_000,
+                        help="single attendance writes applied in place")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10}{'group by s':>12}{'view s':>9}{'load s':>9}{'store ms':>10}"
+          f"{'streaks ms':>12}{'mark µs':>9}{'store MB':>10}{'frame MB':>10}  match")
+    with tempfile.TemporaryDirectory() as tmp:
+        for students in args.students:
+            path = os.path.join(tmp, f"bench_{students}.db")
+            conn = standin.create_db(path)
+            standin.use_pool(path)
+            standin.seed(conn, students=students, courses=50,
+                         per_student=args.per_student, sessions=args.sessions)
+            materialized.rebuild(conn)
+
+            by_enrollment, group_s = timed(lambda: conn.execute(GROUP_BY_SQL).fetchall())
+            view, view_s = timed(lambda: conn.execute(VIEW_SQL).fetchall())
+            store, load_s = timed(lambda: attendance_store.AttendanceStore.load(conn))
+            at_risk, store_s = timed(lambda: store.at_risk())
+            _, streak_s = timed(lambda: store.streaks("Absent"))
+
+            frame = pd.DataFrame(conn.execute(
+                "SELECT attendance_id, enrollment_id, attendance_date, status FROM attendance"
+            ).fetchall(), columns=["attendance_id", "enrollment_id", "attendance_date", "status"])
+            frame_mb = frame.memory_usage(deep=True).sum() / 1e6
+
+            sessions, store_mb = store.sessions, store.nbytes / 1e6
+            summary = store.summary()
+            expected = dict(by_enrollment)
+            match = (len(expected) == len(summary["enrollment_id"])
+                     and np.allclose(summary["attendance_percentage"],
+                                     [expected[i] for i in summary["enrollment_id"].tolist()])
+                     and sorted(at_risk["enrollment_id"].tolist()) == sorted(r[0] for r in view))
+
+            # New days at the end of existing enrollments, as mark_attendance() applies them
+            rng = np.random.default_rng(0)
+            targets = rng.integers(0, len(store), args.marks)
+            start = time.perf_counter()
+            for i, row in enumerate(targets.tolist()):
+                store.mark(int(store.enrollment_ids[row]), f"2025-0{1 + i % 9}-{1 + i % 28:02d}",
+                           "Absent", int(store.student_ids[row]), int(store.course_ids[row]))
+            mark_us = (time.perf_counter() - start) / args.marks * 1e6
+            conn.close()
+            db.close()
+
+            print(f"{sessions:>10}{group_s:>12.3f}{view_s:>9.3f}{load_s:>9.3f}"
+                  f"{store_s * 1000:>10.2f}{streak_s * 1000:>12.2f}{mark_us:>9.1f}"
+                  f"{store_mb:>10.1f}{frame_mb:>10.1f}  {'✅' if match else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark: marking attendance and recording grades one row per
+transaction (the interactive CLI path) vs. bulk ingestion through a
+staging table in one transaction, on the local SQLite stand-in.
+Rows identify enrollments by student email + course code, as a roster
+would.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), "app"))
+
+import bulk_ingest  # noqa: E402
+import services  # noqa: E402
+import standin  # noqa: E402
+
+
+def roster(conn, rows):
+    """(enrollment_id, student_email, course_code) for the first `rows` enrollments"""
+    return conn.execute("""
+        SELECT e.enrollment_id, s.email, c.course_code
+        FROM enrollments e
+        JOIN students s ON s.student_id = e.student_id
+        JOIN courses c ON c.course_id = e.course_id
+        ORDER BY e.enrollment_id LIMIT ?
+    """, (rows,)).fetchall()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[300, 3000, 30000])
+    parser.add_argument("--row-by-row-limit", type=int, default=3000,
+                        help="skip the row-by-row path above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'kind':<11}{'rows':>8}{'row s':>10}{'bulk s':>10}{'bulk rows/s':>14}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"bench_{rows}.db")
+            conn = standin.create_db(path)
+            standin.seed(conn, students=max(100, rows // 4), courses=20,
+                         per_student=4, sessions=0)
+            # Drop the seeded grades so both paths insert rather than update
+            conn.execute("DELETE FROM grades")
+            conn.commit()
+            enrollments = roster(conn, rows)
+            conn.close()
+            standin.use_pool(path)
+
+            for kind in ("attendance", "grades"):
+                if kind == "attendance":
+                    single = [(e, "2024-10-01", "Present") for e, _, _ in enrollments]
+                    bulk = [{"student_email": email, "course_code": code,
+                             "attendance_date": "2024-10-02", "status": "Present"}
+                            for _, email, code in enrollments]
+
+                    def one_by_one():
+                        for args_ in single:
+                            services.mark_attendance(*args_)
+
+                    def in_bulk():
+                        bulk_ingest.ingest_attendance(bulk)
+                else:
+                    half = len(enrollments) // 2
+                    single = [(e, 75.0) for e, _, _ in enrollments[:half]]
+                    bulk = [{"student_email": email, "course_code": code, "grade": 82}
+                            for _, email, code in enrollments[half:]]
+
+                    def one_by_one():
+                        for args_ in single:
+                            services.record_grade(*args_)
+
+                    def in_bulk():
+                        bulk_ingest.ingest_grades(bulk)
+
+                row_s = timed(one_by_one) if rows <= args.row_by_row_limit else None
+                bulk_s = timed(in_bulk)
+                # Normalise the row-by-row time to the same row count as the bulk run
+                row_s = row_s * len(bulk) / len(single) if row_s and single else row_s
+                print(f"{kind:<11}{len(bulk):>8}"
+                      f"{(f'{row_s:.3f}' if row_s else '-'):>10}{bulk_s:>10.3f}"
+                      f"{len(bulk) / bulk_s:>14.0f}"
+                      f"{(f'{row_s / bulk_s:.0f}x' if row_s else '-'):>9}")
+            services.db.close()
+
+
+if __name__ == "__main__":
+    main()
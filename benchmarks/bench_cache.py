@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark: repeated transcript lookups through the service layer with the
+read-through caches disabled vs. enabled, on the local SQLite stand-in.
+Lookups hit a working set of students; a fraction of operations are grade
+writes, which invalidate the affected transcripts.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), "app"))
+
+import services  # noqa: E402
+import standin  # noqa: E402
+from records import cache  # noqa: E402
+
+CACHES = [services.students, services.courses, services.transcripts, services.rosters]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(lookups, working_set, enrollments, write_ratio, seed):
+    """Latencies of `lookups` transcript reads, with grade writes mixed in"""
+    rnd = random.Random(seed)
+    latencies = []
+    for _ in range(lookups):
+        if rnd.random() < write_ratio:
+            services.record_grade(rnd.randint(1, enrollments), round(rnd.uniform(40, 100), 1))
+        student_id = rnd.randint(1, working_set)
+        start = time.perf_counter()
+        services.transcript(student_id)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--working-set", type=int, default=2000,
+                        help="distinct students looked up")
+    parser.add_argument("--write-ratio", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_cache.db")
+        conn = standin.create_db(path)
+        enrollments = standin.seed(conn, students=args.students, courses=50,
+                                   per_student=5, sessions=0)
+        conn.close()
+        standin.use_pool(path)
+
+        print(f"{'cache':<10}{'lookups/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'hit rate':>10}")
+        for label, ttl in (("off", 0), ("on", cache.CACHE_TTL or 300)):
+            for c in CACHES:
+                c.clear()
+                c.ttl = ttl
+                c.hits = c.misses = 0
+            start = time.perf_counter()
+            latencies = run(args.lookups, min(args.working_set, args.students), enrollments,
+                            args.write_ratio, seed=1)
+            elapsed = time.perf_counter() - start
+            hits = sum(c.hits for c in CACHES)
+            lookups = hits + sum(c.misses for c in CACHES)
+            print(f"{label:<10}{args.lookups / elapsed:>11.0f}"
+                  f"{percentile(latencies, 50) * 1000:>10.3f}{percentile(latencies, 99) * 1000:>10.3f}"
+                  f"{(hits / lookups if lookups else 0):>10.1%}")
+
+        print("\nPer cache (cache on):")
+        for name, counters in cache.stats().items():
+            print(f"  {name:<12} {counters}")
+        services.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Benchmark: row-by-row student load vs. the batched executemany loader.
+Runs both paths against a local SQLite database built from
+sql/create_tables_sqlite.sql, standing in for SQL Server over ODBC.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "etl"))
+
+import etl_pipeline_advanced as etl  # noqa: E402
+import standin  # noqa: E402
+
+
+def make_students_csv(path, rows, dup_ratio=0.05, seed=42):
+    """Write a synthetic students.csv with a share of duplicate emails"""
+    rnd = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["first_name", "last_name", "email", "dob"])
+        for i in range(rows):
+            n = rnd.randrange(i) if i and rnd.random() < dup_ratio else i
+            writer.writerow([
+                f"First{n}", f"Last{n}", f"student{n}@example.org",
+                f"{rnd.randint(1994, 2006)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            ])
+
+
+def fresh_db(path, preload=0):
+    """Create an empty stand-in DB, optionally seeded with existing students"""
+    conn = standin.create_db(path)
+    conn.executemany(
+        "INSERT INTO students(first_name,last_name,email,dob) VALUES (?,?,?,?)",
+        [(f"First{i}", f"Last{i}", f"student{i}@example.org", "2000-01-01")
+         for i in range(preload)],
+    )
+    conn.commit()
+    return conn
+
+
+def load_row_by_row(conn, path):
+    """The original loader: one INSERT per row, duplicates via IntegrityError"""
+    cur = conn.cursor()
+    df = pd.read_csv(path)
+    loaded = 0
+    for _, r in df.iterrows():
+        try:
+            cur.execute(etl.STUDENT_INSERT, (r.first_name, r.last_name, r.email, r.dob))
+            loaded += 1
+        except sqlite3.IntegrityError:
+            pass
+    conn.commit()
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--preload", type=int, default=1_000,
+                        help="students already in the DB before the load")
+    parser.add_argument("--batch-size", type=int, default=etl.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "students.csv")
+        db_path = os.path.join(tmp, "bench.db")
+        make_students_csv(csv_path, args.rows)
+
+        results = {}
+        for name, run in [
+            ("row-by-row", lambda c: load_row_by_row(c, csv_path)),
+            ("batched", lambda c: etl.load_students(c, csv_path, args.batch_size)),
+        ]:
+            conn = fresh_db(db_path, args.preload)
+            start = time.perf_counter()
+            loaded = run(conn)
+            elapsed = time.perf_counter() - start
+            total = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+            conn.close()
+            results[name] = (loaded, total, elapsed)
+
+    print(f"\n{'path':<12}{'loaded':>10}{'in table':>10}{'seconds':>10}{'rows/s':>12}")
+    for name, (loaded, total, elapsed) in results.items():
+        print(f"{name:<12}{loaded:>10}{total:>10}{elapsed:>10.2f}{loaded / elapsed:>12.0f}")
+    base, fast = results["row-by-row"][2], results["batched"][2]
+    print(f"\nSpeed-up: {base / fast:.1f}x")
+    if results["row-by-row"][1] != results["batched"][1]:
+        print("⚠️  Row counts differ between paths")
+
+
+if __name__ == "__main__":
+    main()
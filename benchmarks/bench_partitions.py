@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark: attendance queries over the whole history vs. the current term
+only, after records/partitions.py archived the closed terms, on the local
+SQLite stand-in.
+
+The stand-in is seeded with one session a day for --sessions days, so
+several terms are closed. The hot-path queries (the attendance GROUP BY
+behind the summary refresh, the at-risk view and the attendance store
+load) are timed before and after archive(); the archive itself is timed
+per term with the size of its Parquet file.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import standin
+from records import attendance_store, db, materialized, partitions  # standin puts the project root on sys.path
+
+GROUP_BY_SQL = """
+    SELECT enrollment_id,
+           SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END), COUNT(*)
+    FROM attendance
+    GROUP BY enrollment_id
+"""
+AT_RISK_SQL = "SELECT COUNT(*) FROM vw_at_risk_students"
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(conn):
+    return {
+        "rows": conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0],
+        "group by s": timed(lambda: conn.execute(GROUP_BY_SQL).fetchall()),
+        "at-risk view s": timed(lambda: conn.execute(AT_RISK_SQL).fetchall()),
+        "store load s": timed(lambda: attendance_store.AttendanceStore.load(conn), 1),
+        "rebuild s": timed(lambda: materialized.rebuild(conn), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--per-student", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=600,
+                        help="daily sessions from 2024-09-02")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_partitions.db")
+        conn = standin.create_db(path)
+        standin.use_pool(path)
+        standin.seed(conn, students=args.students, courses=50, per_student=args.per_student,
+                     sessions=args.sessions)
+        materialized.rebuild(conn)
+
+        full = measure(conn)
+        last = conn.execute("SELECT MAX(attendance_date) FROM attendance").fetchone()[0]
+        _, current, _ = partitions.term_of(last)
+        start = time.perf_counter()
+        moved = partitions.archive(current, os.path.join(tmp, "archive"))
+        archive_s = time.perf_counter() - start
+        hot = measure(conn)
+
+        print(f"Archived {len(moved)} term(s) before {current} in {archive_s:.1f}s:")
+        for term_code, _, _, rows, file in partitions.terms():
+            print(f"  {term_code}  {rows:>10} rows  {os.path.getsize(file) / 1e6:>6.1f} MB")
+        print(f"\n{'':<16}{'all terms':>12}{'hot only':>12}")
+        for name in full:
+            fmt = "d" if name == "rows" else ".3f"
+            print(f"{name:<16}{full[name]:>12{fmt}}{hot[name]:>12{fmt}}")
+        conn.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
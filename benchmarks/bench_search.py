@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark: student lookups by name, email and course code from the
+in-memory search index vs. the LIKE queries an operator would run, on the
+local SQLite stand-in at increasing scale.
+
+For each scale it reports the bulk load time, the median latency of a
+prefix, a multi-word, an email, a fuzzy (typo) and an id query and of
+resolving a (student, course code) pair to its enrollment_id, the cost of
+an incremental add_student(), and the same name lookup as a LIKE scan.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import standin
+from records import db, search  # standin puts the project root on sys.path
+
+LIKE_SQL = """
+    SELECT student_id, first_name, last_name, email
+    FROM students
+    WHERE first_name LIKE ? OR last_name LIKE ? OR email LIKE ?
+"""
+ENROLLMENT_SQL = """
+    SELECT e.enrollment_id
+    FROM enrollments e
+    JOIN courses c ON c.course_id = e.course_id
+    WHERE e.student_id = ? AND c.course_code = ?
+"""
+
+
+def median_us(fn, args):
+    times = []
+    for a in args:
+        start = time.perf_counter()
+        fn(*a)
+        times.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'students':>9}{'load s':>8}{'prefix µs':>11}{'2 words µs':>12}{'email µs':>10}"
+          f"{'fuzzy µs':>10}{'id µs':>8}{'enroll µs':>11}{'add µs':>8}{'LIKE µs':>10}{'SQL enr µs':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for students in args.students:
+            path = os.path.join(tmp, f"bench_{students}.db")
+            conn = standin.create_db(path)
+            standin.use_pool(path)
+            standin.seed(conn, students=students, courses=50, per_student=4, sessions=1)
+
+            start = time.perf_counter()
+            index = search.SearchIndex.load(conn)
+            load_s = time.perf_counter() - start
+            index.find_students("lsat123")  # build the trigram map outside the timings
+
+            rng = random.Random(0)
+            picks = [rng.randrange(students) for _ in range(args.lookups)]
+            enrolled = [(sid, next(iter(index.enrollments[sid]))) for sid in
+                        (p + 1 for p in picks) if index.enrollments.get(sid)]
+            codes = [(sid, index.courses[course_id][0]) for sid, course_id in enrolled]
+
+            prefix = median_us(index.find_students, [(f"last{p}",) for p in picks])
+            words = median_us(index.find_students, [(f"first{p} last{p}",) for p in picks])
+            email = median_us(index.find_students, [(f"student{p}@",) for p in picks])
+            fuzzy = median_us(index.find_students, [(f"lsat{p}",) for p in picks])
+            by_id = median_us(index.find_students, [(str(p + 1),) for p in picks])
+            enroll = median_us(index.enrollment_id, codes)
+            add = median_us(index.add_student, [(students + i + 1, f"Added{i}", f"Student{i}",
+                                                 f"added{i}@example.org") for i in range(args.lookups)])
+            cur = conn.cursor()
+            like = median_us(lambda q: cur.execute(LIKE_SQL, (q, q, q)).fetchall(),
+                             [(f"last{p}%",) for p in picks[:50]])
+            sql_enroll = median_us(lambda sid, code: cur.execute(ENROLLMENT_SQL, (sid, code)).fetchall(),
+                                   codes[:50])
+            conn.close()
+            db.close()
+
+            print(f"{students:>9}{load_s:>8.2f}{prefix:>11.0f}{words:>12.0f}{email:>10.0f}"
+                  f"{fuzzy:>10.0f}{by_id:>8.0f}{enroll:>11.1f}{add:>8.0f}{like:>10.0f}{sql_enroll:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Benchmark: cold start of app/cli_app.py subcommands, each run as a fresh
+process against the local SQLite stand-in.
+
+For every command it reports the median wall time over --runs processes,
+the import time (python -X importtime) and which heavy packages were
+loaded. A command that is not allowed a heavy package (only the PDF and
+attendance-store commands are) fails if it imports one or if its median
+exceeds --budget milliseconds; the run then exits with status 1.
+`--help` is run with the default SQL Server backend to show that no
+driver is loaded and no connection is opened before the first query.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import standin
+from records import materialized  # standin puts the project root on sys.path
+
+CLI = os.path.join(standin.project_root, "app", "cli_app.py")
+
+# Wall-clock budget for a non-PDF command, interpreter start included
+BUDGET_MS = 150
+COURSES = 5
+HEAVY = ["reportlab", "pandas", "numpy", "pyarrow", "openpyxl", "pyodbc", "psycopg2"]
+
+# (label, argv for run i, heavy packages allowed, backend)
+COMMANDS = [
+    ("--help", lambda i: ["--help"], [], "pyodbc"),
+    ("add-student", lambda i: ["add-student", "Bench", f"Run{i}", f"bench{i}@example.org",
+                               "2004-01-01"], [], "sqlite3"),
+    # Course COURSES + 1 is added empty, so every enrollment is new
+    ("enroll", lambda i: ["enroll", str(i + 1), str(COURSES + 1)], [], "sqlite3"),
+    ("grade", lambda i: ["grade", "1", str(60 + i)], [], "sqlite3"),
+    ("attendance", lambda i: ["attendance", "1", f"2025-01-{i + 1:02d}", "Present"], [], "sqlite3"),
+    ("report csv", lambda i: ["report", "csv", "-o", "report.csv"], [], "sqlite3"),
+    ("at-risk", lambda i: ["at-risk", "--limit", "0"], ["numpy"], "sqlite3"),
+    ("search", lambda i: ["search", f"First{i}"], [], "sqlite3"),
+    ("transcript", lambda i: ["transcript", "1", "-o", "transcript.pdf"], ["reportlab"], "sqlite3"),
+]
+
+
+def cli(argv, env, cwd, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + [CLI] + argv
+    return subprocess.run(command, env=env, cwd=cwd, capture_output=True, text=True)
+
+
+def imports(stderr):
+    """(total import ms, top-level packages) from -X importtime output"""
+    total, packages = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        packages.add(name.strip().split(".")[0])
+        # Top-level imports are not indented; their cumulative times add up
+        if name[1:2] != " ":
+            total += int(cumulative)
+    return total / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget", type=float, default=BUDGET_MS,
+                        help="milliseconds allowed for a non-PDF command")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_startup.db")
+        conn = standin.create_db(path)
+        standin.seed(conn, students=max(100, args.runs + 1), courses=COURSES, per_student=2,
+                     sessions=5)
+        conn.execute("INSERT INTO courses(course_name, course_code, credits) VALUES ('Bench', 'BENCH', 3)")
+        materialized.rebuild(conn)
+        conn.close()
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            subprocess.run([sys.executable, "-c", "pass"])
+        bare_ms = (time.perf_counter() - start) / args.runs * 1000
+        print(f"Bare interpreter: {bare_ms:.0f} ms; budget for non-PDF commands: {args.budget:g} ms\n")
+
+        print(f"{'command':<14}{'median ms':>11}{'imports ms':>12}  heavy packages")
+        for label, argv, allowed, backend in COMMANDS:
+            env = dict(os.environ, DB_BACKEND=backend, DB_NAME=path)
+            times = []
+            for i in range(args.runs):
+                start = time.perf_counter()
+                result = cli(argv(i), env, tmp)
+                times.append((time.perf_counter() - start) * 1000)
+                if result.returncode != 0:
+                    failures.append(f"{label}: exit status {result.returncode}")
+                    break
+            import_ms, packages = imports(cli(argv(args.runs), env, tmp, importtime=True).stderr)
+            heavy = [p for p in HEAVY if p in packages]
+            median = statistics.median(times)
+
+            problems = [p for p in heavy if p not in allowed]
+            over = not allowed and median > args.budget
+            if problems:
+                failures.append(f"{label}: imports {', '.join(problems)}")
+            if over:
+                failures.append(f"{label}: {median:.0f} ms is over the {args.budget:g} ms budget")
+            print(f"{label:<14}{median:>11.0f}{import_ms:>12.1f}  {', '.join(heavy) or '-'}"
+                  f"{'  ⚠️' if problems or over else ''}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✅ Every command starts within budget.")
+
+
+if __name__ == "__main__":
+    main()
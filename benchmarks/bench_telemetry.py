@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark: cost of the telemetry layer per database call and per stage
+timer, disabled vs. enabled, on the local SQLite stand-in. A point lookup
+by primary key is about the cheapest statement the application issues, so
+it bounds the relative overhead from above.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import standin
+from records import db, telemetry  # standin puts the project root on sys.path
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--slow-ms", type=float, default=100.0,
+                        help="slow-query threshold while enabled (never reached here)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_telemetry.db")
+        conn = standin.create_db(path)
+        students = 1000
+        standin.seed(conn, students=students, courses=10, per_student=1, sessions=0)
+
+        def raw(i):
+            cur = conn.cursor()
+            cur.execute("SELECT first_name FROM students WHERE student_id = ?", (i % students + 1,))
+            cur.fetchone()
+
+        def lookup(i):
+            cur = pooled.cursor()
+            cur.execute("SELECT first_name FROM students WHERE student_id = ?", (i % students + 1,))
+            cur.fetchone()
+
+        def stage(i):
+            with telemetry.timer("bench.stage") as t:
+                t.rows = 1
+
+        standin.use_pool(path)
+        results = [("raw sqlite3 cursor", per_call(raw, args.calls))]
+        for label, on in (("disabled", False), ("enabled", True)):
+            if on:
+                telemetry.enable(slow_ms=args.slow_ms)
+            else:
+                telemetry.disable()
+            with db.connection() as pooled:
+                results.append((f"pooled lookup, telemetry {label}", per_call(lookup, args.calls)))
+            results.append((f"stage timer, telemetry {label}", per_call(stage, args.calls)))
+        conn.close()
+        db.close()
+
+    base = results[0][1]
+    print(f"{'path':<36}{'µs/call':>10}{'vs raw':>10}")
+    for label, seconds in results:
+        vs = f"{seconds / base:.2f}x" if "lookup" in label or label.startswith("raw") else "-"
+        print(f"{label:<36}{seconds * 1e6:>10.2f}{vs:>10}")
+    print()
+    telemetry.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Benchmark: the batch transcript run as a file per student vs. one zip
+archive vs. one merged PDF per course and per cohort, on the local SQLite
+stand-in at increasing cohort sizes.
+
+For each output mode it reports the wall time, transcripts per second, the
+number of files written and their total size. With a bundle the file count
+stays flat as the cohort grows.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import standin
+from records import db, materialized  # standin puts the project root on sys.path
+
+sys.path.insert(0, os.path.join(standin.project_root, "app"))
+import batch_transcripts  # noqa: E402
+
+MODES = ["none", "zip", "course", "cohort"]
+
+
+def disk_usage(directory):
+    """(files, bytes) written to the output directory, the state file aside"""
+    files = [f for f in os.listdir(directory) if f != batch_transcripts.STATE_FILE]
+    return len(files), sum(os.path.getsize(os.path.join(directory, f)) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[500, 2_000, 8_000])
+    parser.add_argument("--courses", type=int, default=40)
+    parser.add_argument("--per-student", type=int, default=5)
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print(f"{'students':>9}  {'mode':<8}{'seconds':>9}{'PDFs/s':>9}{'files':>8}{'MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for students in args.students:
+            path = os.path.join(tmp, f"bench_{students}.db")
+            conn = standin.create_db(path)
+            standin.use_pool(path)
+            standin.seed(conn, students=students, courses=args.courses,
+                         per_student=args.per_student, sessions=1)
+            materialized.rebuild(conn)
+            conn.close()
+
+            for mode in MODES:
+                out = os.path.join(tmp, f"out_{students}_{mode}")
+                start = time.perf_counter()
+                rendered, failed, _ = batch_transcripts.run(out, args.workers, restart=True,
+                                                            bundle=mode)
+                seconds = time.perf_counter() - start
+                files, size = disk_usage(out)
+                print(f"{students:>9}  {mode:<8}{seconds:>9.2f}{rendered / seconds:>9.0f}"
+                      f"{files:>8}{size / 1e6:>8.1f}{'  ❌ ' + str(len(failed)) + ' failed' if failed else ''}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
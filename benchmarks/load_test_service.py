@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Load test: concurrent clients against the HTTP API (app/server.py), driven
+in-process through the ASGI interface so no server or network sits in the
+way. The API runs on the local SQLite stand-in; the request mix is mostly
+transcript reads and attendance/grade writes, with a few new students,
+enrollments and filtered CSV reports. Reports requests per second, p50/p99
+latency per endpoint and the status codes returned.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), "app"))
+
+import server  # noqa: E402
+import standin  # noqa: E402
+
+# (weight, endpoint)
+MIX = [
+    (40, "transcript"),
+    (20, "attendance"),
+    (20, "grade"),
+    (10, "student"),
+    (5, "enroll"),
+    (5, "report"),
+]
+
+
+async def call(app, method, path, payload=None, query=""):
+    """One request through the ASGI interface; returns (status, body)"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {"type": "http", "method": method, "path": path,
+             "query_string": query.encode(), "headers": []}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status, chunks = None, []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        else:
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def request_for(endpoint, rnd, students, courses, enrollments, counter):
+    if endpoint == "transcript":
+        return "GET", f"/students/{rnd.randint(1, students)}/transcript", None, ""
+    if endpoint == "attendance":
+        return "POST", "/attendance", {
+            "enrollment_id": rnd.randint(1, enrollments),
+            "date": f"2024-10-{rnd.randint(1, 28):02d}",
+            "status": rnd.choice(["Present", "Absent", "Late"]),
+        }, ""
+    if endpoint == "grade":
+        return "POST", "/grades", {"enrollment_id": rnd.randint(1, enrollments),
+                                   "grade": round(rnd.uniform(40, 100), 1)}, ""
+    if endpoint == "student":
+        n = next(counter)
+        return "POST", "/students", {"first_name": "Load", "last_name": f"Test{n}",
+                                     "email": f"load{n}@example.org", "dob": "2001-05-05"}, ""
+    if endpoint == "enroll":
+        return "POST", "/enrollments", {"student_id": rnd.randint(1, students),
+                                        "course_id": rnd.randint(1, courses)}, ""
+    return "GET", "/reports/students.csv", None, f"course_id={rnd.randint(1, courses)}"
+
+
+async def client(app, rnd, deadline, results, **seed):
+    endpoints = [e for _, e in MIX]
+    weights = [w for w, _ in MIX]
+    while time.perf_counter() < deadline:
+        endpoint = rnd.choices(endpoints, weights)[0]
+        method, path, payload, query = request_for(endpoint, rnd, **seed)
+        start = time.perf_counter()
+        status, _ = await call(app, method, path, payload, query)
+        results[endpoint].append((time.perf_counter() - start, status))
+        if status == 503:
+            # A shed request returns without yielding; back off like a real client
+            await asyncio.sleep(0.01)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+async def run(app, concurrency, duration, seed):
+    results = defaultdict(list)
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(app, random.Random(i), deadline, results, **seed) for i in range(concurrency)
+    ))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=server.MAX_QUEUE)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load_test.db")
+        conn = standin.create_db(path)
+        # WAL lets readers proceed while one writer commits
+        conn.execute("PRAGMA journal_mode=WAL")
+        enrollments = standin.seed(conn, students=args.students, courses=args.courses,
+                                   per_student=4, sessions=5)
+        conn.close()
+        standin.use_pool(path, maxsize=args.pool_size)
+
+        counter = iter(range(10 ** 9))
+        seed = {"students": args.students, "courses": args.courses,
+                "enrollments": enrollments, "counter": counter}
+
+        print(f"{'clients':>8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  statuses")
+        per_endpoint = None
+        for concurrency in args.concurrency:
+            app = server.App(max_concurrency=args.pool_size, max_queue=args.max_queue)
+            results, elapsed = asyncio.run(run(app, concurrency, args.duration, seed))
+            latencies = [t for rows in results.values() for t, _ in rows]
+            statuses = Counter(s for rows in results.values() for _, s in rows)
+            print(f"{concurrency:>8}{len(latencies):>10}{len(latencies) / elapsed:>10.0f}"
+                  f"{percentile(latencies, 50) * 1000:>10.2f}{percentile(latencies, 99) * 1000:>10.2f}"
+                  f"  {dict(sorted(statuses.items()))}")
+            per_endpoint = results
+
+        print(f"\n{'endpoint':<12}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}   (last run)")
+        for _, endpoint in MIX:
+            latencies = [t for t, _ in per_endpoint.get(endpoint, [])]
+            print(f"{endpoint:<12}{len(latencies):>10}{percentile(latencies, 50) * 1000:>10.2f}"
+                  f"{percentile(latencies, 99) * 1000:>10.2f}")
+        server.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+Benchmark suite: the hot paths end to end on the local SQLite stand-in at
+several scale factors, compared with a stored baseline.
+
+For each scale the synthetic data set from etl/generate_sample_data.py is
+loaded through the ETL, then the suite times:
+
+- the ETL load of each table and the summary-table rebuild;
+- the CSV and Parquet report exports;
+- single transcripts through the service layer (caches cold) and the batch
+  transcript run, as files, one zip archive and per-cohort PDFs;
+- the analytics engine and the queries in sql/analytics_queries.sql;
+- loading the in-process attendance store and its below-75% check;
+- table migration: a Parquet snapshot export and its restore into an empty
+  database.
+
+Results are written as JSON. Each benchmark is compared with the same
+benchmark in the baseline file; one that got slower by more than
+--tolerance (and by more than a millisecond, so tiny timings do not flap)
+is flagged, and the run exits with status 1. Baselines are only comparable
+on the same machine.
+
+    python benchmarks/run_suite.py --save-baseline     # record a baseline
+    python benchmarks/run_suite.py                     # measure and compare
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "app"))
+sys.path.insert(0, os.path.join(project_root, "etl"))
+
+import analytics  # noqa: E402
+import batch_transcripts  # noqa: E402
+import etl_pipeline_advanced as etl  # noqa: E402
+import generate_sample_data  # noqa: E402
+import reports  # noqa: E402
+import services  # noqa: E402
+import standin  # noqa: E402
+from index_advisor import analytics_queries  # noqa: E402
+from records import attendance_store, cache, db, materialized, snapshot  # noqa: E402
+
+BASELINE_FILE = os.path.join(script_dir, "baseline.json")
+RESULTS_DIR = os.path.join(script_dir, "results")
+TABLES = ["students", "courses", "enrollments", "grades", "attendance"]
+
+# Slowdown flagged as a regression, as a fraction of the baseline time
+TOLERANCE = 0.25
+# Differences below this many seconds are never flagged
+NOISE_FLOOR = 0.001
+
+
+def timed(fn, repeat=1):
+    """(best seconds, last result) over `repeat` runs, with fn's output silenced"""
+    best, result = None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def entry(seconds, rows=None):
+    result = {"seconds": round(seconds, 6)}
+    if rows is not None:
+        result["rows"] = rows
+        result["rows_per_s"] = round(rows / seconds) if seconds else None
+    return result
+
+
+def run_scale(scale, work_dir, sessions, repeat, transcripts):
+    """Every benchmark at one scale factor; returns {name: entry}"""
+    results = {}
+    source_dir = os.path.join(work_dir, "source")
+
+    # ---- data and load ----
+    seconds, counts = timed(lambda: generate_sample_data.generate(
+        source_dir, scale, "csv", sessions=sessions))
+    results["generate"] = entry(seconds, sum(counts.values()))
+
+    path = os.path.join(work_dir, "records.db")
+    standin.create_db(path).close()
+    standin.use_pool(path)
+    with db.connection() as conn:
+        for table in TABLES:
+            loader = getattr(etl, f"load_{table}")
+            source = etl.source_file(table, source_dir)
+            seconds, rows = timed(lambda: loader(conn, source))
+            results[f"etl.{table}"] = entry(seconds, rows)
+        seconds, _ = timed(lambda: materialized.rebuild(conn))
+        results["summaries.rebuild"] = entry(seconds)
+
+    # ---- analytics ----
+    seconds, (gpa, _, _) = timed(lambda: analytics.run(write=False), repeat)
+    results["analytics.engine"] = entry(seconds, len(gpa))
+    with db.connection() as conn:
+        for name, sql in analytics_queries():
+            seconds, rows = timed(lambda: conn.execute(sql).fetchall(), repeat)
+            key = name.split(": ", 1)[-1].lower().replace(" ", "_")
+            results[f"analytics.sql.{''.join(c for c in key if c.isalnum() or c == '_')}"] = \
+                entry(seconds, len(rows))
+
+    # ---- attendance store ----
+    with db.connection() as conn:
+        seconds, store = timed(lambda: attendance_store.AttendanceStore.load(conn))
+    results["attendance.load"] = entry(seconds, store.sessions)
+    seconds, at_risk = timed(store.at_risk, repeat)
+    results["attendance.at_risk"] = entry(seconds, len(at_risk["enrollment_id"]))
+
+    # ---- reports ----
+    for fmt in ("csv", "parquet"):
+        out = os.path.join(work_dir, f"report.{fmt}")
+        seconds, rows = timed(lambda: reports.export_report(out), repeat)
+        results[f"report.{fmt}"] = entry(seconds, rows)
+
+    # ---- transcripts ----
+    students = counts["students"]
+    sample = [1 + i * students // transcripts for i in range(min(transcripts, students))]
+
+    def singles():
+        cache.clear_all()
+        for student_id in sample:
+            services.transcript_pdf(student_id)
+        return len(sample)
+
+    seconds, rendered = timed(singles, repeat)
+    results["transcript.single"] = entry(seconds / rendered, 1)
+    out = os.path.join(work_dir, "transcripts")
+    seconds, (rendered, _, _) = timed(lambda: batch_transcripts.run(out, restart=True))
+    results["transcript.batch"] = entry(seconds, rendered)
+    for bundle in ("zip", "cohort"):
+        seconds, (rendered, _, _) = timed(
+            lambda: batch_transcripts.run(f"{out}_{bundle}", restart=True, bundle=bundle))
+        results[f"transcript.{bundle}"] = entry(seconds, rendered)
+
+    # ---- migration ----
+    snapshot_dir = os.path.join(work_dir, "snapshot")
+    seconds, counts = timed(lambda: snapshot.export(snapshot_dir), repeat)
+    results["migration.export"] = entry(seconds, sum(counts.values()))
+    db.close()
+    target = os.path.join(work_dir, "target.db")
+    standin.create_db(target).close()
+    standin.use_pool(target)
+    seconds, counts = timed(lambda: snapshot.restore(snapshot_dir))
+    results["migration.restore"] = entry(seconds, sum(counts.values()))
+    db.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Print current vs. baseline per benchmark; returns the regressed names"""
+    regressions = []
+    print(f"\n{'benchmark':<56}{'baseline s':>12}{'current s':>12}{'change':>9}")
+    for scale, benchmarks in results.items():
+        for name, current in benchmarks.items():
+            key = f"{scale}/{name}"
+            before = baseline.get(scale, {}).get(name)
+            if before is None:
+                print(f"{key:<56}{'-':>12}{current['seconds']:>12.4f}{'new':>9}")
+                continue
+            old, new = before["seconds"], current["seconds"]
+            change = new / old - 1 if old else 0.0
+            regressed = change > tolerance and new - old > NOISE_FLOOR
+            if regressed:
+                regressions.append(key)
+            print(f"{key:<56}{old:>12.4f}{new:>12.4f}{change:>+9.0%}"
+                  f"{'  ⚠️  regression' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.05, 0.2],
+                        help="scale factors; 1 = 10,000 students")
+    parser.add_argument("--sessions", type=int, default=10,
+                        help="attendance rows per enrollment")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per read-only benchmark (best is kept)")
+    parser.add_argument("--transcripts", type=int, default=50,
+                        help="students rendered one at a time")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="slowdown flagged as a regression (0.25 = 25%%)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>.json)")
+    args = parser.parse_args()
+
+    # Every transcript lookup should reach the database
+    for c in (services.students, services.courses, services.transcripts, services.rosters):
+        c.ttl = 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            print(f"⏱️  scale {scale:g} ...")
+            work_dir = os.path.join(tmp, f"scale_{scale:g}")
+            os.makedirs(work_dir)
+            results[f"scale={scale:g}"] = run_scale(scale, work_dir, args.sessions,
+                                                     args.repeat, args.transcripts)
+
+    run = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        "settings": {"scales": args.scales, "sessions": args.sessions,
+                     "repeat": args.repeat, "transcripts": args.transcripts},
+        "results": results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S.json"))
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"📄 Results written to {output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        compare(results, {}, args.tolerance)
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != run["settings"]:
+        print(f"⚠️  Baseline was recorded with different settings: {baseline.get('settings')}")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against the baseline "
+              f"from {baseline.get('created_at')} ({baseline.get('commit')})")
+        sys.exit(1)
+    print("\n✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Local SQLite stand-in database shared by the benchmarks.
+Builds the schema from sql/create_tables_sqlite.sql and seeds it with
+deterministic synthetic data.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+from records import db  # noqa: E402
+
+SCHEMA_FILE = os.path.join(project_root, "sql", "create_tables_sqlite.sql")
+
+
+def create_db(path):
+    """Fresh database file with the project schema; returns a connection"""
+    if path != ":memory:" and os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with open(SCHEMA_FILE) as f:
+        conn.executescript(f.read())
+    return conn
+
+
+def seed(conn, students=1000, courses=20, per_student=4, sessions=10, seed=42):
+    """Fill every table: each student takes `per_student` courses, each
+    enrollment gets a grade and `sessions` attendance rows."""
+    rnd = random.Random(seed)
+    conn.executemany(
+        "INSERT INTO students(first_name,last_name,email,dob) VALUES (?,?,?,?)",
+        [(f"First{i}", f"Last{i}", f"student{i}@example.org",
+          f"{rnd.randint(1994, 2006)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}")
+         for i in range(students)],
+    )
+    conn.executemany(
+        "INSERT INTO courses(course_name,course_code,credits) VALUES (?,?,?)",
+        [(f"Course {i}", f"C{i:04d}", rnd.randint(1, 6)) for i in range(courses)],
+    )
+    enrollments = [
+        (s + 1, c + 1, f"2024-0{rnd.randint(1, 9)}-01")
+        for s in range(students)
+        for c in rnd.sample(range(courses), min(per_student, courses))
+    ]
+    conn.executemany(
+        "INSERT INTO enrollments(student_id,course_id,enrollment_date) VALUES (?,?,?)",
+        enrollments,
+    )
+    conn.executemany(
+        "INSERT INTO grades(enrollment_id,grade) VALUES (?,?)",
+        [(e + 1, round(min(100, max(0, rnd.gauss(72, 14))), 2))
+         for e in range(len(enrollments))],
+    )
+    conn.executemany(
+        "INSERT INTO attendance(enrollment_id,attendance_date,status) VALUES (?,?,?)",
+        [(e + 1, (date(2024, 9, 2) + timedelta(days=d)).isoformat(),
+          rnd.choices(["Present", "Absent", "Late"], [0.8, 0.12, 0.08])[0])
+         for e in range(len(enrollments)) for d in range(sessions)],
+    )
+    conn.commit()
+    return len(enrollments)
+
+
+def use_pool(path, maxsize=5):
+    """Point records.db at the stand-in file"""
+    db.set_pool(db.ConnectionPool("sqlite3", dsn=path, maxsize=maxsize))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+ETL Orchestrator: loads all five tables with dependency-aware scheduling.
+Tables without foreign keys run concurrently on a thread pool, each worker
+on its own connection; a table starts once every table it references has
+loaded. Dependencies are read from the REFERENCES clauses in
+sql/create_tables.sql.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import etl_pipeline_advanced as etl
+from records import materialized  # etl_pipeline_advanced puts the project root on sys.path
+
+SCHEMA_FILE = os.path.join(etl.project_root, "sql", "create_tables.sql")
+
+LOADERS = {
+    "students": etl.load_students,
+    "courses": etl.load_courses,
+    "enrollments": etl.load_enrollments,
+    "grades": etl.load_grades,
+    "attendance": etl.load_attendance,
+}
+
+
+def parse_dependencies(schema_file=SCHEMA_FILE):
+    """Map each table in the schema to the set of tables it references"""
+    with open(schema_file, "r") as f:
+        sql = f.read()
+    deps = {}
+    for table, body in re.findall(r"CREATE TABLE (\w+)\s*\((.*?)\n\);", sql, re.S):
+        deps[table] = set(re.findall(r"REFERENCES (\w+)", body)) - {table}
+    return deps
+
+
+def run_stage(table, pool, batch_size, chunksize):
+    """Load one table on a dedicated pooled connection; returns (rows, seconds)"""
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        rows = LOADERS[table](conn, batch_size=batch_size, chunksize=chunksize)
+    return rows, time.perf_counter() - start
+
+
+def run(pool=None, workers=2, batch_size=etl.BATCH_SIZE,
+        chunksize=etl.CHUNK_SIZE, deps=None):
+    """Run every loader, respecting FK order.
+
+    Returns {table: (status, rows, seconds)}. A failed table is reported
+    and its dependents are skipped rather than loaded against missing parents.
+    """
+    pool = pool or etl.db.get_pool()
+    deps = {t: set(d) & set(LOADERS) for t, d in (deps or parse_dependencies()).items()
+            if t in LOADERS}
+    results = {}
+    pending = dict(deps)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for table, parents in list(pending.items()):
+                if any(results.get(p, ("",))[0] in ("failed", "skipped") for p in parents):
+                    results[table] = ("skipped", 0, 0.0)
+                    del pending[table]
+                elif all(p in results for p in parents):
+                    running[executor.submit(run_stage, table, pool, batch_size, chunksize)] = table
+                    del pending[table]
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Circular dependencies between: {sorted(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                try:
+                    rows, seconds = future.result()
+                    results[table] = ("ok", rows, seconds)
+                except Exception as e:
+                    print(f"❌ {table}: {e}")
+                    results[table] = ("failed", 0, 0.0)
+
+    # In-process indexes over the loaded tables are stale now; the next use reloads them
+    for name in ("records.search", "records.attendance_store"):
+        module = sys.modules.get(name)
+        if module:
+            module.discard()
+    return results
+
+
+def report(results, elapsed):
+    """Print per-stage timings and row throughput"""
+    print(f"\n{'table':<14}{'status':<9}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    for table, (status, rows, seconds) in results.items():
+        rate = f"{rows / seconds:>12.0f}" if seconds else f"{'-':>12}"
+        print(f"{table:<14}{status:<9}{rows:>10}{seconds:>10.2f}{rate}")
+    total = sum(r[1] for r in results.values())
+    print(f"{'total':<23}{total:>10}{elapsed:>10.2f}{total / elapsed if elapsed else 0:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load all tables in dependency order")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="concurrent loaders, one connection each "
+                             "(keep at or below DB_POOL_SIZE)")
+    parser.add_argument("--batch-size", type=int, default=etl.BATCH_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=etl.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(workers=args.workers, batch_size=args.batch_size,
+                  chunksize=args.chunk_size)
+    if any(results.get(t, ("", 0))[1] for t in ("grades", "attendance")):
+        with etl.db.connection() as conn:
+            materialized.rebuild(conn)
+        print("Summary tables rebuilt.")
+    etl.db.close()
+    report(results, time.perf_counter() - start)
+    etl.report_quality()
+    if any(status != "ok" for status, _, _ in results.values()):
+        raise SystemExit(1)
+    print("ETL Pipeline completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 # etl/etl_pipeline.py
 import pandas as pd
-import pyodbc
 from dotenv import load_dotenv
+import argparse
+import json
 import os
+import sys
 
 load_dotenv()
 
@@ -10,47 +12,487 @@ load_dotenv()
 script_dir = os.path.dirname(os.path.abspath(__file__))
 # Go up one level to the project root
 project_root = os.path.dirname(script_dir)
-# Data directory path
-data_dir = os.path.join(project_root, "data")
-
-# SQL Server connection using Windows Authentication
-conn = pyodbc.connect(
-    f'Driver={os.getenv("DB_DRIVER")};'
-    f'Server={os.getenv("DB_HOST")};'
-    f'Database={os.getenv("DB_NAME")};'
-    f'Trusted_Connection=yes;'
-)
-
-cur = conn.cursor()
-
-def load_students():
-    df = pd.read_csv(os.path.join(data_dir, "students.csv"))
-    loaded = 0
-    for _, r in df.iterrows():
-        try:
-            cur.execute("""
-                INSERT INTO students(first_name,last_name,email,dob)
-                VALUES (?,?,?,?)
-            """, (r.first_name,r.last_name,r.email,r.dob))
-            loaded += 1
-        except pyodbc.IntegrityError:
-            pass  # Skip duplicates
-    conn.commit()
-    print(f"Loaded {loaded} students.")
-
-def load_courses():
-    df = pd.read_csv(os.path.join(data_dir, "courses.csv"))
-    for _, r in df.iterrows():
-        try:
-            cur.execute("""
-                INSERT INTO courses(course_name,course_code,credits)
-                VALUES (?,?,?)
-            """, (r.course_name,r.course_code,r.credits))
-        except pyodbc.IntegrityError:
-            pass  # Skip duplicates
-    conn.commit()
-    print(f"Loaded {len(df)} courses.")
-
-load_students()
-load_courses()
-print("ETL Pipeline completed successfully!")
+# Data directory path (generate_sample_data.py --out can write elsewhere)
+data_dir = os.getenv("ETL_DATA_DIR", os.path.join(project_root, "data"))
+
+sys.path.insert(0, project_root)
+from records import db, partitions, quality, telemetry  # noqa: E402
+
+# Rows sent per executemany call; each batch is committed on its own
+BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "5000"))
+# Rows parsed from a source file at a time; bounds peak memory of a load
+CHUNK_SIZE = int(os.getenv("ETL_CHUNK_SIZE", "50000"))
+# Per-source watermarks and row hashes for --incremental runs
+MANIFEST_FILE = os.getenv("ETL_MANIFEST", os.path.join(data_dir, ".etl_manifest.json"))
+# Source rows failing a data-quality rule are appended here, one file per table
+REJECT_DIR = os.getenv("ETL_REJECT_DIR", os.path.join(data_dir, "rejects"))
+
+quarantine = quality.Quarantine(REJECT_DIR)
+quality_stats = quality.Stats()
+
+STUDENT_INSERT = """
+    INSERT INTO students(first_name,last_name,email,dob)
+    VALUES (?,?,?,?)
+"""
+
+COURSE_INSERT = """
+    INSERT INTO courses(course_name,course_code,credits)
+    VALUES (?,?,?)
+"""
+
+STUDENT_UPDATE = """
+    UPDATE students SET first_name=?, last_name=?, dob=?
+    WHERE email=?
+"""
+
+COURSE_UPDATE = """
+    UPDATE courses SET course_name=?, credits=?
+    WHERE course_code=?
+"""
+
+ENROLLMENT_INSERT = """
+    INSERT INTO enrollments(student_id,course_id,enrollment_date)
+    VALUES (?,?,?)
+"""
+
+GRADE_INSERT = """
+    INSERT INTO grades(enrollment_id,grade)
+    VALUES (?,?)
+"""
+
+ATTENDANCE_INSERT = """
+    INSERT INTO attendance(enrollment_id,attendance_date,status)
+    VALUES (?,?,?)
+"""
+
+
+def fetch_batches(conn, sql, fetch_size=BATCH_SIZE):
+    """Yield the rows of a query in fetchmany-sized batches"""
+    cur = conn.cursor()
+    cur.execute(sql)
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def existing_keys(conn, table, *columns):
+    """Lower-cased keys already in the table.
+
+    Composite keys are joined with ':' so they can be compared against a
+    `_key` column built the same way by the loaders.
+    """
+    keys = set()
+    for rows in fetch_batches(conn, f"SELECT {', '.join(columns)} FROM {table}"):
+        keys.update(":".join(str(v) for v in r).lower() for r in rows)
+    return keys
+
+
+def key_map(conn, table, key, id_column):
+    """Map lower-cased natural keys (email, course_code) to surrogate ids"""
+    ids = {}
+    for rows in fetch_batches(conn, f"SELECT {key}, {id_column} FROM {table}"):
+        ids.update((str(k).lower(), i) for k, i in rows)
+    return ids
+
+
+# Source formats read_chunks() understands, as accepted for <table>.<ext>
+SOURCE_EXTENSIONS = [".parquet", ".csv", ".csv.gz", ".jsonl", ".jsonl.gz",
+                     ".json", ".json.gz", ".xlsx"]
+
+
+def source_file(table, directory=None):
+    """The source file for a table: <table>.<ext> in the data directory.
+
+    When several formats are present (the bundled samples next to a
+    generated data set, say) the most recently written one wins.
+    """
+    directory = directory or data_dir
+    found = [os.path.join(directory, table + ext) for ext in SOURCE_EXTENSIONS]
+    found = [p for p in found if os.path.exists(p)]
+    if not found:
+        raise FileNotFoundError(f"No {table} source file in {directory}")
+    return max(found, key=os.path.getmtime)
+
+
+def _read_parquet(path, chunksize, dtype):
+    """Parquet row batches as DataFrames; dates are handed out as
+    'YYYY-MM-DD' strings, exactly as they would be read from a CSV"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        columns = [col.cast(pa.string()) if pa.types.is_date(col.type) else col
+                   for col in batch.columns]
+        df = pa.RecordBatch.from_arrays(columns, names=batch.schema.names).to_pandas()
+        if isinstance(dtype, dict):
+            dtype = {c: t for c, t in dtype.items() if c in df.columns}
+        yield df.astype(dtype) if dtype else df
+
+
+def read_chunks(path, chunksize=CHUNK_SIZE, dtype=None):
+    """Stream a source file as DataFrame chunks.
+
+    CSV compression is inferred from the extension, so registrar exports can
+    be ingested as `students.csv.gz` without unpacking them first. JSON Lines
+    and Parquet files are streamed too; plain JSON and Excel sheets have no
+    incremental reader in pandas and are parsed whole, then handed out in
+    chunks. Empty placeholder files yield nothing.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    name = path.lower()
+    if name.endswith(".parquet"):
+        yield from _read_parquet(path, chunksize, dtype)
+        return
+    if name.endswith(".xlsx"):
+        df = pd.read_excel(path, dtype=dtype)
+    elif name.endswith((".jsonl", ".jsonl.gz")):
+        yield from pd.read_json(path, lines=True, chunksize=chunksize, dtype=dtype)
+        return
+    elif name.endswith((".json", ".json.gz")):
+        df = pd.read_json(path, dtype=dtype)
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=dtype,
+                               compression="infer")
+        return
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def as_date(series):
+    """Normalise a date column to 'YYYY-MM-DD' strings"""
+    return pd.to_datetime(series).dt.strftime("%Y-%m-%d")
+
+
+def screen(df, table, state):
+    """Drop rows failing a data-quality rule; they go to the reject file"""
+    return quality.screen(df, table, state, quality_stats, quarantine)
+
+
+def resolve_enrollments(df, students, courses):
+    """Add student_id / course_id from student_email / course_code.
+
+    Returns (resolved, unresolved); unresolved rows have an unknown
+    student or course.
+    """
+    df = df.assign(
+        student_id=df["student_email"].astype(str).str.lower().map(students),
+        course_id=df["course_code"].astype(str).str.lower().map(courses),
+    )
+    known = df["student_id"].notna() & df["course_id"].notna()
+    return df[known].astype({"student_id": int, "course_id": int}), df[~known]
+
+
+def new_rows(df, key, seen):
+    """Drop rows whose key is already loaded or appears earlier in the file.
+
+    Keys are compared case-insensitively, matching the default SQL Server
+    collation behind the UNIQUE constraints. `seen` is updated in place.
+    """
+    keys = df[key].astype(str).str.lower()
+    mask = ~keys.isin(seen) & ~keys.duplicated()
+    seen.update(keys[mask])
+    return df[mask]
+
+
+def to_params(df, columns):
+    """DataFrame columns as a list of plain Python tuples (NaN -> None)"""
+    df = df[columns].astype(object)
+    df = df.where(pd.notna(df), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def bulk_insert(conn, sql, rows, batch_size=BATCH_SIZE):
+    """Insert rows with executemany, committing once per batch"""
+    cur = conn.cursor()
+    if hasattr(cur, "fast_executemany"):
+        cur.fast_executemany = True
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        cur.executemany(sql, batch)
+        conn.commit()
+        inserted += len(batch)
+    return inserted
+
+
+def stream_load(conn, chunks, table, sql, key, columns, seen, batch_size=BATCH_SIZE):
+    """Screen each chunk, filter it against `seen` and insert it before
+    reading the next. Returns (loaded, rejected)."""
+    loaded = rejected = 0
+    state = {}
+    for df in chunks:
+        valid = screen(df, table, state)
+        rejected += len(df) - len(valid)
+        loaded += bulk_insert(conn, sql, to_params(new_rows(valid, key, seen), columns),
+                              batch_size)
+    return loaded, rejected
+
+
+@telemetry.timed("etl.load", table="students")
+def load_students(conn, path=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    chunks = read_chunks(path or source_file("students"),
+                         chunksize, dtype=str)
+    loaded, rejected = stream_load(
+        conn, chunks, "students", STUDENT_INSERT, "email",
+        ["first_name", "last_name", "email", "dob"],
+        existing_keys(conn, "students", "email"), batch_size,
+    )
+    print(f"Loaded {loaded} students ({rejected} rejected).")
+    return loaded
+
+
+@telemetry.timed("etl.load", table="courses")
+def load_courses(conn, path=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    chunks = read_chunks(path or source_file("courses"),
+                         chunksize, dtype={"course_name": str, "course_code": str})
+    loaded, rejected = stream_load(
+        conn, chunks, "courses", COURSE_INSERT, "course_code",
+        ["course_name", "course_code", "credits"],
+        existing_keys(conn, "courses", "course_code"), batch_size,
+    )
+    print(f"Loaded {loaded} courses ({rejected} rejected).")
+    return loaded
+
+
+@telemetry.timed("etl.load", table="enrollments")
+def load_enrollments(conn, path=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    """enrollments.<ext>: student_email, course_code, enrollment_date"""
+    students = key_map(conn, "students", "email", "student_id")
+    courses = key_map(conn, "courses", "course_code", "course_id")
+    seen = existing_keys(conn, "enrollments", "student_id", "course_id")
+    loaded = rejected = 0
+    state = {}
+    for chunk in read_chunks(path or source_file("enrollments"),
+                             chunksize, dtype=str):
+        df, unresolved = resolve_enrollments(screen(chunk, "enrollments", state),
+                                             students, courses)
+        quarantine.add("enrollments", unresolved, "unknown_student_or_course")
+        rejected += len(chunk) - len(df)
+        df = df.assign(
+            _key=df["student_id"].astype(str) + ":" + df["course_id"].astype(str),
+            enrollment_date=as_date(df["enrollment_date"]),
+        )
+        loaded += bulk_insert(
+            conn, ENROLLMENT_INSERT,
+            to_params(new_rows(df, "_key", seen),
+                      ["student_id", "course_id", "enrollment_date"]),
+            batch_size,
+        )
+    print(f"Loaded {loaded} enrollments ({rejected} rejected).")
+    return loaded
+
+
+def enrollment_rows(df, students, courses, enrollments):
+    """Resolve student_email / course_code to enrollment_id.
+
+    Returns (resolved, unresolved) like resolve_enrollments().
+    """
+    df, unresolved = resolve_enrollments(df, students, courses)
+    keys = df["student_id"].astype(str) + ":" + df["course_id"].astype(str)
+    df = df.assign(enrollment_id=keys.map(enrollments))
+    known = df["enrollment_id"].notna()
+    return (df[known].astype({"enrollment_id": int}),
+            pd.concat([unresolved, df[~known]]))
+
+
+def enrollment_lookups(conn):
+    """Key maps needed to resolve source rows to an enrollment_id"""
+    enrollments = {}
+    for rows in fetch_batches(
+            conn, "SELECT student_id, course_id, enrollment_id FROM enrollments"):
+        enrollments.update((f"{s}:{c}", e) for s, c, e in rows)
+    return (key_map(conn, "students", "email", "student_id"),
+            key_map(conn, "courses", "course_code", "course_id"),
+            enrollments)
+
+
+@telemetry.timed("etl.load", table="grades")
+def load_grades(conn, path=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    """grades.<ext>: records of student_email, course_code, grade"""
+    lookups = enrollment_lookups(conn)
+    seen = existing_keys(conn, "grades", "enrollment_id")
+    loaded = rejected = 0
+    state = {}
+    for chunk in read_chunks(path or source_file("grades"),
+                             chunksize, dtype={"student_email": str, "course_code": str}):
+        df, unresolved = enrollment_rows(screen(chunk, "grades", state), *lookups)
+        quarantine.add("grades", unresolved, "unknown_enrollment")
+        rejected += len(chunk) - len(df)
+        loaded += bulk_insert(
+            conn, GRADE_INSERT,
+            to_params(new_rows(df, "enrollment_id", seen), ["enrollment_id", "grade"]),
+            batch_size,
+        )
+    print(f"Loaded {loaded} grades ({rejected} rejected).")
+    return loaded
+
+
+@telemetry.timed("etl.load", table="attendance")
+def load_attendance(conn, path=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    """attendance.<ext>: student_email, course_code, attendance_date, status
+
+    Rows dated in an archived term (before partitions.hot_from()) are
+    quarantined: that term's counts are final and its rows live in its
+    archive file.
+    """
+    lookups = enrollment_lookups(conn)
+    seen = existing_keys(conn, "attendance", "enrollment_id", "attendance_date")
+    hot_from = partitions.hot_from().isoformat()
+    loaded = rejected = 0
+    state = {}
+    for chunk in read_chunks(path or source_file("attendance"),
+                             chunksize, dtype={"student_email": str, "course_code": str}):
+        df, unresolved = enrollment_rows(screen(chunk, "attendance", state), *lookups)
+        quarantine.add("attendance", unresolved, "unknown_enrollment")
+        df = df.assign(attendance_date=as_date(df["attendance_date"]))
+        archived = df["attendance_date"] < hot_from
+        quarantine.add("attendance", df.loc[archived, chunk.columns], "archived_term")
+        df = df[~archived]
+        rejected += len(chunk) - len(df)
+        df = df.assign(_key=df["enrollment_id"].astype(str) + ":" + df["attendance_date"])
+        loaded += bulk_insert(
+            conn, ATTENDANCE_INSERT,
+            to_params(new_rows(df, "_key", seen),
+                      ["enrollment_id", "attendance_date", "status"]),
+            batch_size,
+        )
+    print(f"Loaded {loaded} attendance rows ({rejected} rejected).")
+    return loaded
+
+
+def report_quality():
+    """Per-rule timings and hit counts, plus where rejected rows went"""
+    if quality_stats.rules:
+        quality_stats.report()
+    for table, count in quarantine.counts.items():
+        print(f"⚠️  {count} {table} rows quarantined in "
+              f"{os.path.join(REJECT_DIR, table + '_rejects.csv')}")
+
+
+# ------------------ INCREMENTAL LOADS ------------------
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """Write the manifest atomically so a crash never leaves it half-written"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def unchanged(path, manifest):
+    """True when the file's size and mtime match its last recorded run"""
+    entry = manifest.get(os.path.abspath(path))
+    stat = os.stat(path)
+    return bool(entry) and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+
+
+def row_hashes(df, columns):
+    """Content hash per row, as hex strings that survive a JSON round trip"""
+    hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return hashes.map("{:016x}".format)
+
+
+def sync_rows(conn, path, table, key, columns, insert_sql, update_sql, manifest,
+              batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE, dtype=str):
+    """Apply only the new or changed rows of a source file.
+
+    Rows are screened by the data-quality rules, then hashed and compared
+    with the hashes stored in the manifest for the previous run. Changed rows whose key is already in the table
+    are updated, the rest inserted. Rows deleted from the source are not
+    deleted from the table. Returns (inserted, updated).
+    """
+    abspath = os.path.abspath(path)
+    if unchanged(path, manifest):
+        print(f"{table}: {os.path.basename(path)} unchanged.")
+        return 0, 0
+
+    stat = os.stat(path)
+    previous = manifest.get(abspath, {}).get("rows", {})
+    current = {}
+    existing = existing_keys(conn, table, key)
+    update_columns = [c for c in columns if c != key] + [key]
+    inserted = updated = 0
+    state = {}
+    for df in read_chunks(path, chunksize, dtype=dtype):
+        df = screen(df, table, state)
+        keys = df[key].astype(str).str.lower()
+        first = ~keys.duplicated() & [k not in current for k in keys]
+        df = df.assign(_key=keys, _hash=row_hashes(df, columns))[first]
+        current.update(zip(df["_key"], df["_hash"]))
+
+        changed = df[df["_key"].map(previous.get) != df["_hash"]]
+        in_db = changed["_key"].isin(existing)
+        updated += bulk_insert(conn, update_sql, to_params(changed[in_db], update_columns),
+                               batch_size)
+        new = changed[~in_db]
+        existing.update(new["_key"])
+        inserted += bulk_insert(conn, insert_sql, to_params(new, columns), batch_size)
+
+    manifest[abspath] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "rows": current}
+    print(f"{table}: {inserted} inserted, {updated} updated.")
+    return inserted, updated
+
+
+def sync_students(conn, path=None, manifest=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    return sync_rows(conn, path or source_file("students"), "students",
+                     "email", ["first_name", "last_name", "email", "dob"],
+                     STUDENT_INSERT, STUDENT_UPDATE, manifest, batch_size, chunksize)
+
+
+def sync_courses(conn, path=None, manifest=None, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE):
+    return sync_rows(conn, path or source_file("courses"), "courses",
+                     "course_code", ["course_name", "course_code", "credits"],
+                     COURSE_INSERT, COURSE_UPDATE, manifest, batch_size, chunksize,
+                     dtype={"course_name": str, "course_code": str})
+
+
+def run_incremental(students_file, courses_file, batch_size, chunksize):
+    """Sync students and courses; connects only if a source has changed"""
+    students_file = students_file or source_file("students")
+    courses_file = courses_file or source_file("courses")
+    manifest = load_manifest()
+    if unchanged(students_file, manifest) and unchanged(courses_file, manifest):
+        print("Sources unchanged since the last run; nothing to load.")
+        return
+
+    with db.connection() as conn:
+        sync_students(conn, students_file, manifest, batch_size, chunksize)
+        sync_courses(conn, courses_file, manifest, batch_size, chunksize)
+    save_manifest(manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load students and courses into SQL Server")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="rows per executemany call / commit")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="rows read from a source file at a time")
+    parser.add_argument("--students-file", help="students file (CSV, CSV.GZ, JSON, Parquet, ...)")
+    parser.add_argument("--courses-file", help="courses file (CSV, CSV.GZ, JSON, Parquet, ...)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="apply only rows added or changed since the last run")
+    args = parser.parse_args()
+
+    if args.incremental:
+        run_incremental(args.students_file, args.courses_file,
+                        args.batch_size, args.chunk_size)
+    else:
+        with db.connection() as conn:
+            load_students(conn, args.students_file, args.batch_size, args.chunk_size)
+            load_courses(conn, args.courses_file, args.batch_size, args.chunk_size)
+        db.close()
+    report_quality()
+    print("ETL Pipeline completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,40 @@
 # etl/generate_sample_data.py
-import pandas as pd
-from faker import Faker
-import random
+"""
+Synthetic student-records data for load and benchmark testing.
+
+Writes referentially consistent source files for all five tables in the
+layout the ETL loads (enrollments, grades and attendance name their
+enrollment by student_email + course_code):
+
+    students      first_name, last_name, email, dob
+    courses       course_name, course_code, credits
+    enrollments   student_email, course_code, enrollment_date
+    grades        student_email, course_code, grade
+    attendance    student_email, course_code, attendance_date, status
+
+Scale factor 1 is 10,000 students, 200 courses, about 50,000 enrollments
+and 1.5 million attendance rows; everything but the course count grows
+linearly with it. Rows are generated with NumPy a chunk of students at a
+time and appended to CSV (optionally gzip-compressed) or Parquet files, so
+memory stays flat however large the output. Each chunk has its own random
+stream derived from --seed, so the output is identical for a given seed and
+scale whatever the number of --workers.
+
+    python etl/generate_sample_data.py                      # scale 1 into data/
+    python etl/generate_sample_data.py --scale 6 --format parquet --out /tmp/sf6 --workers 4
+"""
+
+import argparse
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 
-fake = Faker()
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as csv
+import pyarrow.parquet as pq
 
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,25 +43,247 @@ project_root = os.path.dirname(script_dir)
 # Data directory path
 data_dir = os.path.join(project_root, "data")
 
-students = []
-for _ in range(300):
-    students.append([
-        fake.first_name(),
-        fake.last_name(),
-        fake.email(),
-        fake.date_of_birth(minimum_age=18, maximum_age=30)
-    ])
-
-courses = [
-    ("Database Systems","DB101",4),
-    ("Python Programming","PY201",5),
-    ("Data Structures","CS301",4),
+STUDENTS_PER_SCALE = 10000
+COURSES_PER_SCALE = 200
+CHUNK_STUDENTS = 10000
+
+COLUMNS = {
+    "students": ["first_name", "last_name", "email", "dob"],
+    "courses": ["course_name", "course_code", "credits"],
+    "enrollments": ["student_email", "course_code", "enrollment_date"],
+    "grades": ["student_email", "course_code", "grade"],
+    "attendance": ["student_email", "course_code", "attendance_date", "status"],
+}
+
+DEPARTMENTS = [
+    ("CS", "Computer Science"), ("DB", "Database Systems"), ("PY", "Python Programming"),
+    ("DS", "Data Science"), ("MA", "Mathematics"), ("ST", "Statistics"),
+    ("PH", "Physics"), ("EC", "Economics"), ("BI", "Biology"), ("CH", "Chemistry"),
+    ("EN", "English Literature"), ("HI", "History"),
 ]
+# Course titles by year of study (the hundreds digit of the course number)
+LEVELS = [["Introduction to", "Foundations of"], ["Intermediate", "Applied"],
+          ["Advanced", "Topics in"], ["Seminar in", "Research in"]]
+DOMAINS = ["example.edu", "example.org", "example.net", "example.com"]
+STATUSES = ["Present", "Absent", "Late"]
+
+# Teaching weeks in a term; attendance sessions are spread evenly over them
+TERM_DAYS = 105
+
+
+def term_starts(first_year, terms):
+    """Start date of each term: alternating September and January intakes"""
+    starts = []
+    year, month = first_year, 9
+    for _ in range(terms):
+        starts.append(np.datetime64(date(year, month, 1)))
+        year, month = (year + 1, 1) if month == 9 else (year, 9)
+    return np.array(starts, dtype="datetime64[D]")
+
+
+def name_pools(seed, size=1000):
+    """Distinct first and last names drawn once from Faker"""
+    from faker import Faker
+
+    fake = Faker("en_US")
+    fake.seed_instance(seed)
+    firsts = sorted({fake.first_name() for _ in range(size)})
+    lasts = sorted({fake.last_name() for _ in range(size)})
+    return np.array(firsts, dtype=object), np.array(lasts, dtype=object)
+
+
+def email_part(names):
+    return np.array([re.sub(r"[^a-z]", "", n.lower()) for n in names], dtype=object)
+
+
+def make_courses(count, seed):
+    """Courses plus the per-course popularity and difficulty used for sampling"""
+    rng = np.random.default_rng([seed, 0])
+    codes, names = [], []
+    for i in range(count):
+        prefix, subject = DEPARTMENTS[i % len(DEPARTMENTS)]
+        k = i // len(DEPARTMENTS)
+        year, series = k % len(LEVELS), k // len(LEVELS)
+        codes.append(f"{prefix}{100 * (year + 1) + series}")
+        title = f"{LEVELS[year][series % 2]} {subject}"
+        names.append(title if series < 2 else f"{title} {series // 2 + 1}")
+    credits = rng.choice([2, 3, 4, 5, 6], size=count, p=[0.1, 0.35, 0.35, 0.15, 0.05])
+    # A few large introductory courses, a long tail of small electives
+    popularity = 1.0 / (rng.permutation(count) + 5.0) ** 0.8
+    difficulty = rng.normal(0, 4, size=count)
+    courses = pa.table({"course_name": names, "course_code": codes,
+                        "credits": pa.array(credits, pa.int32())})
+    return courses, popularity / popularity.sum(), difficulty
+
+
+class Plan:
+    """Everything a chunk needs besides its own random stream (picklable)"""
+
+    def __init__(self, seed, students, courses, per_student, sessions, terms, first_year):
+        self.seed = seed
+        self.students = students
+        self.per_student = per_student
+        self.sessions = min(sessions, TERM_DAYS)
+        self.terms = term_starts(first_year, terms)
+        self.firsts, self.lasts = name_pools(seed)
+        self.first_emails, self.last_emails = email_part(self.firsts), email_part(self.lasts)
+        self.courses, self.popularity, self.difficulty = make_courses(courses, seed)
+        self.codes = self.courses["course_code"].combine_chunks()
+        self.reference = self.terms[0]
+
+
+def generate_chunk(plan, chunk, start, stop):
+    """Rows of every table for students [start, stop), as pyarrow Tables"""
+    rng = np.random.default_rng([plan.seed, chunk + 1])
+    n = stop - start
+    courses = len(plan.codes)
+
+    # ---- students ----
+    first = rng.integers(0, len(plan.firsts), n)
+    last = rng.integers(0, len(plan.lasts), n)
+    number = np.arange(start + 1, stop + 1).astype(str).astype(object)
+    domain = np.array(DOMAINS, dtype=object)[rng.integers(0, len(DOMAINS), n)]
+    # The student number makes every address unique without a lookup
+    emails = pa.array(plan.first_emails[first] + "." + plan.last_emails[last] + number
+                      + "@" + domain, pa.string())
+    age_days = ((17.5 + rng.gamma(2.0, 1.5, n)).clip(max=45) * 365.25).astype("timedelta64[D]")
+    students = pa.table({
+        "first_name": pa.array(plan.firsts[first], pa.string()),
+        "last_name": pa.array(plan.lasts[last], pa.string()),
+        "email": emails,
+        "dob": plan.reference - age_days,
+    })
+
+    # ---- enrollments: 1 + Poisson courses per student, popular courses more often ----
+    wanted = (1 + rng.poisson(plan.per_student - 1, n)).clip(max=min(courses, 3 * plan.per_student))
+    owner = np.repeat(np.arange(n), wanted)
+    course = rng.choice(courses, size=len(owner), p=plan.popularity)
+    pairs = np.unique(owner.astype(np.int64) * courses + course)
+    owner, course = pairs // courses, pairs % courses
+    term = plan.terms[rng.integers(0, len(plan.terms), n)][owner]
+    enrolled = term - rng.integers(0, 22, len(owner)).astype("timedelta64[D]")
+    enrollment_emails, enrollment_codes = emails.take(owner), plan.codes.take(course)
+    enrollments = pa.table({
+        "student_email": enrollment_emails, "course_code": enrollment_codes,
+        "enrollment_date": enrolled,
+    })
+
+    # ---- grades: student ability + course difficulty + noise; ~5% ungraded ----
+    attendance_rate = rng.beta(9.0, 1.3, n)
+    ability = rng.normal(74, 9, n) + 20 * (attendance_rate - 0.87)
+    grade = ability[owner] - plan.difficulty[course] + rng.normal(0, 7, len(owner))
+    graded = np.flatnonzero(rng.random(len(owner)) >= 0.05)
+    grades = pa.table({
+        "student_email": enrollment_emails.take(graded),
+        "course_code": enrollment_codes.take(graded),
+        "grade": grade[graded].clip(0, 100).round(1),
+    })
+
+    # ---- attendance: `sessions` evenly spaced class days per enrollment ----
+    sessions = plan.sessions
+    row_enrollment = np.repeat(np.arange(len(owner)), sessions)
+    weekday = rng.integers(0, 5, len(owner)).astype("timedelta64[D]")
+    offset = ((np.arange(sessions) * TERM_DAYS) // sessions).astype("timedelta64[D]")
+    day = np.repeat(term + weekday, sessions) + np.tile(offset, len(owner))
+    present = rng.random(len(row_enrollment)) < attendance_rate[owner][row_enrollment]
+    late = present & (rng.random(len(row_enrollment)) < 0.06)
+    status = np.where(late, 2, np.where(present, 0, 1))
+    attendance = pa.table({
+        "student_email": enrollment_emails.take(row_enrollment),
+        "course_code": enrollment_codes.take(row_enrollment),
+        "attendance_date": day,
+        "status": pa.array(STATUSES).take(status),
+    })
+
+    return {"students": students, "enrollments": enrollments,
+            "grades": grades, "attendance": attendance}
+
+
+def _generate(args):
+    return generate_chunk(*args)
+
+
+# ------------------ OUTPUT ------------------
+class Writer:
+    """Appends pyarrow Tables to one CSV, CSV.GZ or Parquet file.
+
+    Dates are written as date32, which CSV renders as YYYY-MM-DD.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._sink = self._writer = None
+
+    def write(self, table):
+        if self._writer is None:
+            if self.path.endswith(".parquet"):
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+            else:
+                self._sink = (pa.CompressedOutputStream(self.path, "gzip")
+                              if self.path.endswith(".gz") else pa.OSFile(self.path, "wb"))
+                self._writer = csv.CSVWriter(self._sink, table.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        for handle in (self._writer, self._sink):
+            if handle is not None:
+                handle.close()
+
+
+def generate(out_dir=data_dir, scale=1.0, fmt="csv", seed=42, per_student=5, sessions=30,
+             terms=4, first_year=2021, workers=1, chunk_students=CHUNK_STUDENTS):
+    """Write all five tables into out_dir; returns {table: rows}"""
+    os.makedirs(out_dir, exist_ok=True)
+    students = max(1, int(STUDENTS_PER_SCALE * scale))
+    courses = max(3, int(COURSES_PER_SCALE * scale ** 0.5))
+    plan = Plan(seed, students, courses, per_student, sessions, terms, first_year)
+
+    writers = {t: Writer(os.path.join(out_dir, f"{t}.{fmt}")) for t in COLUMNS}
+    writers["courses"].write(plan.courses)
+    chunks = [(plan, i, start, min(start + chunk_students, students))
+              for i, start in enumerate(range(0, students, chunk_students))]
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        results = executor.map(_generate, chunks) if executor else map(_generate, chunks)
+        for tables in results:
+            for table, df in tables.items():
+                writers[table].write(df)
+    finally:
+        if executor:
+            executor.shutdown()
+        for writer in writers.values():
+            writer.close()
+    return {t: w.rows for t, w in writers.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic data for all five tables")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"scale factor; 1 = {STUDENTS_PER_SCALE} students")
+    parser.add_argument("--format", choices=["csv", "csv.gz", "parquet"], default="csv")
+    parser.add_argument("--out", default=data_dir, help="output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--per-student", type=int, default=5, help="mean enrollments per student")
+    parser.add_argument("--sessions", type=int, default=30,
+                        help=f"attendance rows per enrollment (at most {TERM_DAYS})")
+    parser.add_argument("--terms", type=int, default=4, help="terms enrollments are spread over")
+    parser.add_argument("--first-year", type=int, default=2021, help="year of the first term")
+    parser.add_argument("--workers", type=int, default=1, help="generator processes")
+    args = parser.parse_args()
+    if args.per_student < 1:
+        parser.error("--per-student must be at least 1")
+
+    start = time.perf_counter()
+    counts = generate(args.out, args.scale, args.format, args.seed, args.per_student,
+                      args.sessions, args.terms, args.first_year, args.workers)
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    for table, rows in counts.items():
+        print(f"  {table:<12}{rows:>12,}  {os.path.join(args.out, f'{table}.{args.format}')}")
+    print(f"✅ {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
 
-pd.DataFrame(students, columns=[
-    "first_name","last_name","email","dob"
-]).to_csv(os.path.join(data_dir, "students.csv"), index=False)
 
-pd.DataFrame(courses, columns=[
-    "course_name","course_code","credits"
-]).to_csv(os.path.join(data_dir, "courses.csv"), index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python
+"""
+Missing-index advisor.
+
+Runs the project's known queries against a seeded SQLite stand-in:
+- the views in view.sql;
+- the queries in analytics_queries.sql;
+- the report, roster, transcript and summary-refresh queries issued by the
+  CLI, API and ETL.
+
+It captures each query plan (EXPLAIN QUERY PLAN), proposes an index for
+every table the plan scans, and builds them one at a time. A candidate is
+kept only if it makes a query that motivated it measurably faster. The
+report lists before/after latency and plans, redundant existing indexes,
+and the kept indexes as SQL Server (with INCLUDE columns) and SQLite DDL.
+
+    python index_advisor.py
+    python index_advisor.py --students 50000 --sessions 30 --output index_report.txt
+
+By default the schema's own secondary indexes are dropped first, so the
+report shows what the recommended set buys over the bare constraints.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "app"))
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+
+from records import materialized  # noqa: E402
+import reports  # noqa: E402
+import standin  # noqa: E402
+
+ANALYTICS_FILE = os.path.join(project_root, "sql", "analytics_queries.sql")
+
+# A candidate must make one of its queries at least this much faster...
+MIN_SPEEDUP = 1.3
+# ...and save at least this many seconds on it, so timer noise on
+# sub-millisecond queries does not buy an index
+MIN_SAVED = 0.00025
+
+
+# ------------------ WORKLOAD ------------------
+def analytics_queries():
+    """(name, sql) for each statement in analytics_queries.sql, named by its comment"""
+    with open(ANALYTICS_FILE) as f:
+        text = f.read()
+    queries = []
+    for block in text.split(";"):
+        lines = [line for line in block.strip().splitlines() if line.strip()]
+        comments = [line.strip("- ").strip() for line in lines if line.lstrip().startswith("--")]
+        sql = "\n".join(line for line in lines if not line.lstrip().startswith("--"))
+        if sql.strip():
+            queries.append((f"analytics: {comments[0] if comments else 'query'}", sql))
+    return queries
+
+
+def workload(students, courses, enrollments):
+    """(name, sql, params) for every query the advisor measures"""
+    student_id, course_id = students // 2, courses // 2
+    batch = list(range(enrollments // 2, enrollments // 2 + 200))
+    marks = ", ".join("?" * len(batch))
+    queries = [
+        ("view: vw_student_transcript (one student)",
+         "SELECT * FROM vw_student_transcript WHERE student_id = ?", (student_id,)),
+        ("view: vw_course_roster (one course)",
+         "SELECT * FROM vw_course_roster WHERE course_id = ?", (course_id,)),
+        ("view: vw_attendance_summary", "SELECT * FROM vw_attendance_summary", ()),
+        ("view: vw_course_performance", "SELECT * FROM vw_course_performance", ()),
+        ("view: vw_at_risk_students", "SELECT * FROM vw_at_risk_students", ()),
+    ]
+    queries += [(name, sql, ()) for name, sql in analytics_queries()]
+    queries += [
+        ("report: one course", *reports.report_query(course_id=course_id)),
+        ("report: enrollment month",
+         *reports.report_query(date_from="2024-03-01", date_to="2024-03-31")),
+        ("services: transcript rows", """
+            SELECT e.course_id, g.grade
+            FROM enrollments e
+            LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
+            WHERE e.student_id = ?
+        """, (student_id,)),
+        ("services: course roster", """
+            SELECT s.student_id, s.first_name, s.last_name, s.email
+            FROM enrollments e
+            JOIN students s ON s.student_id = e.student_id
+            WHERE e.course_id = ?
+            ORDER BY s.last_name, s.first_name
+        """, (course_id,)),
+        ("materialized: refresh attendance", f"""
+            SELECT enrollment_id,
+                   SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+                   COUNT(*)
+            FROM attendance
+            WHERE enrollment_id IN ({marks})
+            GROUP BY enrollment_id
+        """, batch),
+        ("materialized: refresh course grades", """
+            SELECT e.course_id, SUM(g.grade), COUNT(g.grade)
+            FROM grades g
+            JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+            WHERE g.grade IS NOT NULL AND e.course_id IN (?, ?)
+            GROUP BY e.course_id
+        """, (course_id, course_id + 1)),
+        ("bulk_ingest: attendance already recorded", """
+            SELECT a.attendance_id FROM attendance a
+            WHERE a.enrollment_id = ? AND a.attendance_date = ?
+        """, (batch[0], "2024-09-05")),
+    ]
+    return queries
+
+
+# ------------------ PLAN ANALYSIS ------------------
+KEYWORDS = {"where", "on", "join", "left", "right", "inner", "outer", "group", "order",
+            "limit", "having", "as", "using", "cross"}
+
+
+def expand_views(conn, sql):
+    """Query text with the definition of every view it reads appended"""
+    views = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'"))
+    seen, text = set(), sql
+    while True:
+        used = [v for v in views if v not in seen and re.search(rf"\b{v}\b", text)]
+        if not used:
+            return text
+        for v in used:
+            seen.add(v)
+            text += "\n" + views[v]
+
+
+def aliases(sql, tables):
+    """{alias: table} for every base table named in FROM / JOIN"""
+    found = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        if table in tables:
+            found[alias if alias and alias.lower() not in KEYWORDS else table] = table
+    return found
+
+
+def predicates(sql, alias_map):
+    """[(alias, column, kind)] with kind 'eq', 'join' or 'range'"""
+    # CASE expressions compare values, they do not filter rows
+    text = re.sub(r"\bCASE\b.*?\bEND\b", "", sql, flags=re.I | re.S)
+    single = next(iter(alias_map)) if len(set(alias_map.values())) == 1 else None
+    found = []
+    pattern = r"(?:(\w+)\.)?(\w+)\s*(=|>=|<=|<|>|\bIN\b|\bBETWEEN\b)\s*(?:(\w+)\.(\w+))?"
+    for alias, column, op, other_alias, other_column in re.findall(pattern, text, re.I):
+        alias = alias or single
+        if alias not in alias_map:
+            continue
+        if other_alias in alias_map:
+            found.append((alias, column, "join"))
+            found.append((other_alias, other_column, "join"))
+        elif op in ("=",) or op.upper() == "IN":
+            found.append((alias, column, "eq"))
+        else:
+            found.append((alias, column, "range"))
+    return found
+
+
+def ordering(sql, alias_map):
+    """[(alias, column)] named in ORDER BY / GROUP BY"""
+    single = next(iter(alias_map)) if len(set(alias_map.values())) == 1 else None
+    found = []
+    for clause in re.findall(r"\b(?:ORDER|GROUP)\s+BY\s+(.+?)(?=\bLIMIT\b|\bHAVING\b|\bORDER\b|;|$)",
+                             sql, re.I | re.S):
+        for alias, column in re.findall(r"(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?", clause):
+            alias = alias or single
+            if alias in alias_map and column.upper() not in ("ASC", "DESC"):
+                found.append((alias, column))
+    return found
+
+
+def referenced(sql, alias, columns):
+    """Columns of `alias` the query reads, in order of appearance"""
+    names = re.findall(rf"\b{alias}\.(\w+)", sql)
+    if not names:
+        names = [c for c in columns if re.search(rf"\b{c}\b", sql)]
+    return list(dict.fromkeys(n for n in names if n in columns))
+
+
+def plan(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def plan_steps(plan_rows):
+    """{alias: (access, seek columns, covering)} with access 'scan', 'automatic' or 'search'.
+
+    `covering` is None for a rowid lookup, else whether the index used
+    holds every column the step needs.
+    """
+    steps = {}
+    for detail in plan_rows:
+        match = re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?", detail)
+        if not match:
+            continue
+        alias = match.group(3) or match.group(2)
+        seeks = set(re.findall(r"(\w+)[=<>]", detail))
+        if match.group(1) == "SCAN":
+            access = "scan"
+        elif "AUTOMATIC" in detail:
+            access = "automatic"
+        else:
+            access = "search"
+        if "INTEGER PRIMARY KEY" in detail:
+            covering = None
+        else:
+            covering = "COVERING INDEX" in detail
+        steps.setdefault(alias, (access, seeks, covering))
+    return steps
+
+
+# ------------------ SCHEMA ------------------
+def table_columns(conn):
+    """{table: ([columns], integer primary key or None)}"""
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    info = {}
+    for table in tables:
+        cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        pk = [c[1] for c in cols if c[5] == 1 and c[2].upper() == "INTEGER"]
+        info[table] = ([c[1] for c in cols], pk[0] if pk else None)
+    return info
+
+
+def indexes(conn):
+    """[(name, table, [columns], explicit)] for every index, incl. constraint ones"""
+    found = []
+    for table, in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"):
+        for _, name, _, origin, _ in conn.execute(f"PRAGMA index_list({table})"):
+            cols = [r[2] for r in conn.execute(f"PRAGMA index_info({name})")]
+            found.append((name, table, cols, origin == "c"))
+    return found
+
+
+def redundant(conn):
+    """Explicit indexes whose columns lead another index on the same table"""
+    all_indexes = indexes(conn)
+    found = []
+    for name, table, cols, explicit in all_indexes:
+        if not explicit:
+            continue
+        for other, other_table, other_cols, _ in all_indexes:
+            if other != name and other_table == table and other_cols[:len(cols)] == cols:
+                found.append((name, other))
+                break
+    return found
+
+
+def drop_secondary_indexes(conn):
+    names = [n for n, _, _, explicit in indexes(conn) if explicit]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.commit()
+    return names
+
+
+# ------------------ CANDIDATES ------------------
+class Candidate:
+    def __init__(self, table, keys, include, kind):
+        self.table = table
+        self.keys = tuple(keys)
+        self.include = tuple(include)
+        self.kind = kind
+        self.queries = []
+        self.speedup = None
+        self.best_query = None
+
+    @property
+    def name(self):
+        return f"idx_{self.table}_{'_'.join(self.keys)}"
+
+    def sqlite_ddl(self):
+        return f"CREATE INDEX {self.name} ON {self.table}({', '.join(self.keys + self.include)});"
+
+    def mssql_ddl(self):
+        ddl = f"CREATE INDEX {self.name} ON {self.table}({', '.join(self.keys)})"
+        if self.include:
+            ddl += f" INCLUDE ({', '.join(self.include)})"
+        return ddl + ";"
+
+
+def propose(conn, sql, params, columns, existing):
+    """Candidates for this query's plan.
+
+    A filtered table whose plan does not seek on the filter gets an index
+    on the filter columns; a table read in full (or through an automatic
+    index) gets one on its join, ordering or read columns. Columns the
+    query reads are added as INCLUDE columns while the index stays narrow.
+    """
+    text = expand_views(conn, sql)
+    alias_map = aliases(text, columns)
+    preds = predicates(text, alias_map)
+    orders = ordering(text, alias_map)
+    found = []
+    for alias, (access, seeks, covering) in plan_steps(plan(conn, sql, params)).items():
+        table = alias_map.get(alias)
+        if table is None:
+            continue
+        cols, rowid = columns[table]
+        eq = [c for a, c, k in preds if a == alias and k == "eq"]
+        ranges = [c for a, c, k in preds if a == alias and k == "range"]
+        joins = [c for a, c, k in preds if a == alias and k == "join"]
+        order = [c for a, c in orders if a == alias]
+        if rowid in order:
+            order = []  # grouped or sorted by the key: table order already serves it
+        reads = [c for c in referenced(text, alias, cols) if c != rowid]
+
+        filters = list(dict.fromkeys(eq + ranges[:1]))
+        if filters and filters[0] not in seeks and filters[0] != rowid:
+            kind, keys = "filter", filters
+        elif access == "search" and covering is False and rowid not in seeks:
+            # Seeks an index, then visits the table for the remaining columns
+            kind, keys = "covering", sorted(seeks & set(cols), key=cols.index)
+        elif access == "automatic":
+            kind, keys = "scan", joins
+        elif access == "scan" and order:
+            kind, keys = "scan", order
+        else:
+            continue
+        keys = [c for c in dict.fromkeys(keys) if c in cols and c != rowid]
+        include = [c for c in reads if c not in keys]
+        if not keys or (kind == "covering" and not include):
+            continue
+        if len(keys) + len(include) > 4:
+            if kind == "covering":
+                continue
+            include = []
+        if any(t == table and ic[:len(keys)] == keys and set(include) <= set(ic)
+               for _, t, ic, _ in existing):
+            continue
+        found.append(Candidate(table, keys, include, kind))
+    return found
+
+
+def merge(candidates):
+    """Fold a candidate into another on the same table whose keys it prefixes"""
+    merged = []
+    for cand in sorted(candidates, key=lambda c: -len(c.keys)):
+        for other in merged:
+            if other.table == cand.table and other.keys[:len(cand.keys)] == cand.keys:
+                extra = [c for c in cand.include if c not in other.keys + other.include]
+                if len(other.keys) + len(other.include) + len(extra) <= 4:
+                    other.include += tuple(extra)
+                other.queries += cand.queries
+                other.kind = min(cand.kind, other.kind, key=["filter", "covering", "scan"].index)
+                break
+        else:
+            merged.append(cand)
+    # Filter indexes first: they often make the other candidates unnecessary
+    order = {"filter": 0, "covering": 1, "scan": 2}
+    return sorted(merged, key=lambda c: order[c.kind])
+
+
+def measure(conn, sql, params, repeat):
+    """Best-of-`repeat` seconds to run the query and fetch every row.
+
+    The minimum is the run least disturbed by the rest of the machine,
+    which keeps before/after comparisons stable.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# ------------------ ADVISOR ------------------
+def still_scans(conn, cand, columns):
+    """Whether any query behind a scan candidate still reads its table in full"""
+    for _, sql, params in cand.queries:
+        steps = plan_steps(plan(conn, sql, params))
+        for alias, table in aliases(expand_views(conn, sql), columns).items():
+            if table == cand.table and steps.get(alias, ("search",))[0] != "search":
+                return True
+    return False
+
+
+def advise(conn, queries, repeat=7, min_speedup=MIN_SPEEDUP):
+    """Greedily keep the candidates that pay off.
+
+    Returns (before, after, kept) where before/after map query name to
+    (seconds, plan rows).
+    """
+    columns = table_columns(conn)
+    before = {name: (measure(conn, sql, params, repeat), plan(conn, sql, params))
+              for name, sql, params in queries}
+
+    candidates = {}
+    for name, sql, params in queries:
+        for cand in propose(conn, sql, params, columns, indexes(conn)):
+            cand = candidates.setdefault((cand.table, cand.keys, cand.include), cand)
+            cand.queries.append((name, sql, params))
+    candidates = merge(candidates.values())
+
+    current = {name: before[name][0] for name in before}
+    kept = []
+    for cand in candidates:
+        if cand.kind == "scan" and not still_scans(conn, cand, columns):
+            continue  # an index kept earlier already removed the scan
+        conn.execute(cand.sqlite_ddl())
+        conn.execute("ANALYZE")
+        timings = {name: measure(conn, sql, params, repeat) for name, sql, params in queries}
+        gains = {name: (current[name] / max(timings[name], 1e-9), current[name] - timings[name])
+                 for name, _, _ in cand.queries}
+        cand.best_query = max(gains, key=lambda n: gains[n][0])
+        cand.speedup, saved = gains[cand.best_query]
+        # An index may also win back a query an earlier pick made slower
+        recovers = [n for n, t in timings.items()
+                    if current[n] > before[n][0] * min_speedup
+                    and current[n] / max(t, 1e-9) >= min_speedup and current[n] - t >= MIN_SAVED]
+        if (cand.speedup >= min_speedup and saved >= MIN_SAVED) or recovers:
+            if recovers and cand.speedup < min_speedup:
+                cand.best_query = f"{recovers[0]} (recovered)"
+            kept.append(cand)
+            current = timings
+        else:
+            conn.execute(f"DROP INDEX {cand.name}")
+            conn.execute("ANALYZE")
+
+    after = {name: (measure(conn, sql, params, repeat), plan(conn, sql, params))
+             for name, sql, params in queries}
+    return before, after, kept, candidates
+
+
+def render(before, after, kept, candidates, redundant_indexes, scale):
+    lines = [f"Index advisor report ({scale})", ""]
+    lines.append(f"{'query':<44}{'before ms':>11}{'after ms':>10}{'speedup':>9}")
+    for name in before:
+        b, a = before[name][0], after[name][0]
+        lines.append(f"{name[:43]:<44}{b * 1000:>11.2f}{a * 1000:>10.2f}{b / max(a, 1e-9):>8.1f}x")
+    lines += ["", "Plans (before -> after):"]
+    for name in before:
+        if before[name][1] != after[name][1]:
+            lines.append(f"  {name}")
+            lines += [f"    - {row}" for row in before[name][1]]
+            lines += [f"    + {row}" for row in after[name][1]]
+    lines += ["", "Candidates:"]
+    for cand in candidates:
+        if cand.speedup is None:
+            lines.append(f"  {'skipped':<8}{'-':>7}  {cand.sqlite_ddl()}")
+        else:
+            mark = "kept" if cand in kept else "dropped"
+            lines.append(f"  {mark:<8}{cand.speedup:>6.1f}x  {cand.sqlite_ddl()}")
+            lines.append(f"  {'':<16}best: {cand.best_query}")
+    if redundant_indexes:
+        lines += ["", "Redundant existing indexes:"]
+        lines += [f"  {name} duplicates the leading columns of {other}"
+                  for name, other in redundant_indexes]
+    lines += ["", "Recommended (SQL Server, create_tables.sql):"]
+    lines += [f"  {cand.mssql_ddl()}" for cand in kept]
+    lines += ["", "Recommended (SQLite, create_tables_sqlite.sql):"]
+    lines += [f"  {cand.sqlite_ddl()}" for cand in kept]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose and test indexes for the project's queries")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--per-student", type=int, default=5)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=7, help="runs per timing (best of)")
+    parser.add_argument("--min-speedup", type=float, default=MIN_SPEEDUP)
+    parser.add_argument("--keep-schema-indexes", action="store_true",
+                        help="start from the schema's indexes instead of dropping them")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("🔄 Seeding stand-in database...")
+        conn = standin.create_db(os.path.join(tmp, "advisor.db"))
+        enrollments = standin.seed(conn, students=args.students, courses=args.courses,
+                                   per_student=args.per_student, sessions=args.sessions)
+        materialized.rebuild(conn)
+        # Keep the whole database in SQLite's page cache: plans, not I/O, are measured
+        conn.execute("PRAGMA cache_size = -1000000")
+        redundant_indexes = redundant(conn)
+        if not args.keep_schema_indexes:
+            dropped = drop_secondary_indexes(conn)
+            if dropped:
+                print(f"   dropped schema indexes for the baseline: {', '.join(dropped)}")
+        conn.execute("ANALYZE")
+
+        print("🔄 Measuring queries and testing candidate indexes...")
+        queries = workload(args.students, args.courses, enrollments)
+        before, after, kept, candidates = advise(conn, queries, args.repeat, args.min_speedup)
+        conn.close()
+
+    scale = (f"{args.students} students, {enrollments} enrollments, "
+             f"{enrollments * args.sessions} attendance rows, sqlite {sqlite3.sqlite_version}")
+    report = render(before, after, kept, candidates, redundant_indexes, scale)
+    print("\n" + report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+        print(f"\n✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
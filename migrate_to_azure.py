@@ -4,10 +4,18 @@ Database Migration Script: Local SQL Server → Azure SQL Database
 Migrates schema, data, views, and stored procedures
 """
 
+import argparse
+import json
+import os
 import pyodbc
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from records import materialized
+
 # Connection Strings
 LOCAL_CONN = """
 DRIVER={ODBC Driver 17 for SQL Server};
@@ -27,41 +35,75 @@ TrustServerCertificate=no;
 Connection Timeout=30;
 """
 
+# Key columns of each table, used for keyset pagination and checkpoints
+TABLE_KEYS = {
+    "students": ("student_id",),
+    "courses": ("course_id",),
+    "enrollments": ("enrollment_id",),
+    "grades": ("grade_id",),
+    "attendance": ("attendance_id",),
+    "attendance_terms": ("term_code",),
+    "attendance_term_counts": ("term_code", "enrollment_id"),
+}
+
+# Tables keyed by an IDENTITY column, copied with IDENTITY_INSERT
+IDENTITY_TABLES = {"students", "courses", "enrollments", "grades", "attendance"}
+
+# Integer expression that splits a table into checksum chunks (default: its key)
+CHUNK_BY = {
+    "attendance_terms": "YEAR(start_date)",
+    "attendance_term_counts": "enrollment_id",
+}
+
+# Tables in each wave only reference tables from earlier waves
+MIGRATION_WAVES = [
+    ["students", "courses", "attendance_terms"],
+    ["enrollments"],
+    ["grades", "attendance", "attendance_term_counts"],
+]
+
+CHUNK_SIZE = 10000
+STATE_FILE = ".migration_state.json"
+_state_lock = threading.Lock()
+
 def log(message):
     """Print timestamped log messages"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
 def connect_local():
-    """Connect to local SQL Server"""
+    """Connect to local SQL Server; raises ConnectionError"""
     try:
         conn = pyodbc.connect(LOCAL_CONN)
         log("✅ Connected to Local SQL Server")
         return conn
     except Exception as e:
-        log(f"❌ Failed to connect to Local SQL Server: {e}")
-        sys.exit(1)
+        raise ConnectionError(f"Failed to connect to Local SQL Server: {e}") from e
 
 def connect_azure():
-    """Connect to Azure SQL Database"""
+    """Connect to Azure SQL Database; raises ConnectionError"""
     try:
         conn = pyodbc.connect(AZURE_CONN)
         log("✅ Connected to Azure SQL Database")
         return conn
     except Exception as e:
-        log(f"❌ Failed to connect to Azure SQL Database: {e}")
-        sys.exit(1)
+        raise ConnectionError(f"Failed to connect to Azure SQL Database: {e}") from e
 
 def drop_constraints_azure(cursor):
     """Drop foreign key constraints in Azure (reverse order)"""
     try:
         log("📋 Dropping foreign key constraints...")
         drop_statements = [
+            "DROP TABLE IF EXISTS dbo.vw_term_attendance_summary;",
             "DROP TABLE IF EXISTS dbo.vw_at_risk_students;",
             "DROP TABLE IF EXISTS dbo.vw_course_performance;",
             "DROP TABLE IF EXISTS dbo.vw_attendance_summary;",
             "DROP TABLE IF EXISTS dbo.vw_course_roster;",
             "DROP TABLE IF EXISTS dbo.vw_student_transcript;",
+            "DROP TABLE IF EXISTS dbo.mv_course_grades;",
+            "DROP TABLE IF EXISTS dbo.mv_attendance_counts;",
+            "DROP TABLE IF EXISTS dbo.attendance_term_counts;",
+            "DROP TABLE IF EXISTS dbo.attendance_terms;",
             "DROP TABLE IF EXISTS dbo.attendance;",
             "DROP TABLE IF EXISTS dbo.grades;",
             "DROP TABLE IF EXISTS dbo.enrollments;",
@@ -105,64 +147,126 @@ def migrate_schema(local_conn, azure_conn):
         log(f"❌ Schema migration failed: {e}")
         sys.exit(1)
 
-def migrate_data(local_conn, azure_conn):
-    """Migrate data from local to Azure"""
+def load_state():
+    """Last migrated key per table from the checkpoint file"""
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, "r") as f:
+        return json.load(f)
+
+def save_checkpoint(state, table, last_key):
+    """Record a table's progress; the file is replaced atomically"""
+    with _state_lock:
+        state[table] = last_key
+        tmp = f"{STATE_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, STATE_FILE)
+
+def _after(keys):
+    """WHERE clause for rows whose (composite) key sorts after a given key"""
+    return " OR ".join(
+        "(" + " AND ".join([f"{k} = ?" for k in keys[:i]] + [f"{keys[i]} > ?"]) + ")"
+        for i in range(len(keys))
+    )
+
+def _after_params(last_key):
+    return [v for i in range(len(last_key)) for v in last_key[:i + 1]]
+
+def copy_table(table, state, chunk_size):
+    """Copy one table in keyset-paginated chunks on its own connections.
+
+    Resumes after the larger of the checkpointed key and the highest key
+    already in Azure, so a chunk committed just before a crash is not
+    inserted twice. Returns (rows, seconds).
+    """
+    keys = TABLE_KEYS[table]
+    order = ", ".join(keys)
+    start = time.perf_counter()
+    local_conn = connect_local()
+    try:
+        azure_conn = connect_azure()
+    except ConnectionError:
+        local_conn.close()
+        raise
     try:
-        log("📦 Migrating data...")
         local_cursor = local_conn.cursor()
         azure_cursor = azure_conn.cursor()
-        
-        # Tables in order (respecting foreign keys)
-        tables = ["students", "courses", "enrollments", "grades", "attendance"]
-        
-        for table in tables:
-            try:
-                # Get data from local
-                local_cursor.execute(f"SELECT * FROM {table}")
-                rows = local_cursor.fetchall()
-                
-                if not rows:
-                    log(f"  ℹ️  {table}: No data to migrate")
-                    continue
-                
-                # Get column names
+        azure_cursor.fast_executemany = True
+
+        azure_cursor.execute(f"SELECT TOP 1 {order} FROM {table} "
+                             f"ORDER BY {', '.join(f'{k} DESC' for k in keys)}")
+        found = azure_cursor.fetchone()
+        # Checkpoints from before composite keys hold a bare id
+        saved = state.get(table)
+        saved = tuple(saved) if isinstance(saved, list) else (saved,) if saved is not None else None
+        candidates = [k for k in (saved, tuple(found) if found else None) if k is not None]
+        last_key = max(candidates) if candidates else None
+
+        if table in IDENTITY_TABLES:
+            # IDENTITY_INSERT is per session, so it stays on for this connection
+            azure_cursor.execute(f"SET IDENTITY_INSERT {table} ON;")
+        migrated_count = 0
+        insert_sql = None
+        while True:
+            if last_key is None:
+                local_cursor.execute(f"SELECT TOP (?) * FROM {table} ORDER BY {order}", (chunk_size,))
+            else:
+                local_cursor.execute(
+                    f"SELECT TOP (?) * FROM {table} WHERE {_after(keys)} ORDER BY {order}",
+                    (chunk_size, *_after_params(last_key)),
+                )
+            rows = local_cursor.fetchall()
+            if not rows:
+                break
+            if insert_sql is None:
                 columns = [desc[0] for desc in local_cursor.description]
-                col_str = ", ".join(columns)
+                key_index = [columns.index(k) for k in keys]
                 placeholders = ", ".join(["?" for _ in columns])
-                
-                # Enable IDENTITY_INSERT for identity columns
-                try:
-                    azure_cursor.execute(f"SET IDENTITY_INSERT {table} ON;")
-                except:
-                    pass
-                
-                # Insert into Azure
-                migrated_count = 0
-                for row in rows:
-                    insert_sql = f"INSERT INTO {table} ({col_str}) VALUES ({placeholders})"
-                    try:
-                        azure_cursor.execute(insert_sql, row)
-                        migrated_count += 1
-                    except pyodbc.IntegrityError:
-                        # Skip duplicate keys
-                        pass
-                
-                # Disable IDENTITY_INSERT
+                insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+            azure_cursor.executemany(insert_sql, rows)
+            azure_conn.commit()
+            last_key = tuple(rows[-1][i] for i in key_index)
+            save_checkpoint(state, table, list(last_key))
+            migrated_count += len(rows)
+        if table in IDENTITY_TABLES:
+            azure_cursor.execute(f"SET IDENTITY_INSERT {table} OFF;")
+        azure_conn.commit()
+    finally:
+        local_conn.close()
+        azure_conn.close()
+    return migrated_count, time.perf_counter() - start
+
+def migrate_data(chunk_size=CHUNK_SIZE, resume=False):
+    """Migrate data from local to Azure.
+
+    Tables in the same wave have no foreign keys between them and are
+    copied in parallel; each wave waits for the one before it.
+    """
+    log("📦 Migrating data...")
+    if not resume and os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
+    state = load_state()
+    failed = False
+
+    for wave in MIGRATION_WAVES:
+        with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+            futures = {pool.submit(copy_table, table, state, chunk_size): table for table in wave}
+            for future in as_completed(futures):
+                table = futures[future]
                 try:
-                    azure_cursor.execute(f"SET IDENTITY_INSERT {table} OFF;")
-                except:
-                    pass
-                
-                azure_conn.commit()
-                log(f"  ✅ {table}: {migrated_count} rows migrated")
-                
-            except Exception as e:
-                log(f"  ⚠️  {table}: {e}")
-        
-        log("✅ Data migrated successfully")
-    except Exception as e:
-        log(f"❌ Data migration failed: {e}")
-        sys.exit(1)
+                    rows, seconds = future.result()
+                    rate = rows / seconds if seconds else 0
+                    log(f"  ✅ {table}: {rows} rows in {seconds:.1f}s ({rate:.0f} rows/s)")
+                except Exception as e:
+                    log(f"  ❌ {table}: {e}")
+                    failed = True
+        if failed:
+            log(f"❌ Data migration stopped; rerun with --resume to continue from {STATE_FILE}")
+            sys.exit(1)
+
+    log("✅ Data migrated successfully")
 
 def migrate_views(azure_conn):
     """Create views in Azure"""
@@ -187,38 +291,114 @@ def migrate_views(azure_conn):
     except Exception as e:
         log(f"⚠️  Views creation warning: {e}")
 
-def verify_migration(local_conn, azure_conn):
-    """Verify migration by comparing row counts"""
+def refresh_summaries(azure_conn):
+    """Rebuild the summary tables the views read from"""
+    try:
+        log("🧮 Rebuilding summary tables...")
+        materialized.rebuild(azure_conn)
+        log("✅ Summary tables rebuilt")
+    except Exception as e:
+        log(f"⚠️  Summary rebuild warning: {e}")
+
+def chunk_checksums(cursor, table, chunk_size):
+    """{chunk: (rows, checksum)} for a table split into key ranges"""
+    by = CHUNK_BY.get(table, TABLE_KEYS[table][0])
+    cursor.execute(f"""
+        SELECT {by} / {int(chunk_size)}, COUNT(*), CHECKSUM_AGG(BINARY_CHECKSUM(*))
+        FROM {table}
+        GROUP BY {by} / {int(chunk_size)}
+    """)
+    return {chunk: (count, checksum) for chunk, count, checksum in cursor.fetchall()}
+
+def row_checksums(cursor, table, chunk, chunk_size):
+    """{key: checksum} for every row of one chunk; composite keys are tuples"""
+    keys = TABLE_KEYS[table]
+    by = CHUNK_BY.get(table, keys[0])
+    cursor.execute(
+        f"SELECT {', '.join(keys)}, BINARY_CHECKSUM(*) FROM {table} WHERE {by} >= ? AND {by} < ?",
+        (chunk * chunk_size, (chunk + 1) * chunk_size),
+    )
+    if len(keys) == 1:
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    return {tuple(row[:-1]): row[-1] for row in cursor.fetchall()}
+
+def verify_table(table, chunk_size):
+    """Compare one table chunk by chunk and drill into mismatching chunks.
+
+    Only per-chunk checksums cross the network for matching data; row
+    checksums are fetched just for the chunks that differ. Returns
+    (rows, chunks, missing, extra, changed) where the last three are lists
+    of keys absent from Azure, only in Azure, and differing in content.
+    A connection that fails raises ConnectionError, which
+    verify_migration() reports as a failed table.
+    """
+    local_conn = connect_local()
+    try:
+        azure_conn = connect_azure()
+    except ConnectionError:
+        local_conn.close()
+        raise
     try:
-        log("🔍 Verifying migration...")
         local_cursor = local_conn.cursor()
         azure_cursor = azure_conn.cursor()
-        
-        tables = ["students", "courses", "enrollments", "grades", "attendance"]
+        local_chunks = chunk_checksums(local_cursor, table, chunk_size)
+        azure_chunks = chunk_checksums(azure_cursor, table, chunk_size)
+
+        missing, extra, changed = [], [], []
+        for chunk in sorted(set(local_chunks) | set(azure_chunks)):
+            if local_chunks.get(chunk) == azure_chunks.get(chunk):
+                continue
+            local_rows = row_checksums(local_cursor, table, chunk, chunk_size)
+            azure_rows = row_checksums(azure_cursor, table, chunk, chunk_size)
+            missing += sorted(set(local_rows) - set(azure_rows))
+            extra += sorted(set(azure_rows) - set(local_rows))
+            changed += sorted(k for k in set(local_rows) & set(azure_rows)
+                              if local_rows[k] != azure_rows[k])
+    finally:
+        local_conn.close()
+        azure_conn.close()
+    rows = sum(count for count, _ in local_chunks.values())
+    return rows, len(local_chunks), missing, extra, changed
+
+def verify_migration(chunk_size=CHUNK_SIZE, show=10):
+    """Verify migration by comparing per-chunk checksums, tables in parallel"""
+    try:
+        log("🔍 Verifying migration...")
         all_match = True
-        
-        for table in tables:
-            try:
-                local_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                local_count = local_cursor.fetchone()[0]
-                
-                azure_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                azure_count = azure_cursor.fetchone()[0]
-                
-                match = "✅" if local_count == azure_count else "⚠️"
-                print(f"  {match} {table}: Local={local_count}, Azure={azure_count}")
-                
-                if local_count != azure_count:
-                    all_match = False
-            except Exception as e:
-                print(f"  ❌ {table}: {e}")
+
+        with ThreadPoolExecutor(max_workers=len(TABLE_KEYS)) as pool:
+            futures = {pool.submit(verify_table, table, chunk_size): table for table in TABLE_KEYS}
+            results = {}
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    results[table] = future.result()
+                except Exception as e:
+                    results[table] = e
+
+        for table in TABLE_KEYS:
+            result = results[table]
+            if isinstance(result, Exception):
+                print(f"  ❌ {table}: {result}")
                 all_match = False
-        
+                continue
+            rows, chunks, missing, extra, changed = result
+            if not (missing or extra or changed):
+                print(f"  ✅ {table}: {rows} rows in {chunks} chunks match")
+                continue
+            all_match = False
+            print(f"  ⚠️ {table}: {len(missing)} missing in Azure, "
+                  f"{len(extra)} only in Azure, {len(changed)} changed")
+            for label, keys in (("missing", missing), ("extra", extra), ("changed", changed)):
+                if keys:
+                    more = f" (+{len(keys) - show} more)" if len(keys) > show else ""
+                    print(f"      {label}: {', '.join(TABLE_KEYS[table])} {keys[:show]}{more}")
+
         if all_match:
             log("✅ Migration verification successful!")
             return True
         else:
-            log("⚠️  Some data counts don't match")
+            log("⚠️  Some rows don't match")
             return False
     except Exception as e:
         log(f"❌ Verification failed: {e}")
@@ -226,35 +406,50 @@ def verify_migration(local_conn, azure_conn):
 
 def main():
     """Main migration process"""
+    parser = argparse.ArgumentParser(description="Migrate the local database to Azure SQL")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep the Azure schema and continue an interrupted data copy")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="rows per keyset page / Azure commit")
+    args = parser.parse_args()
+
     log("=" * 60)
     log("DATABASE MIGRATION: Local SQL Server → Azure SQL Database")
     log("=" * 60)
     
     # Connect to both databases
-    local_conn = connect_local()
-    azure_conn = connect_azure()
+    try:
+        local_conn = connect_local()
+        azure_conn = connect_azure()
+    except ConnectionError as e:
+        log(f"❌ {e}")
+        sys.exit(1)
     
     try:
-        # Step 1: Drop existing objects in Azure
-        log("\n📋 Step 1: Cleaning up Azure database...")
-        azure_cursor = azure_conn.cursor()
-        drop_constraints_azure(azure_cursor)
-        
-        # Step 2: Migrate schema
-        log("\n📊 Step 2: Migrating schema...")
-        migrate_schema(local_conn, azure_conn)
+        if args.resume:
+            log("\n⏭️  Resuming: keeping the existing Azure schema")
+        else:
+            # Step 1: Drop existing objects in Azure
+            log("\n📋 Step 1: Cleaning up Azure database...")
+            azure_cursor = azure_conn.cursor()
+            drop_constraints_azure(azure_cursor)
+
+            # Step 2: Migrate schema
+            log("\n📊 Step 2: Migrating schema...")
+            migrate_schema(local_conn, azure_conn)
         
         # Step 3: Migrate data
         log("\n📦 Step 3: Migrating data...")
-        migrate_data(local_conn, azure_conn)
+        migrate_data(args.chunk_size, args.resume)
         
         # Step 4: Create views
         log("\n👁️  Step 4: Creating views...")
         migrate_views(azure_conn)
+        refresh_summaries(azure_conn)
         
         # Step 5: Verify migration
         log("\n🔍 Step 5: Verifying migration...")
-        verify_migration(local_conn, azure_conn)
+        verify_migration(args.chunk_size)
         
         log("\n" + "=" * 60)
         log("✅ MIGRATION COMPLETED SUCCESSFULLY!")
@@ -0,0 +1 @@
+"""Shared building blocks for the student records system."""
@@ -0,0 +1,407 @@
+"""
+In-process attendance store backed by NumPy arrays.
+
+vw_attendance_summary, vw_at_risk_students and the attendance-risk query
+in sql/analytics_queries.sql all come down to counting attendance rows per
+enrollment. The store loads the attendance table once into a compact
+layout and answers those questions for every enrollment at once with
+vectorised reductions:
+
+* one row per enrollment, ordered by enrollment_id, with its student and
+  course ids;
+* a uint8 status matrix holding each enrollment's sessions in date order
+  (1 Present, 2 Absent, 3 Late, 4 a row without a status; 0 past the
+  enrollment's last session) and an int32 matrix of the matching days
+  since 1970-01-01.
+
+The matrices are as wide as the enrollment with the most sessions, so a
+session costs about five bytes against 60-100 for a DataFrame of
+attendance rows. An enrollment has one status per day, as in bulk ingest;
+when the table holds two rows for the same day the later one wins.
+
+shared() loads the store once per process and reloads it after
+ATTENDANCE_STORE_TTL seconds (default 300), which bounds how stale it gets
+when another process writes attendance. services.mark_attendance() applies
+its writes in place and bulk ingest discard()s it. Queries read the arrays
+as they were when the query started: mark() only writes in place within
+an enrollment's row or past the last row, and reallocates the arrays
+whenever it has to move rows, so a concurrent write never changes their
+shape under a reader. view() pins that state across several queries.
+
+    python -m records.attendance_store [--threshold 75] [--snapshot DIR]
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+from records import db, snapshot, telemetry
+
+ATTENDANCE_STORE_TTL = float(os.getenv("ATTENDANCE_STORE_TTL", "300"))
+FETCH_SIZE = 50000
+# vw_at_risk_students: attendance below this percentage
+AT_RISK_BELOW = 75.0
+# Rows per block in streaks(), bounding its temporary arrays
+BLOCK_ROWS = 65536
+
+NO_SESSION = 0
+CODES = {"Present": 1, "Absent": 2, "Late": 3}
+PRESENT = CODES["Present"]
+UNRECORDED = 4
+
+ENROLLMENTS_QUERY = "SELECT enrollment_id, student_id, course_id FROM enrollments"
+# Days since 1970-01-01, so attendance comes back as plain integers
+DAY_NUMBER_SQL = {
+    "mssql": "DATEDIFF(day, '19700101', attendance_date)",
+    "postgres": "attendance_date - DATE '1970-01-01'",
+    "sqlite": "CAST(julianday(attendance_date) - 2440587.5 AS INTEGER)",
+}
+ATTENDANCE_QUERY = """
+    SELECT enrollment_id, {day},
+           CASE status WHEN 'Present' THEN 1 WHEN 'Absent' THEN 2 WHEN 'Late' THEN 3 ELSE 4 END
+    FROM attendance
+    ORDER BY attendance_id
+"""
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+# The store's arrays cut to its enrollments at one moment
+Arrays = namedtuple("Arrays", "enrollment_ids student_ids course_ids counts status days")
+
+
+def day_number(value):
+    """Days since 1970-01-01 of a date or an ISO date string"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal() - _EPOCH
+
+
+def _fetch_array(cur, sql, width, fetch_size=FETCH_SIZE):
+    """An all-integer result as an (rows, width) int64 array.
+
+    Each batch is converted as it arrives, so millions of rows never live
+    as Python objects at once.
+    """
+    cur.execute(sql)
+    batches = [np.empty((0, width), np.int64)]
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            return np.concatenate(batches)
+        batches.append(np.array(rows, np.int64).reshape(len(rows), width))
+
+
+class AttendanceStore:
+    """Every enrollment's sessions as rows of a status matrix"""
+
+    def __init__(self, enrollment_ids, student_ids, course_ids, row_enrollments, row_days, row_codes):
+        """Build from the enrollment columns and the attendance rows in attendance_id order"""
+        order = np.argsort(enrollment_ids, kind="stable")
+        self.size = len(order)
+        self.enrollment_ids = np.asarray(enrollment_ids, np.int64)[order]
+        self.student_ids = np.asarray(student_ids, np.int64)[order]
+        self.course_ids = np.asarray(course_ids, np.int64)[order]
+
+        row_enrollments = np.asarray(row_enrollments, np.int64)
+        rows = np.searchsorted(self.enrollment_ids, row_enrollments)
+        known = rows < self.size
+        known[known] = self.enrollment_ids[rows[known]] == row_enrollments[known]
+        rows, days, codes = rows[known], np.asarray(row_days)[known], np.asarray(row_codes)[known]
+
+        # Sessions by enrollment and day, keeping only the last row written for a day
+        order = np.lexsort((np.arange(len(rows)), days, rows))
+        rows, days, codes = rows[order], days[order], codes[order]
+        last = np.ones(len(rows), bool)
+        last[:-1] = (rows[1:] != rows[:-1]) | (days[1:] != days[:-1])
+        rows, days, codes = rows[last], days[last], codes[last]
+
+        self.counts = np.bincount(rows, minlength=self.size).astype(np.int32)
+        width = int(self.counts.max()) if self.size else 0
+        slots = np.arange(len(rows)) - (np.cumsum(self.counts) - self.counts)[rows]
+        self.status = np.zeros((self.size, width), np.uint8)
+        self.status[rows, slots] = codes
+        self.days = np.zeros((self.size, width), np.int32)
+        self.days[rows, slots] = days
+
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, conn, fetch_size=FETCH_SIZE):
+        """The store for the current contents of the database"""
+        with telemetry.timer("attendance.load") as span:
+            cur = conn.cursor()
+            enrollments = _fetch_array(cur, ENROLLMENTS_QUERY, 3, fetch_size)
+            attendance = _fetch_array(
+                cur, ATTENDANCE_QUERY.format(day=DAY_NUMBER_SQL[db.dialect()]), 3, fetch_size)
+            span.rows = len(attendance)
+            return cls(*enrollments.T, attendance[:, 0], attendance[:, 1].astype(np.int32),
+                       attendance[:, 2].astype(np.uint8))
+
+    @classmethod
+    def from_snapshot(cls, snapshot_dir):
+        """Same store, read from a memory-mapped table snapshot"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        enrollments = snapshot.open_table(snapshot_dir, "enrollments")
+        attendance = snapshot.open_table(snapshot_dir, "attendance").sort_by("attendance_id")
+        status = pc.dictionary_encode(attendance["status"]).combine_chunks()
+        lookup = np.array([CODES.get(s, UNRECORDED) for s in status.dictionary.to_pylist()]
+                          + [UNRECORDED], np.uint8)
+        codes = lookup[status.indices.fill_null(len(lookup) - 1).to_numpy()]
+        return cls(*(enrollments[c].to_numpy() for c in ("enrollment_id", "student_id", "course_id")),
+                   attendance["enrollment_id"].to_numpy(),
+                   attendance["attendance_date"].cast(pa.int32()).to_numpy(), codes)
+
+    def __len__(self):
+        return self.size
+
+    def arrays(self):
+        """The arrays cut to the current enrollments; later writes never
+        change their shape"""
+        with self._lock:
+            n = self.size
+            return Arrays(self.enrollment_ids[:n], self.student_ids[:n], self.course_ids[:n],
+                          self.counts[:n], self.status[:n], self.days[:n])
+
+    def view(self):
+        """A store fixed at the current enrollments, for answering several
+        queries about the same rows while writes go on"""
+        view = object.__new__(type(self))
+        (view.enrollment_ids, view.student_ids, view.course_ids,
+         view.counts, view.status, view.days) = self.arrays()
+        view.size = len(view.enrollment_ids)
+        view.loaded_at = self.loaded_at
+        view._lock = threading.Lock()
+        return view
+
+    @property
+    def sessions(self):
+        return int(self.arrays().counts.sum())
+
+    @property
+    def nbytes(self):
+        arrays = (self.enrollment_ids, self.student_ids, self.course_ids,
+                  self.counts, self.status, self.days)
+        return sum(a.nbytes for a in arrays)
+
+    # ------------------ WRITES ------------------
+    def _grow(self, rows=None, width=None):
+        """Reallocate the arrays with room for `rows` enrollments of `width` sessions"""
+        rows = rows or len(self.enrollment_ids)
+        width = width or self.status.shape[1]
+        for name in ("enrollment_ids", "student_ids", "course_ids", "counts"):
+            old = getattr(self, name)
+            new = np.zeros(rows, old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        for name in ("status", "days"):
+            old = getattr(self, name)
+            new = np.zeros((rows, width), old.dtype)
+            new[:self.size, :old.shape[1]] = old[:self.size]
+            setattr(self, name, new)
+
+    def _insert_row(self, row, enrollment_id, student_id, course_id):
+        end = self.size
+        # New enrollments almost always have the highest id, so this is
+        # usually an append into spare rows no reader can see yet. Moving
+        # rows down, or running out of them, copies every array instead.
+        if row < end or end == len(self.enrollment_ids):
+            rows = len(self.enrollment_ids) if end < len(self.enrollment_ids) else max(16, 2 * end)
+            for name in ("enrollment_ids", "student_ids", "course_ids", "counts", "status", "days"):
+                old = getattr(self, name)
+                new = np.zeros((rows, *old.shape[1:]), old.dtype)
+                new[:row] = old[:row]
+                new[row + 1:end + 1] = old[row:end]
+                setattr(self, name, new)
+        self.enrollment_ids[row] = enrollment_id
+        self.student_ids[row] = student_id
+        self.course_ids[row] = course_id
+        self.counts[row] = 0
+        self.status[row] = NO_SESSION
+        self.days[row] = 0
+        self.size += 1
+
+    def mark(self, enrollment_id, attendance_date, status, student_id, course_id):
+        """Apply one attendance write in place; a mark for a day already recorded replaces it"""
+        code = CODES.get(status, UNRECORDED)
+        day = day_number(attendance_date)
+        with self._lock:
+            row = int(np.searchsorted(self.enrollment_ids[:self.size], enrollment_id))
+            if row == self.size or self.enrollment_ids[row] != enrollment_id:
+                self._insert_row(row, enrollment_id, student_id, course_id)
+            count = int(self.counts[row])
+            slot = int(np.searchsorted(self.days[row, :count], day))
+            if slot < count and self.days[row, slot] == day:
+                self.status[row, slot] = code
+                return
+            if count == self.status.shape[1]:
+                self._grow(width=count + max(8, count // 4))
+            self.status[row, slot + 1:count + 1] = self.status[row, slot:count]
+            self.days[row, slot + 1:count + 1] = self.days[row, slot:count]
+            self.status[row, slot] = code
+            self.days[row, slot] = day
+            self.counts[row] = count + 1
+
+    # ------------------ QUERIES ------------------
+    def rows_of(self, enrollment_ids):
+        """Row positions of enrollments known to the store"""
+        return np.searchsorted(self.arrays().enrollment_ids, enrollment_ids)
+
+    @staticmethod
+    def _window(a, start, end):
+        """Status matrix of `a` with sessions outside [start, end] blanked out"""
+        status, days = a.status, a.days
+        if start is None and end is None:
+            return status
+        inside = status != NO_SESSION
+        if start is not None:
+            inside &= days >= day_number(start)
+        if end is not None:
+            inside &= days <= day_number(end)
+        return np.where(inside, status, NO_SESSION)
+
+    def _tallies(self, a, start, end):
+        status = self._window(a, start, end)
+        if start is None and end is None:
+            total = a.counts.copy()
+        else:
+            total = np.count_nonzero(status, axis=1)
+        return np.count_nonzero(status == PRESENT, axis=1), total
+
+    def tallies(self, start=None, end=None):
+        """(present, total) sessions per enrollment, optionally between two dates"""
+        return self._tallies(self.arrays(), start, end)
+
+    def summary(self, start=None, end=None):
+        """vw_attendance_summary as aligned arrays, one entry per enrollment with sessions"""
+        a = self.arrays()
+        present, total = self._tallies(a, start, end)
+        attended = total > 0
+        return {
+            "enrollment_id": a.enrollment_ids[attended],
+            "student_id": a.student_ids[attended],
+            "course_id": a.course_ids[attended],
+            "present": present[attended],
+            "total": total[attended],
+            "attendance_percentage": np.round(present[attended] * 100.0 / total[attended], 2),
+        }
+
+    def at_risk(self, threshold=AT_RISK_BELOW, start=None, end=None):
+        """The summary entries below `threshold` percent, as vw_at_risk_students"""
+        summary = self.summary(start, end)
+        below = summary["attendance_percentage"] < threshold
+        return {column: values[below] for column, values in summary.items()}
+
+    def student_rates(self, start=None, end=None):
+        """(student_ids, attendance percentage) over all of each student's enrollments.
+
+        Unlike the analytics SQL, whose SUM(CASE ...) is NULL for a student
+        who attended nothing, such a student gets 0 here.
+        """
+        a = self.arrays()
+        present, total = self._tallies(a, start, end)
+        students, index = np.unique(a.student_ids, return_inverse=True)
+        present = np.bincount(index, present, len(students))
+        total = np.bincount(index, total, len(students))
+        attended = total > 0
+        return students[attended], present[attended] * 100.0 / total[attended]
+
+    def streaks(self, status="Absent"):
+        """(current, longest) run of consecutive sessions with `status` per enrollment"""
+        code = CODES[status]
+        a = self.arrays()
+        size = len(a.counts)
+        current = np.zeros(size, np.int32)
+        longest = np.zeros(size, np.int32)
+        slot = np.arange(a.status.shape[1], dtype=np.int32)
+        if not len(slot):
+            return current, longest
+        for begin in range(0, size, BLOCK_ROWS):
+            block = slice(begin, min(begin + BLOCK_ROWS, size))
+            hit = a.status[block] == code
+            # Run length at each session: its slot minus the slot of the last other session
+            run = slot - np.maximum.accumulate(np.where(hit, -1, slot), axis=1)
+            longest[block] = run.max(axis=1)
+            counts = a.counts[block]
+            last = run[np.arange(len(counts)), np.maximum(counts - 1, 0)]
+            current[block] = np.where(counts > 0, last, 0)
+        return current, longest
+
+
+# ------------------ SHARED STORE ------------------
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """The process-wide store, loaded on first use and after ATTENDANCE_STORE_TTL seconds"""
+    global _shared
+    with _shared_lock:
+        if _shared is None or time.monotonic() - _shared.loaded_at >= ATTENDANCE_STORE_TTL:
+            with db.connection() as conn:
+                _shared = AttendanceStore.load(conn)
+        return _shared
+
+
+def record(enrollment_id, attendance_date, status, student_id, course_id):
+    """Apply a committed attendance write to the shared store, if it is loaded"""
+    store = _shared
+    if store is not None:
+        store.mark(enrollment_id, attendance_date, status, student_id, course_id)
+
+
+def discard():
+    """Forget the shared store; the next shared() reloads it"""
+    global _shared
+    _shared = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance rates and at-risk enrollments")
+    parser.add_argument("--threshold", type=float, default=AT_RISK_BELOW,
+                        help="at-risk below this attendance percentage")
+    parser.add_argument("--snapshot", metavar="DIR",
+                        help="read a table snapshot instead of the database")
+    parser.add_argument("--top", type=int, default=10,
+                        help="longest current absence streaks to list")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.snapshot:
+        store = AttendanceStore.from_snapshot(args.snapshot)
+    else:
+        with db.connection() as conn:
+            store = AttendanceStore.load(conn)
+        db.close()
+    loaded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    at_risk = store.at_risk(args.threshold)
+    students, rates = store.student_rates()
+    current, _ = store.streaks("Absent")
+    queried = time.perf_counter() - start
+
+    print(f"✅ {store.sessions} sessions of {len(store)} enrollments loaded in {loaded:.2f}s "
+          f"({store.nbytes / 1e6:.1f} MB)")
+    print(f"⚠️  {len(at_risk['enrollment_id'])} enrollments and "
+          f"{int((rates < args.threshold).sum())} of {len(students)} students "
+          f"below {args.threshold:g}% attendance ({queried * 1000:.0f} ms)")
+    if args.top:
+        print("\nLongest current absence streaks:")
+        print(f"{'enrollment':>12}{'student':>10}{'course':>8}{'absences':>10}")
+        for row in np.argsort(-current, kind="stable")[:args.top]:
+            if not current[row]:
+                break
+            print(f"{store.enrollment_ids[row]:>12}{store.student_ids[row]:>10}"
+                  f"{store.course_ids[row]:>8}{current[row]:>10}")
+
+
+if __name__ == "__main__":
+    main()
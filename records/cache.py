@@ -0,0 +1,163 @@
+"""
+In-process read-through caches with LRU and TTL eviction.
+
+Each cache holds at most `maxsize` entries, dropping the least recently
+used one when full, and forgets an entry `ttl` seconds after it was
+loaded. Writers invalidate exactly the keys they change; the TTL bounds
+how stale an entry can get when the write happened in another process
+(the ETL, analytics, a second API worker). A value loaded while its key
+was invalidated is returned but not cached, as it may predate the write.
+Hit/miss counters are kept per cache and reported by stats().
+
+    CACHE_TTL   seconds an entry lives (default 300; 0 disables caching)
+    CACHE_SIZE  entries per cache (default 10000)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "10000"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, name, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        # key -> tick of its last invalidation, the oldest forgotten past maxsize;
+        # a forgotten key counts as invalidated at _floor
+        self._invalidated = OrderedDict()
+        self._tick = self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def tick(self):
+        """Token for a load starting now, to pass to put() as `since`"""
+        with self._lock:
+            return self._tick
+
+    def put(self, key, value, since=None):
+        """Cache value; with `since` (from tick()), only if key has not been
+        invalidated since"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if since is not None and self._invalidated.get(key, self._floor) > since:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Cached value for key, calling loader() on a miss.
+
+        Exceptions from the loader propagate and nothing is cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            since = self.tick()
+            value = loader()
+            self.put(key, value, since)
+        return value
+
+    def get_many(self, keys, loader):
+        """{key: value} for keys; loader(missing_keys) returns {key: value}
+        for the misses in one call"""
+        found, missing = {}, []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            since = self.tick()
+            loaded = loader(missing)
+            for key, value in loaded.items():
+                self.put(key, value, since)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._tick += 1
+            for key in keys:
+                self._data.pop(key, None)
+                self._invalidated.pop(key, None)
+                self._invalidated[key] = self._tick
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, tick = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, tick)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._invalidated.clear()
+            self._tick += 1
+            self._floor = self._tick
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# ------------------ REGISTRY ------------------
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def named(name, maxsize=None, ttl=None):
+    """The process-wide cache called `name`, created on first use"""
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name, CACHE_SIZE if maxsize is None else maxsize,
+                                     CACHE_TTL if ttl is None else ttl)
+        return _caches[name]
+
+
+def stats():
+    """Counters of every cache, by name"""
+    return {name: c.stats() for name, c in _caches.items()}
+
+
+def clear_all():
+    for c in list(_caches.values()):
+        c.clear()
@@ -0,0 +1,297 @@
+"""
+Shared database access for the CLI, transcript generator, ETL and scripts.
+
+A single thread-safe ConnectionPool hands out warm connections. Nothing is
+opened until the first connection() call, idle connections are pinged
+before reuse and dropped if dead, and the backend is picked by DB_BACKEND:
+
+    pyodbc    SQL Server / Azure SQL (default)
+    psycopg2  PostgreSQL
+    sqlite3   local file, for testing and benchmarks
+
+Queries are written with '?' placeholders; wrap them in q() so they are
+rewritten for backends that use a different paramstyle.
+
+With TELEMETRY on, borrowed connections are wrapped so that every execute
+and commit is timed (see telemetry.py).
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from records import telemetry
+
+# Environment is read once, on the first pool creation
+_settings = None
+
+
+def settings():
+    """Connection settings from the environment (and .env when available)"""
+    global _settings
+    if _settings is None:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        _settings = {
+            "backend": os.getenv("DB_BACKEND", "pyodbc"),
+            "driver": os.getenv("DB_DRIVER", "{ODBC Driver 17 for SQL Server}"),
+            "host": os.getenv("DB_HOST"),
+            "port": os.getenv("DB_PORT"),
+            "name": os.getenv("DB_NAME"),
+            "user": os.getenv("DB_USER"),
+            "password": os.getenv("DB_PASS"),
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        }
+    return _settings
+
+
+# ------------------ BACKENDS ------------------
+def _connect_pyodbc(cfg, dsn=None):
+    import pyodbc
+    if dsn is None:
+        if cfg["user"]:
+            # SQL authentication, e.g. Azure SQL
+            dsn = (
+                f"Driver={cfg['driver']};"
+                f"Server=tcp:{cfg['host']},{cfg['port'] or 1433};"
+                f"Database={cfg['name']};"
+                f"Uid={cfg['user']};"
+                f"Pwd={cfg['password']};"
+                "Encrypt=yes;TrustServerCertificate=no;Connection Timeout=30;"
+            )
+        else:
+            # Windows Authentication, e.g. a local SQL Server
+            dsn = (
+                f"Driver={cfg['driver']};"
+                f"Server={cfg['host']};"
+                f"Database={cfg['name']};"
+                "Trusted_Connection=yes;"
+            )
+    return pyodbc.connect(dsn)
+
+
+def _connect_psycopg2(cfg, dsn=None):
+    import psycopg2
+    if dsn is not None:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        dbname=cfg["name"],
+        user=cfg["user"],
+        password=cfg["password"],
+        host=cfg["host"],
+        port=cfg["port"] or 5432,
+    )
+
+
+def _connect_sqlite3(cfg, dsn=None):
+    import sqlite3
+    # Pooled connections move between threads, one holder at a time
+    conn = sqlite3.connect(dsn or cfg["name"] or ":memory:", check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+BACKENDS = {
+    "pyodbc": {"connect": _connect_pyodbc, "paramstyle": "qmark", "dialect": "mssql"},
+    "psycopg2": {"connect": _connect_psycopg2, "paramstyle": "format", "dialect": "postgres"},
+    "sqlite3": {"connect": _connect_sqlite3, "paramstyle": "qmark", "dialect": "sqlite"},
+}
+
+
+def _in_transaction(conn):
+    """Whether a connection has uncommitted work that must not leak to the next user"""
+    if hasattr(conn, "in_transaction"):  # sqlite3
+        return conn.in_transaction
+    if hasattr(conn, "get_transaction_status"):  # psycopg2
+        return conn.get_transaction_status() != 0
+    # pyodbc exposes no flag; rolling back an idle connection is cheap
+    return not getattr(conn, "autocommit", False)
+
+
+# Quoted literals and identifiers, '?' placeholders and '%' signs
+_SQL_TOKENS = re.compile(r"'[^']*'|\"[^\"]*\"|\?|%")
+
+
+def _format_paramstyle(sql):
+    """'?' placeholders outside quotes as %s, and every '%' doubled, for
+    drivers whose paramstyle is 'format'"""
+    def token(match):
+        text = match.group(0)
+        if text == "?":
+            return "%s"
+        return text.replace("%", "%%")
+    return _SQL_TOKENS.sub(token, sql)
+
+
+# ------------------ POOL ------------------
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections.
+
+    At most `maxsize` connections are checked out at once. Connections are
+    created lazily, reused most-recently-used first, and pinged before reuse
+    if they have been idle longer than `ping_after` seconds.
+    """
+
+    def __init__(self, backend="pyodbc", dsn=None, maxsize=5, timeout=30.0,
+                 ping_after=30.0, cfg=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown DB backend: {backend}")
+        self.backend = backend
+        self.dialect = BACKENDS[backend]["dialect"]
+        self.paramstyle = BACKENDS[backend]["paramstyle"]
+        self._connect = BACKENDS[backend]["connect"]
+        self._cfg = cfg or settings()
+        self.dsn = dsn
+        self._timeout = timeout
+        self._ping_after = ping_after
+        self._idle = []  # (connection, released_at)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+
+    def _new(self):
+        return self._connect(self._cfg, self.dsn)
+
+    def _healthy(self, conn):
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Check out a connection, opening one if none is idle"""
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolTimeout(f"No free connection after {self._timeout}s")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return telemetry.instrument(self._new())
+                conn, released_at = entry
+                if time.monotonic() - released_at < self._ping_after or self._healthy(conn):
+                    return telemetry.instrument(conn)
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """Return a connection; broken ones are closed instead of reused"""
+        conn = telemetry.unwrap(conn)
+        try:
+            if not broken and _in_transaction(conn):
+                conn.rollback()
+        except Exception:
+            broken = True
+        if broken:
+            self._discard(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block.
+
+        On error the transaction is rolled back, and the connection is
+        dropped if it no longer answers a ping.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            self.release(conn, broken=not self._healthy(conn))
+            raise
+        self.release(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def q(self, sql):
+        """Rewrite '?' placeholders for this backend's paramstyle. The result
+        is meant to be executed with parameters: with 'format' a literal '%'
+        comes back doubled, as the driver expects then."""
+        return _format_paramstyle(sql) if self.paramstyle == "format" else sql
+
+
+# ------------------ DEFAULT POOL ------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, created on first use from the environment"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                cfg = settings()
+                _pool = ConnectionPool(cfg["backend"], maxsize=cfg["pool_size"],
+                                       timeout=cfg["pool_timeout"])
+    return _pool
+
+
+def set_pool(pool):
+    """Replace the process-wide pool, e.g. with a sqlite3 pool in benchmarks"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = pool
+
+
+def detach(pool):
+    """Install `pool` as the process-wide pool without closing the current
+    one: in a worker process the inherited connections belong to the parent"""
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def connection():
+    """Borrow a connection from the process-wide pool"""
+    return get_pool().connection()
+
+
+def q(sql):
+    """Adapt '?' placeholders to the process-wide pool's backend"""
+    return get_pool().q(sql)
+
+
+def dialect():
+    """'mssql', 'postgres' or 'sqlite' for the process-wide pool"""
+    return get_pool().dialect
+
+
+def close():
+    """Close the idle connections of the process-wide pool"""
+    if _pool is not None:
+        _pool.close()
@@ -0,0 +1,175 @@
+"""
+Materialised summary tables behind the attendance and course views.
+
+mv_attendance_counts keeps present/total counts per enrollment and
+mv_course_grades keeps the grade sum/count per course, so
+vw_attendance_summary, vw_at_risk_students and vw_course_performance read
+one small row per enrollment or course instead of aggregating every
+attendance and grade row.
+
+Single writes keep the tables current through on_attendance() and
+on_grade(), called in the same transaction as the write. Bulk loads call
+refresh_enrollments() for the rows they touched, and rebuild() recomputes
+everything for recovery:
+
+    python -m records.materialized rebuild
+"""
+
+import argparse
+
+from records import db, telemetry
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM mv_attendance_counts",
+    """
+    INSERT INTO mv_attendance_counts(enrollment_id, present_count, total_count)
+    SELECT enrollment_id,
+           SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+           COUNT(*)
+    FROM attendance
+    GROUP BY enrollment_id
+    """,
+    "DELETE FROM mv_course_grades",
+    """
+    INSERT INTO mv_course_grades(course_id, grade_sum, grade_count)
+    SELECT e.course_id, SUM(g.grade), COUNT(g.grade)
+    FROM grades g
+    JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+    WHERE g.grade IS NOT NULL
+    GROUP BY e.course_id
+    """,
+]
+
+
+def _add(cur, table, key, key_value, counts):
+    """Add `counts` ({column: increment}) to a summary row, creating it at
+    those values if it does not exist yet, in one atomic statement"""
+    columns = list(counts)
+    if db.dialect() == "mssql":
+        # HOLDLOCK keeps the key range locked from the match to the insert
+        cur.execute(f"""
+            MERGE INTO {table} WITH (HOLDLOCK) AS target
+            USING (SELECT ? AS {key}, {', '.join(f'? AS {c}' for c in columns)}) AS source
+            ON target.{key} = source.{key}
+            WHEN MATCHED THEN UPDATE SET {', '.join(f'{c} = target.{c} + source.{c}' for c in columns)}
+            WHEN NOT MATCHED THEN INSERT ({key}, {', '.join(columns)})
+                VALUES (source.{key}, {', '.join(f'source.{c}' for c in columns)});
+        """, (key_value, *counts.values()))
+    else:
+        cur.execute(db.q(f"""
+            INSERT INTO {table}({key}, {', '.join(columns)})
+            VALUES (?, {', '.join('?' * len(columns))})
+            ON CONFLICT ({key}) DO UPDATE
+            SET {', '.join(f'{c} = {table}.{c} + excluded.{c}' for c in columns)}
+        """), (key_value, *counts.values()))
+
+
+def on_attendance(cur, enrollment_id, status, previous=None):
+    """Count one new attendance row, or with `previous` the change of an
+    existing row from that status"""
+    present = (status == "Present") - (previous == "Present")
+    _add(cur, "mv_attendance_counts", "enrollment_id", enrollment_id,
+         {"present_count": present, "total_count": 0 if previous else 1})
+
+
+def on_grade(cur, enrollment_id, grade):
+    """Apply a grade write to its course totals.
+
+    Must run before the grade itself is written, so the previous grade
+    (if any) can be subtracted. The enrollment row stays locked until the
+    transaction ends, so concurrent writes of one enrollment's grade each
+    see the grade the previous one left.
+    """
+    if db.dialect() == "mssql":
+        sql = """
+            SELECT e.course_id, g.grade
+            FROM enrollments e WITH (UPDLOCK, HOLDLOCK)
+            LEFT JOIN grades g WITH (UPDLOCK, HOLDLOCK) ON g.enrollment_id = e.enrollment_id
+            WHERE e.enrollment_id = ?
+        """
+    else:
+        sql = """
+            SELECT e.course_id, g.grade
+            FROM enrollments e
+            LEFT JOIN grades g ON g.enrollment_id = e.enrollment_id
+            WHERE e.enrollment_id = ?
+        """
+        if db.dialect() == "postgres":
+            sql += " FOR UPDATE OF e"
+    cur.execute(db.q(sql), (enrollment_id,))
+    row = cur.fetchone()
+    if not row:
+        return
+    course_id, old = row
+    _add(cur, "mv_course_grades", "course_id", course_id,
+         {"grade_sum": float(grade) - float(old or 0), "grade_count": 0 if old is not None else 1})
+
+
+def _batches(ids, size=1000):
+    ids = sorted(set(int(i) for i in ids))
+    for start in range(0, len(ids), size):
+        batch = ids[start:start + size]
+        yield batch, ", ".join("?" * len(batch))
+
+
+@telemetry.timed("summaries.refresh")
+def refresh_enrollments(cur, enrollment_ids):
+    """Recompute the summary rows touched by a bulk write.
+
+    Attendance counts are recomputed for the given enrollments and grade
+    totals for their courses, with set-based statements per batch of ids.
+    """
+    courses = set()
+    for batch, marks in _batches(enrollment_ids):
+        cur.execute(db.q(f"DELETE FROM mv_attendance_counts WHERE enrollment_id IN ({marks})"), batch)
+        cur.execute(db.q(f"""
+            INSERT INTO mv_attendance_counts(enrollment_id, present_count, total_count)
+            SELECT enrollment_id,
+                   SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+                   COUNT(*)
+            FROM attendance
+            WHERE enrollment_id IN ({marks})
+            GROUP BY enrollment_id
+        """), batch)
+        cur.execute(db.q(f"SELECT DISTINCT course_id FROM enrollments WHERE enrollment_id IN ({marks})"),
+                    batch)
+        courses.update(r[0] for r in cur.fetchall())
+
+    for batch, marks in _batches(courses):
+        cur.execute(db.q(f"DELETE FROM mv_course_grades WHERE course_id IN ({marks})"), batch)
+        cur.execute(db.q(f"""
+            INSERT INTO mv_course_grades(course_id, grade_sum, grade_count)
+            SELECT e.course_id, SUM(g.grade), COUNT(g.grade)
+            FROM grades g
+            JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+            WHERE g.grade IS NOT NULL AND e.course_id IN ({marks})
+            GROUP BY e.course_id
+        """), batch)
+
+
+@telemetry.timed("summaries.rebuild")
+def rebuild(conn):
+    """Recompute both summary tables from scratch in one transaction"""
+    cur = conn.cursor()
+    try:
+        for stmt in REBUILD_STATEMENTS:
+            cur.execute(stmt)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain materialised summary tables")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    with db.connection() as conn:
+        rebuild(conn)
+    db.close()
+    print("✅ Summary tables rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
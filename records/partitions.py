@@ -0,0 +1,277 @@
+"""
+Term partitioning of the attendance table.
+
+The attendance table gains a row per student per session and would
+otherwise keep every term forever. Only the open terms stay in it (the hot
+partition); archive() moves each closed term out:
+
+* its rows go to a zstd-compressed Parquet file,
+  <ATTENDANCE_ARCHIVE_DIR>/attendance_<term>.parquet, in the snapshot
+  layout (records/snapshot.py), so they can be read or restored later;
+  attendance_terms.archive_file records it relative to that directory;
+* its present/late/total counts per enrollment stay in
+  attendance_term_counts, served by vw_term_attendance_summary;
+* the rows are deleted and mv_attendance_counts is recomputed for the
+  enrollments they belonged to.
+
+vw_attendance_summary, vw_at_risk_students and the attendance store then
+cover the current term only, so their cost follows its size rather than
+the whole history. An archived term is read-only: services.mark_attendance()
+and bulk ingest reject dates before hot_from(), read in their own write
+transaction (locked_hot_from()).
+
+Terms split the calendar year into 12 / ATTENDANCE_TERM_MONTHS parts
+(default 6: 2024-T1 is January-June, 2024-T2 July-December). They are
+archived oldest first and never the current one; restore() moves the most
+recently archived term back.
+
+    python -m records.partitions status
+    python -m records.partitions archive [--before 2025-01-01]
+    python -m records.partitions restore [TERM]
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+from records import cache, db, materialized, snapshot, telemetry
+
+TERM_MONTHS = int(os.getenv("ATTENDANCE_TERM_MONTHS", "6"))
+# Term files are recorded relative to this directory, so it can be moved
+ARCHIVE_DIR = os.getenv("ATTENDANCE_ARCHIVE_DIR", "archive")
+
+RANGE = "attendance_date >= ? AND attendance_date < ?"
+
+# hot_from() screens rows ahead of a load (the ETL); archive() and restore()
+# invalidate it, CACHE_TTL bounds the rest. Writes check locked_hot_from().
+_terms = cache.named("attendance_terms")
+
+
+def as_date(value):
+    """A date from a date, datetime or 'YYYY-MM-DD' string"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def term_of(day, months=TERM_MONTHS):
+    """(term_code, start, end) of the term holding `day`; end is exclusive"""
+    if 12 % months:
+        raise ValueError("ATTENDANCE_TERM_MONTHS must divide 12")
+    day = as_date(day)
+    index = (day.month - 1) // months
+    start = date(day.year, index * months + 1, 1)
+    last_month = (index + 1) * months
+    end = date(day.year + last_month // 12, last_month % 12 + 1, 1)
+    return f"{day.year}-T{index + 1}", start, end
+
+
+def _load_hot_from():
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(end_date) FROM attendance_terms")
+        value = cur.fetchone()[0]
+    return as_date(value) if value else date.min
+
+
+def hot_from():
+    """First day still in the attendance table (date.min when nothing is archived)"""
+    return _terms.get_or_load("hot_from", _load_hot_from)
+
+
+def locked_hot_from(cur):
+    """hot_from() read in the cursor's write transaction, bypassing the cache.
+
+    attendance_terms stays share-locked until that transaction ends, so no
+    term can be archived between this check and the caller's writes.
+    """
+    if db.dialect() == "mssql":
+        cur.execute("SELECT MAX(end_date) FROM attendance_terms WITH (HOLDLOCK)")
+    else:
+        if db.dialect() == "postgres":
+            cur.execute("LOCK TABLE attendance_terms IN SHARE MODE")
+        cur.execute("SELECT MAX(end_date) FROM attendance_terms")
+    value = cur.fetchone()[0]
+    return as_date(value) if value else date.min
+
+
+def check_hot(day, cur=None):
+    """Raise ValueError if `day` falls in an archived term; with `cur` the
+    boundary is read and held in its transaction (locked_hot_from)"""
+    first = hot_from() if cur is None else locked_hot_from(cur)
+    if as_date(day) < first:
+        raise ValueError(f"{day} is in an archived term; attendance before {first} is read-only.")
+
+
+def _changed():
+    _terms.invalidate("hot_from")
+    attendance_store = sys.modules.get("records.attendance_store")
+    if attendance_store:
+        attendance_store.discard()
+
+
+def archive_term(conn, term_code, start, end, out_dir=ARCHIVE_DIR):
+    """Move one closed term out of the attendance table; returns the rows moved.
+
+    The rows are exported first; the term record, its counts and the delete
+    then commit in one transaction. If attendance in the term changed in
+    between, the delete does not match the export and nothing is committed.
+    """
+    name = f"attendance_{term_code}"
+    path = os.path.join(out_dir, f"{name}.parquet")
+    params = (start.isoformat(), end.isoformat())
+    os.makedirs(out_dir, exist_ok=True)
+    with telemetry.timer("partitions.archive", term=term_code) as t:
+        exported = snapshot.export_table(conn, "attendance", out_dir, where=RANGE, params=params,
+                                         name=name)
+        cur = conn.cursor()
+        try:
+            cur.execute(db.q("""
+                INSERT INTO attendance_terms(term_code, start_date, end_date, row_count, archive_file)
+                VALUES (?, ?, ?, ?, ?)
+            """), (term_code, *params, exported, os.path.relpath(path, ARCHIVE_DIR)))
+            cur.execute(db.q(f"""
+                INSERT INTO attendance_term_counts(term_code, enrollment_id, present_count,
+                                                   late_count, total_count)
+                SELECT ?, enrollment_id,
+                       SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status = 'Late' THEN 1 ELSE 0 END),
+                       COUNT(*)
+                FROM attendance
+                WHERE {RANGE}
+                GROUP BY enrollment_id
+            """), (term_code, *params))
+            cur.execute(db.q("SELECT enrollment_id FROM attendance_term_counts WHERE term_code = ?"),
+                        (term_code,))
+            touched = [r[0] for r in cur.fetchall()]
+            cur.execute(db.q(f"DELETE FROM attendance WHERE {RANGE}"), params)
+            if cur.rowcount != exported:
+                raise RuntimeError(f"Term {term_code} changed while it was archived "
+                                   f"({exported} rows exported, {cur.rowcount} deleted); run again.")
+            materialized.refresh_enrollments(cur, touched)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        t.rows = exported
+        t.bytes = os.path.getsize(path)
+    return exported
+
+
+def archive(before=None, out_dir=ARCHIVE_DIR):
+    """Archive every term ending on or before `before` (default: the start
+    of the current term), oldest first; returns {term_code: rows moved}"""
+    current = term_of(date.today())[1]
+    before = as_date(before) if before else current
+    if before > current:
+        raise ValueError(f"The current term (from {current}) cannot be archived.")
+    moved = {}
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(end_date) FROM attendance_terms")
+        first = cur.fetchone()[0]
+        if first is None:
+            cur.execute("SELECT MIN(attendance_date) FROM attendance")
+            first = cur.fetchone()[0]
+        if first is not None:
+            term_code, start, end = term_of(first)
+            while end <= before:
+                moved[term_code] = archive_term(conn, term_code, start, end, out_dir)
+                term_code, start, end = term_of(end)
+    _changed()
+    return moved
+
+
+def restore(term_code=None):
+    """Move the most recently archived term back into the attendance table;
+    returns (term_code, rows restored)"""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT term_code, archive_file FROM attendance_terms ORDER BY end_date DESC")
+        latest = cur.fetchone()
+        if latest is None:
+            raise LookupError("No attendance term is archived.")
+        if term_code and term_code != latest[0]:
+            raise ValueError(f"Only the most recently archived term ({latest[0]}) can be restored.")
+        term_code, archive_file = latest
+        # Older rows hold an absolute path, which join() keeps as it is
+        path = os.path.join(ARCHIVE_DIR, archive_file)
+        with telemetry.timer("partitions.restore", term=term_code) as t:
+            try:
+                rows = snapshot.restore_table(conn, "attendance", os.path.dirname(path),
+                                              name=os.path.splitext(os.path.basename(path))[0],
+                                              commit=False)
+                cur.execute(db.q("SELECT enrollment_id FROM attendance_term_counts WHERE term_code = ?"),
+                            (term_code,))
+                touched = [r[0] for r in cur.fetchall()]
+                cur.execute(db.q("DELETE FROM attendance_term_counts WHERE term_code = ?"), (term_code,))
+                cur.execute(db.q("DELETE FROM attendance_terms WHERE term_code = ?"), (term_code,))
+                materialized.refresh_enrollments(cur, touched)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            t.rows = rows
+    _changed()
+    return term_code, rows
+
+
+def terms():
+    """Archived terms, oldest first: (term_code, start_date, end_date, row_count, archive_file)"""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT term_code, start_date, end_date, row_count, archive_file
+            FROM attendance_terms
+            ORDER BY start_date
+        """)
+        return cur.fetchall()
+
+
+def hot_range():
+    """(rows, first date, last date) of the attendance table"""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*), MIN(attendance_date), MAX(attendance_date) FROM attendance")
+        return cur.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed attendance terms")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="archived terms and the live table")
+    c = commands.add_parser("archive", help="archive closed terms, oldest first")
+    c.add_argument("--before", help="archive terms ending on or before this date "
+                                    "(default: the start of the current term)")
+    c.add_argument("--dir", default=ARCHIVE_DIR, help="directory for the term files")
+    c = commands.add_parser("restore", help="move the latest archived term back")
+    c.add_argument("term", nargs="?")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "archive":
+            moved = archive(args.before, args.dir)
+            for term_code, rows in moved.items():
+                print(f"  {term_code}: {rows} rows")
+            print(f"✅ {len(moved)} term(s) archived to {args.dir}" if moved
+                  else "✅ No closed term to archive.")
+        elif args.command == "restore":
+            term_code, rows = restore(args.term)
+            print(f"✅ Term {term_code} restored ({rows} rows).")
+        else:
+            for term_code, start, end, rows, path in terms():
+                print(f"  {term_code}  {start} – {end}  {rows:>10} rows  {path}")
+            rows, first, last = hot_range()
+            print(f"🔥 Live: {rows} rows" + (f", {first} – {last}" if rows else ""))
+    except (ValueError, LookupError, RuntimeError) as e:
+        print("❌", e)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Declarative data-quality rules.
+
+Each rule states one expectation about one table, in up to two forms:
+
+* a vectorised check over a pandas DataFrame chunk, run by the ETL before
+  rows are loaded (screen());
+* a set-based SQL query returning the offending rows, run against the
+  database after a load (run_sql_checks()).
+
+Rules run concurrently. Rows that fail a pre-load rule are not dropped
+silently: they are appended to a per-table reject file together with the
+names of the rules they broke. Timings and hit counts are kept per rule.
+"""
+
+import csv
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+STATUSES = ["Present", "Absent", "Late"]
+
+_email_re = re.compile(EMAIL_PATTERN)
+
+
+# ------------------ SCALAR CHECKS ------------------
+def is_valid_email(email):
+    return bool(email) and _email_re.match(email) is not None
+
+
+def is_valid_date(text):
+    try:
+        datetime.strptime(text, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+# ------------------ VECTORISED CHECKS ------------------
+# Each returns a boolean Series that is True for the *bad* rows.
+def _bad_email(df, column):
+    return ~df[column].astype("string").str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+
+
+def _bad_date(df, column, past=False):
+    """Unparseable dates, and with `past` future ones too"""
+    import pandas as pd
+    parsed = pd.to_datetime(df[column], errors="coerce", format="%Y-%m-%d")
+    if past:
+        return parsed.isna() | (parsed > pd.Timestamp.now())
+    return parsed.isna()
+
+
+def _bad_range(df, column, low, high):
+    import pandas as pd
+    values = pd.to_numeric(df[column], errors="coerce")
+    return values.isna() | (values < low) | (values > high)
+
+
+def _missing(df, column):
+    return df[column].isna() | (df[column].astype("string").str.strip() == "")
+
+
+class Rule:
+    """One expectation on one table.
+
+    `check(df, state)` flags bad rows of a source chunk; `state` is a dict
+    that lives for a whole load, for rules that look across chunks.
+    `sql` selects the offending rows in the database. A `last` rule runs
+    after the others, only on the rows that passed them, so what it keeps
+    in `state` describes rows that are loaded.
+    """
+
+    def __init__(self, name, table, check=None, sql=None, columns=(), last=False):
+        self.name = name
+        self.table = table
+        self.check = check
+        self.sql = sql
+        self.columns = columns
+        self.last = last
+
+    def applies_to(self, df):
+        return self.check is not None and all(c in df.columns for c in self.columns)
+
+
+def _duplicate(column):
+    """Flag keys repeated within the load, case-insensitively; run it as a
+    `last` rule, since every row it does not flag is remembered"""
+    def check(df, state):
+        seen = state.setdefault(f"seen_{column}", set())
+        keys = df[column].astype(str).str.lower()
+        bad = keys.duplicated() | keys.isin(seen)
+        seen.update(keys[~bad])
+        return bad
+    return check
+
+
+RULES = [
+    Rule("email_present", "students",
+         lambda df, state: _missing(df, "email"),
+         "SELECT student_id, email FROM students WHERE email IS NULL",
+         columns=["email"]),
+    Rule("email_format", "students",
+         lambda df, state: _bad_email(df, "email"),
+         "SELECT student_id, email FROM students WHERE email NOT LIKE '%_@_%._%'",
+         columns=["email"]),
+    Rule("email_unique", "students", _duplicate("email"),
+         "SELECT MIN(student_id), email FROM students GROUP BY email HAVING COUNT(*) > 1",
+         columns=["email"], last=True),
+    Rule("dob_valid", "students",
+         lambda df, state: _bad_date(df, "dob", past=True),
+         "SELECT student_id, dob FROM students WHERE dob IS NULL OR dob > CURRENT_TIMESTAMP",
+         columns=["dob"]),
+    Rule("course_code_unique", "courses", _duplicate("course_code"),
+         "SELECT MIN(course_id), course_code FROM courses GROUP BY course_code HAVING COUNT(*) > 1",
+         columns=["course_code"], last=True),
+    Rule("credits_range", "courses",
+         lambda df, state: _bad_range(df, "credits", 1, 10),
+         "SELECT course_id, credits FROM courses WHERE credits NOT BETWEEN 1 AND 10",
+         columns=["credits"]),
+    Rule("enrollment_date_valid", "enrollments",
+         lambda df, state: _bad_date(df, "enrollment_date"),
+         "SELECT enrollment_id, enrollment_date FROM enrollments WHERE enrollment_date IS NULL",
+         columns=["enrollment_date"]),
+    Rule("enrollment_student_fk", "enrollments", None,
+         """SELECT e.enrollment_id, e.student_id FROM enrollments e
+            LEFT JOIN students s ON s.student_id = e.student_id
+            WHERE s.student_id IS NULL"""),
+    Rule("enrollment_course_fk", "enrollments", None,
+         """SELECT e.enrollment_id, e.course_id FROM enrollments e
+            LEFT JOIN courses c ON c.course_id = e.course_id
+            WHERE c.course_id IS NULL"""),
+    Rule("grade_range", "grades",
+         lambda df, state: _bad_range(df, "grade", 0, 100),
+         "SELECT grade_id, grade FROM grades WHERE grade NOT BETWEEN 0 AND 100",
+         columns=["grade"]),
+    Rule("grade_enrollment_fk", "grades", None,
+         """SELECT g.grade_id, g.enrollment_id FROM grades g
+            LEFT JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+            WHERE e.enrollment_id IS NULL"""),
+    Rule("attendance_date_valid", "attendance",
+         lambda df, state: _bad_date(df, "attendance_date"),
+         "SELECT attendance_id, attendance_date FROM attendance WHERE attendance_date IS NULL",
+         columns=["attendance_date"]),
+    Rule("attendance_status", "attendance",
+         lambda df, state: ~df["status"].isin(STATUSES),
+         "SELECT attendance_id, status FROM attendance "
+         "WHERE status IS NULL OR status NOT IN ('Present', 'Absent', 'Late')",
+         columns=["status"]),
+    Rule("attendance_enrollment_fk", "attendance", None,
+         """SELECT a.attendance_id, a.enrollment_id FROM attendance a
+            LEFT JOIN enrollments e ON e.enrollment_id = a.enrollment_id
+            WHERE e.enrollment_id IS NULL"""),
+]
+
+
+# ------------------ REPORTING ------------------
+class Stats:
+    """Thread-safe per-rule counters: rows checked, rows flagged, seconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rules = {}
+
+    def add(self, name, checked, flagged, seconds):
+        with self._lock:
+            c, f, s = self.rules.get(name, (0, 0, 0.0))
+            self.rules[name] = (c + checked, f + flagged, s + seconds)
+
+    def report(self):
+        print(f"\n{'rule':<28}{'checked':>10}{'flagged':>10}{'ms':>10}")
+        for name, (checked, flagged, seconds) in self.rules.items():
+            mark = "✅" if not flagged else "⚠️ "
+            print(f"{mark} {name:<25}{checked:>10}{flagged:>10}{seconds * 1000:>10.1f}")
+
+
+class Quarantine:
+    """Appends rejected rows to <reject_dir>/<table>_rejects.csv"""
+
+    def __init__(self, reject_dir):
+        self.reject_dir = reject_dir
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, table, rows, reason=None):
+        """Write rejected rows; `reason` fills a missing `_rules` column"""
+        if rows.empty:
+            return
+        if "_rules" not in rows.columns:
+            rows = rows.assign(_rules=reason)
+        os.makedirs(self.reject_dir, exist_ok=True)
+        path = os.path.join(self.reject_dir, f"{table}_rejects.csv")
+        with self._lock:
+            rows.to_csv(path, mode="a", index=False, header=not os.path.exists(path),
+                        quoting=csv.QUOTE_MINIMAL)
+            self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+
+# ------------------ ENGINE ------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    from concurrent.futures import ThreadPoolExecutor  # pulls in logging; only the ETL needs it
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quality")
+    return _executor
+
+
+def _timed_check(rule, df, state, stats):
+    start = time.perf_counter()
+    bad = rule.check(df, state)
+    stats.add(rule.name, len(df), int(bad.sum()), time.perf_counter() - start)
+    return bad
+
+
+def screen(df, table, state, stats, quarantine=None):
+    """Run every pre-load rule for `table` over a chunk.
+
+    Returns the rows that passed; the rest go to the quarantine file with
+    the names of the rules they failed. Rules sharing `state` (duplicate
+    checks) must see chunks in order, so call screen() once per chunk.
+    """
+    rules = [r for r in RULES if r.table == table and r.applies_to(df)]
+    if not rules or df.empty:
+        return df
+    futures = [(r, _pool().submit(_timed_check, r, df, state, stats))
+               for r in rules if not r.last]
+    masks = {r.name: f.result() for r, f in futures}
+
+    import pandas as pd
+    flags = pd.DataFrame(masks, index=df.index)
+    for rule in (r for r in rules if r.last):
+        passed = ~flags.any(axis=1)
+        flags[rule.name] = False
+        flags.loc[passed, rule.name] = _timed_check(rule, df[passed], state, stats)
+    bad = flags.any(axis=1)
+    if bad.any() and quarantine is not None:
+        reasons = flags[bad].apply(lambda row: ";".join(row.index[row]), axis=1)
+        quarantine.add(table, df[bad].assign(_rules=reasons))
+    return df[~bad]
+
+
+def _run_sql(pool, rule, sample):
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(rule.sql)
+        rows = cur.fetchall()
+    return rule, len(rows), rows[:sample], time.perf_counter() - start
+
+
+def run_sql_checks(pool, tables=None, workers=4, sample=5):
+    """Run the post-load SQL rules concurrently, one pooled connection each.
+
+    Returns [(rule, bad_rows, sample_rows, seconds)] in rule order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    rules = [r for r in RULES if r.sql and (tables is None or r.table in tables)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_sql, pool, r, sample) for r in rules]
+        return [f.result() for f in futures]
@@ -0,0 +1,335 @@
+"""
+In-process search over student names and emails and course codes.
+
+The CLI prompts and the API take numeric student and enrollment ids;
+operators know names, emails and course codes. The index loads the
+students, courses and enrollments tables once and answers from memory:
+
+* every student's name words, whole names and email (and the words
+  before the @), case- and accent-folded, sit in one sorted token list,
+  so a prefix lookup is a bisect plus a short scan;
+* the distinct words also feed a trigram map, built on first use, for a
+  query term no token starts with: it finds substrings and most single
+  typos;
+* enrollments are a dict per student, so resolving (student, course) to
+  an enrollment_id is two dict lookups.
+
+A query's terms must all match; a term scores 3 for an exact token, 2 for
+a prefix and up to 1 for a trigram match, and a number 4 more for the
+student with that id, so "smith 12" finds student 12 only if they are a
+Smith. Results are ranked by score, then name.
+
+shared() loads the index once per process and reloads it after
+SEARCH_INDEX_TTL seconds (default 300), which bounds how stale it gets
+when another process (the ETL, a second API worker) adds students.
+services.add_student() and enroll_student() apply their writes in place;
+an ETL run through etl/etl_orchestrator.py discard()s the index.
+
+    python -m records.search "ada love" [--courses] [--limit 10]
+"""
+
+import argparse
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from records import db, telemetry
+
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+FETCH_SIZE = 50000
+# A trigram match needs this share of the query term's trigrams
+MIN_GRAM_SHARE = 0.6
+
+EXACT, PREFIX, ID_MATCH = 3.0, 2.0, 4.0
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalise(text):
+    """Case- and accent-folded text"""
+    text = str(text or "")
+    if text.isascii():
+        return text.lower().strip()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def tokens(*fields):
+    """Every field whole and its words, normalised. Only the part of an
+    email before the @ is split into words, so the domain every student
+    shares does not turn up in prefix scans."""
+    found = set()
+    for field in fields:
+        field = normalise(field)
+        if field:
+            found.add(field)
+            found.update(_WORD.findall(field.split("@")[0]))
+    return found
+
+
+def _grams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class TokenIndex:
+    """Normalised tokens -> ids: prefix lookups by bisect over a sorted
+    (token, id) list, and trigram lookups over the distinct words"""
+
+    def __init__(self, entries=()):
+        self._pairs = sorted({(token, item) for item, item_tokens in entries
+                              for token in item_tokens})
+        # trigram -> words; built on the first lookup that needs it, as most never do
+        self._grams = None
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def _add_word(self, word):
+        if _WORD.fullmatch(word):
+            for gram in _grams(word):
+                self._grams[gram].add(word)
+
+    def _gram_map(self):
+        if self._grams is None:
+            self._grams = defaultdict(set)
+            for word in {token for token, _ in self._pairs}:
+                self._add_word(word)
+        return self._grams
+
+    def add(self, item, item_tokens):
+        for token in item_tokens:
+            pair = (token, item)
+            i = bisect.bisect_left(self._pairs, pair)
+            if i == len(self._pairs) or self._pairs[i] != pair:
+                self._pairs.insert(i, pair)
+                if self._grams is not None:
+                    self._add_word(token)
+
+    def _ids(self, token):
+        i = bisect.bisect_left(self._pairs, (token,))
+        while i < len(self._pairs) and self._pairs[i][0] == token:
+            yield self._pairs[i][1]
+            i += 1
+
+    def match(self, term):
+        """{id: score} of the items with a token equal to, starting with or
+        (failing both) sharing most trigrams with `term`. A one-character
+        term (an initial) only matches exactly, and a number never by
+        trigrams, so neither scans a large share of the index."""
+        scores = {}
+        if len(term) == 1:
+            return {item: EXACT for item in self._ids(term)}
+        i = bisect.bisect_left(self._pairs, (term,))
+        while i < len(self._pairs) and self._pairs[i][0].startswith(term):
+            token, item = self._pairs[i]
+            score = EXACT if token == term else PREFIX
+            if score > scores.get(item, 0):
+                scores[item] = score
+            i += 1
+        if scores or len(term) < 3 or term.isdigit():
+            return scores
+
+        term_grams, gram_map = _grams(term), self._gram_map()
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for word in gram_map.get(gram, ()):
+                shared[word] += 1
+        for word, count in shared.items():
+            share = count / len(term_grams)
+            if share >= MIN_GRAM_SHARE:
+                for item in self._ids(word):
+                    if share > scores.get(item, 0):
+                        scores[item] = share
+        return scores
+
+    def search(self, query, match=None):
+        """{id: total score} of the items matching every term of `query`;
+        `match` replaces match() for scoring one term"""
+        totals = None
+        for term in normalise(query).split():
+            scores = (match or self.match)(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {item: total + scores[item] for item, total in totals.items()
+                          if item in scores}
+            if not totals:
+                return {}
+        return totals or {}
+
+
+def _fetch(cur, sql):
+    cur.execute(sql)
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+class SearchIndex:
+    """Students, courses and enrollments indexed for lookup by name, email or code"""
+
+    def __init__(self, students=(), courses=(), enrollments=()):
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        # student_id -> (first_name, last_name, email)
+        self.students = {int(r[0]): (r[1], r[2], r[3]) for r in students}
+        # course_id -> (course_code, course_name)
+        self.courses = {int(r[0]): (r[1], r[2]) for r in courses}
+        # student_id -> {course_id: enrollment_id}
+        self.enrollments = defaultdict(dict)
+        for enrollment_id, student_id, course_id in enrollments:
+            self.enrollments[int(student_id)][int(course_id)] = int(enrollment_id)
+        self._codes = {normalise(code): course_id for course_id, (code, _) in self.courses.items()}
+        self.student_tokens = TokenIndex(
+            (student_id, tokens(*s)) for student_id, s in self.students.items())
+        self.course_tokens = TokenIndex(
+            (course_id, tokens(*c)) for course_id, c in self.courses.items())
+
+    @classmethod
+    def load(cls, conn):
+        with telemetry.timer("search.load") as t:
+            cur = conn.cursor()
+            index = cls(
+                list(_fetch(cur, "SELECT student_id, first_name, last_name, email FROM students")),
+                list(_fetch(cur, "SELECT course_id, course_code, course_name FROM courses")),
+                _fetch(cur, "SELECT enrollment_id, student_id, course_id FROM enrollments"),
+            )
+            t.rows = len(index.students)
+        return index
+
+    # ---- writes ----
+    def add_student(self, student_id, first_name, last_name, email):
+        with self._lock:
+            self.students[student_id] = (first_name, last_name, email)
+            self.student_tokens.add(student_id, tokens(first_name, last_name, email))
+
+    def add_enrollment(self, enrollment_id, student_id, course_id):
+        with self._lock:
+            self.enrollments[student_id][course_id] = enrollment_id
+
+    # ---- reads ----
+    # Reads take the same lock as the writes above: a lookup is a few
+    # microseconds, and the sorted token list and the dicts are never seen
+    # half-updated.
+    def _match_student(self, term):
+        """One term's scores, with ID_MATCH added for the student whose id it is"""
+        scores = self.student_tokens.match(term)
+        if term.isdecimal() and int(term) in self.students:
+            scores[int(term)] = scores.get(int(term), 0) + ID_MATCH
+        return scores
+
+    def find_students(self, query, limit=10):
+        """Best-matching students as dicts, highest score first"""
+        with self._lock:
+            scores = self.student_tokens.search(query, self._match_student)
+            ranked = sorted(scores, key=lambda i: (-scores[i], self.students[i][1].casefold(),
+                                                   self.students[i][0].casefold(), i))
+            return [{"student_id": i, "first_name": self.students[i][0],
+                     "last_name": self.students[i][1], "email": self.students[i][2],
+                     "score": round(scores[i], 2)} for i in ranked[:limit]]
+
+    def find_courses(self, query, limit=10):
+        """Best-matching courses as dicts, highest score first"""
+        with self._lock:
+            scores = self.course_tokens.search(query)
+        ranked = sorted(scores, key=lambda i: (-scores[i], self.courses[i][0], i))
+        return [{"course_id": i, "course_code": self.courses[i][0],
+                 "course_name": self.courses[i][1], "score": round(scores[i], 2)}
+                for i in ranked[:limit]]
+
+    def course_id(self, course):
+        """The id of a course given by id or course code"""
+        if str(course).strip().isdigit() and int(course) in self.courses:
+            return int(course)
+        course_id = self._codes.get(normalise(course))
+        if course_id is None:
+            raise LookupError(f"Course {course} not found")
+        return course_id
+
+    def enrollments_of(self, student_id):
+        """A student's enrollments with their course code and name, by course code"""
+        with self._lock:
+            enrolled = list(self.enrollments.get(student_id, {}).items())
+        found = [{"enrollment_id": enrollment_id, "course_id": course_id,
+                  "course_code": self.courses.get(course_id, ("", ""))[0],
+                  "course_name": self.courses.get(course_id, ("", ""))[1]}
+                 for course_id, enrollment_id in enrolled]
+        return sorted(found, key=lambda e: (e["course_code"], e["course_id"]))
+
+    def enrollment_id(self, student_id, course):
+        """The enrollment of a student (id) in a course (id or code)"""
+        course_id = self.course_id(course)
+        with self._lock:
+            enrollment_id = self.enrollments.get(int(student_id), {}).get(course_id)
+        if enrollment_id is None:
+            raise LookupError(f"Student {student_id} is not enrolled in {course}")
+        return enrollment_id
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """The process-wide index, loaded on first use and after SEARCH_INDEX_TTL seconds"""
+    global _shared
+    with _shared_lock:
+        if _shared is None or time.monotonic() - _shared.loaded_at >= SEARCH_INDEX_TTL:
+            with db.connection() as conn:
+                _shared = SearchIndex.load(conn)
+        return _shared
+
+
+def record_student(student_id, first_name, last_name, email):
+    """Add a committed student to the shared index, if it is loaded"""
+    index = _shared
+    if index is not None:
+        index.add_student(student_id, first_name, last_name, email)
+
+
+def record_enrollment(enrollment_id, student_id, course_id):
+    """Add a committed enrollment to the shared index, if it is loaded"""
+    index = _shared
+    if index is not None:
+        index.add_enrollment(enrollment_id, student_id, course_id)
+
+
+def discard():
+    """Forget the shared index; the next shared() reloads it"""
+    global _shared
+    _shared = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search students by name or email, or courses")
+    parser.add_argument("query", nargs="+")
+    parser.add_argument("--courses", action="store_true", help="search courses instead")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = shared()
+    loaded = time.perf_counter() - start
+    db.close()
+
+    query = " ".join(args.query)
+    start = time.perf_counter()
+    found = (index.find_courses if args.courses else index.find_students)(query, args.limit)
+    took = time.perf_counter() - start
+    print(f"✅ {len(index.students)} students and {len(index.courses)} courses indexed in "
+          f"{loaded:.2f}s; {len(found)} match(es) in {took * 1e6:.0f} µs")
+    for row in found:
+        if args.courses:
+            print(f"{row['course_id']:>8}  {row['course_code']:<10} {row['course_name']}")
+        else:
+            print(f"{row['student_id']:>8}  {row['first_name']} {row['last_name']} <{row['email']}>")
+
+
+if __name__ == "__main__":
+    main()
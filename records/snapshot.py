@@ -0,0 +1,258 @@
+"""
+Columnar snapshots of the five core tables and the archived attendance
+term summaries.
+
+export() streams each table out of the database in fetchmany batches into
+a zstd-compressed Parquet file; restore() bulk-loads the files back with
+executemany. Reporting code can read a snapshot without touching the
+database: open_table() memory-maps an uncompressed Arrow copy of the
+table, created next to the Parquet file on first use.
+
+    python -m records.snapshot export snapshots/2024-09-30
+    python -m records.snapshot restore snapshots/2024-09-30
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+from records import db, materialized, telemetry
+
+# FK order: parents before children
+TABLES = ["students", "courses", "enrollments", "grades", "attendance",
+          "attendance_terms", "attendance_term_counts"]
+# Tables whose first column is an IDENTITY / SERIAL id
+IDENTITY_TABLES = {"students", "courses", "enrollments", "grades", "attendance"}
+
+BATCH_SIZE = 50000
+
+
+def schemas():
+    """Column layout of each table; pyarrow is imported only when needed"""
+    import pyarrow as pa
+
+    return {
+        "students": pa.schema([
+            ("student_id", pa.int64()),
+            ("first_name", pa.string()),
+            ("last_name", pa.string()),
+            ("email", pa.string()),
+            ("dob", pa.date32()),
+            ("gpa", pa.float64()),
+            ("created_at", pa.timestamp("ms")),
+        ]),
+        "courses": pa.schema([
+            ("course_id", pa.int64()),
+            ("course_name", pa.string()),
+            ("course_code", pa.string()),
+            ("credits", pa.int32()),
+        ]),
+        "enrollments": pa.schema([
+            ("enrollment_id", pa.int64()),
+            ("student_id", pa.int64()),
+            ("course_id", pa.int64()),
+            ("enrollment_date", pa.date32()),
+        ]),
+        "grades": pa.schema([
+            ("grade_id", pa.int64()),
+            ("enrollment_id", pa.int64()),
+            ("grade", pa.float64()),
+        ]),
+        "attendance": pa.schema([
+            ("attendance_id", pa.int64()),
+            ("enrollment_id", pa.int64()),
+            ("attendance_date", pa.date32()),
+            ("status", pa.string()),
+        ]),
+        "attendance_terms": pa.schema([
+            ("term_code", pa.string()),
+            ("start_date", pa.date32()),
+            ("end_date", pa.date32()),
+            ("row_count", pa.int64()),
+            ("archive_file", pa.string()),
+            ("archived_at", pa.timestamp("ms")),
+        ]),
+        "attendance_term_counts": pa.schema([
+            ("term_code", pa.string()),
+            ("enrollment_id", pa.int64()),
+            ("present_count", pa.int32()),
+            ("late_count", pa.int32()),
+            ("total_count", pa.int32()),
+        ]),
+    }
+
+
+def _column(values, field):
+    import pyarrow as pa
+    from decimal import Decimal
+
+    if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+        # sqlite3 hands dates back as ISO strings
+        parse = datetime.fromisoformat
+        values = [parse(v) if isinstance(v, str) else v for v in values]
+        if pa.types.is_date(field.type):
+            values = [v.date() if isinstance(v, datetime) else v for v in values]
+    elif pa.types.is_floating(field.type):
+        values = [float(v) if isinstance(v, Decimal) else v for v in values]
+    return pa.array(values, type=field.type)
+
+
+def export_table(conn, table, out_dir, batch_size=BATCH_SIZE, where=None, params=(), name=None):
+    """Stream one table into <out_dir>/<name or table>.parquet; returns the row count.
+
+    `where` (with '?' placeholders bound to `params`) exports only part of
+    the table, as records/partitions.py does for one attendance term.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = schemas()[table]
+    cur = conn.cursor()
+    sql = f"SELECT {', '.join(schema.names)} FROM {table}"
+    if where:
+        cur.execute(db.q(f"{sql} WHERE {where}"), params)
+    else:
+        cur.execute(sql)
+    rows_written = 0
+    with pq.ParquetWriter(os.path.join(out_dir, f"{name or table}.parquet"), schema,
+                          compression="zstd") as writer:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [_column(col, field) for col, field in zip(columns, schema)], schema=schema,
+            ))
+            rows_written += len(rows)
+    return rows_written
+
+
+def export(out_dir, tables=TABLES, batch_size=BATCH_SIZE):
+    """Snapshot the given tables and write a manifest with row counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    with db.connection() as conn:
+        for table in tables:
+            with telemetry.timer("snapshot.export", table=table) as t:
+                counts[table] = export_table(conn, table, out_dir, batch_size)
+                t.rows = counts[table]
+                t.bytes = os.path.getsize(os.path.join(out_dir, f"{table}.parquet"))
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"),
+                   "rows": counts}, f, indent=2)
+    return counts
+
+
+def _insert_batches(conn, cur, sql, source, batch_size, commit):
+    restored = 0
+    for batch in source.iter_batches(batch_size=batch_size):
+        rows = list(zip(*(col.to_pylist() for col in batch.columns)))
+        cur.executemany(sql, rows)
+        if commit:
+            conn.commit()
+        restored += len(rows)
+    return restored
+
+
+def restore_table(conn, table, snapshot_dir, batch_size=BATCH_SIZE, name=None, commit=True):
+    """Bulk-insert one table from its Parquet file, keeping the original ids
+    (on Postgres the table's id sequence is then moved past them).
+
+    With commit=False nothing is committed, so the caller can make the
+    restore part of a larger transaction.
+    """
+    import pyarrow.parquet as pq
+
+    source = pq.ParquetFile(os.path.join(snapshot_dir, f"{name or table}.parquet"))
+    names = source.schema_arrow.names
+    sql = db.q(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})")
+    cur = conn.cursor()
+    if hasattr(cur, "fast_executemany"):
+        cur.fast_executemany = True
+    identity = table in IDENTITY_TABLES
+    if identity and db.dialect() == "mssql":
+        # IDENTITY_INSERT outlives the restore on this session, so it is
+        # switched off again even when an insert fails
+        cur.execute(f"SET IDENTITY_INSERT {table} ON;")
+        try:
+            restored = _insert_batches(conn, cur, sql, source, batch_size, commit)
+        finally:
+            cur.execute(f"SET IDENTITY_INSERT {table} OFF;")
+        if commit:
+            conn.commit()
+        return restored
+    restored = _insert_batches(conn, cur, sql, source, batch_size, commit)
+    if identity and db.dialect() == "postgres":
+        # Explicit ids leave the SERIAL sequence behind; move it past them
+        key = names[0]
+        cur.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', '{key}'),
+                          COALESCE(MAX({key}), 1), MAX({key}) IS NOT NULL)
+            FROM {table}
+        """)
+        if commit:
+            conn.commit()
+    return restored
+
+
+def restore(snapshot_dir, tables=TABLES, batch_size=BATCH_SIZE):
+    """Load a snapshot into empty tables, parents first; tables an older
+    snapshot's manifest does not list are skipped"""
+    manifest = os.path.join(snapshot_dir, "manifest.json")
+    present = TABLES
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            present = json.load(f)["rows"]
+    counts = {}
+    with db.connection() as conn:
+        for table in [t for t in TABLES if t in tables and t in present]:
+            with telemetry.timer("snapshot.restore", table=table) as t:
+                counts[table] = restore_table(conn, table, snapshot_dir, batch_size)
+                t.rows = counts[table]
+        if {"grades", "attendance"} & set(counts):
+            materialized.rebuild(conn)
+    return counts
+
+
+def open_table(snapshot_dir, table):
+    """A snapshot table as a memory-mapped pyarrow Table.
+
+    The Parquet file is decompressed once into <table>.arrow (Arrow IPC);
+    later calls map that file, so reading costs no parsing and pages are
+    loaded by the OS only as columns are touched.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_path = os.path.join(snapshot_dir, f"{table}.arrow")
+    parquet_path = os.path.join(snapshot_dir, f"{table}.parquet")
+    if not os.path.exists(arrow_path) or os.path.getmtime(arrow_path) < os.path.getmtime(parquet_path):
+        source = pq.ParquetFile(parquet_path)
+        tmp = f"{arrow_path}.tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, source.schema_arrow) as writer:
+            for batch in source.iter_batches():
+                writer.write_batch(batch)
+        os.replace(tmp, arrow_path)
+    return pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore columnar table snapshots")
+    parser.add_argument("command", choices=["export", "restore"])
+    parser.add_argument("directory")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    run = export if args.command == "export" else restore
+    counts = run(args.directory, args.tables, args.batch_size)
+    db.close()
+    for table, rows in counts.items():
+        print(f"  {table}: {rows} rows")
+    print(f"✅ Snapshot {args.command} complete: {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+Latency and volume telemetry for the hot paths.
+
+Disabled by default. When enabled, every execute/executemany/fetch and
+commit on a pooled connection is timed, and the report, transcript, ETL,
+analytics and snapshot stages record their duration, rows and bytes
+written. Each metric keeps a latency histogram (Prometheus-style
+cumulative buckets) plus row and byte totals, per name and labels.
+
+    TELEMETRY          1 to enable at import time (default off)
+    TELEMETRY_SLOW_MS  log statements slower than this many ms (default: off)
+    TELEMETRY_LOG      JSON-lines file for stage events and slow statements
+                       (default: stderr when a slow-query threshold is set)
+    TELEMETRY_EXPORT   metrics file written at exit: .json, or .prom for the
+                       Prometheus text format
+
+Metrics are per process; workers of a process pool keep their own. When
+disabled, timer() hands back a shared no-op and pooled connections are not
+wrapped, so instrumented code pays one flag check.
+"""
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Upper bounds of the latency buckets, in seconds
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKET_LABELS = [f"{b:g}" for b in BUCKETS] + ["+Inf"]
+
+enabled = os.getenv("TELEMETRY", "0").lower() in ("1", "true", "yes", "on")
+slow_seconds = (float(os.environ["TELEMETRY_SLOW_MS"]) / 1000
+                if os.getenv("TELEMETRY_SLOW_MS") else None)
+log_path = os.getenv("TELEMETRY_LOG")
+export_path = os.getenv("TELEMETRY_EXPORT")
+
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_metrics = {}  # (name, labels) -> Metric
+
+
+class Metric:
+    """Latency histogram plus row and byte totals for one name + label set"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # the last one is +Inf
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, seconds, rows=None, nbytes=None):
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        if rows:
+            self.rows += rows
+        if nbytes:
+            self.bytes += nbytes
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (at most the max)"""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "buckets": {le: n for le, n in zip(BUCKET_LABELS, self.buckets) if n},
+        }
+
+
+# ------------------ RECORDING ------------------
+def observe(name, seconds, rows=None, nbytes=None, **labels):
+    """Record one timed operation"""
+    _record((name, tuple(sorted(labels.items()))), seconds, rows, nbytes)
+
+
+def _record(key, seconds, rows=None, nbytes=None):
+    with _lock:
+        metric = _metrics.get(key)
+        if metric is None:
+            metric = _metrics[key] = Metric()
+        metric.add(seconds, rows, nbytes)
+
+
+def log_event(event, **fields):
+    """Append one JSON line to the telemetry log"""
+    line = json.dumps({"ts": datetime.now().isoformat(timespec="milliseconds"),
+                       "event": event, **fields}, default=str)
+    with _log_lock:
+        if log_path:
+            with open(log_path, "a") as f:
+                f.write(line + "\n")
+        else:
+            print(line, file=sys.stderr)
+
+
+class Span:
+    """A running timer; set .rows / .bytes before the block ends"""
+
+    __slots__ = ("name", "labels", "rows", "bytes", "_start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.rows = None
+        self.bytes = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        labels = dict(self.labels, error=exc_type.__name__) if exc_type else self.labels
+        # Labels stay one dict so a label called "name" or "rows" cannot
+        # collide with the keyword arguments
+        _record((self.name, tuple(sorted(labels.items()))), seconds, self.rows, self.bytes)
+        if log_path:
+            log_event("stage", name=self.name, ms=round(seconds * 1000, 3),
+                      rows=self.rows, bytes=self.bytes, labels=labels)
+        return False
+
+
+class _NullSpan:
+    """What timer() returns while telemetry is off: accepts and ignores everything"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+def timer(name, **labels):
+    """Context manager timing a stage:
+
+        with telemetry.timer("report.write", format="csv") as t:
+            ...
+            t.rows, t.bytes = written, os.path.getsize(path)
+    """
+    return Span(name, labels) if enabled else _NULL
+
+
+def timed(name, **labels):
+    """Decorator timing each call; an int return value is recorded as rows"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            with Span(name, labels) as span:
+                result = fn(*args, **kwargs)
+                if isinstance(result, int) and not isinstance(result, bool):
+                    span.rows = result
+                return result
+        return wrapper
+    return decorator
+
+
+# ------------------ DB-API WRAPPERS ------------------
+_space_re = re.compile(r"\s+")
+
+
+_statement_keys = {}  # (metric, sql) -> metric key labelled with the statement kind
+
+
+def _statement_key(name, sql):
+    """Metric key for a statement, labelled with its leading keyword
+    (select, insert, update, merge, ...); cached per distinct SQL text"""
+    key = _statement_keys.get((name, sql))
+    if key is None:
+        words = sql.lstrip().split(None, 1)
+        kind = words[0].lower() if words else "other"
+        key = (name, (("statement", kind),))
+        if len(_statement_keys) < 10000:
+            _statement_keys[(name, sql)] = key
+    return key
+
+
+def _slow(seconds, sql, rows):
+    log_event("slow_query", ms=round(seconds * 1000, 3), rows=rows,
+              sql=_space_re.sub(" ", sql).strip()[:1000])
+
+
+_FETCH_KEY = ("db.fetch", ())
+_COMMIT_KEY = ("db.commit", ())
+
+
+class Cursor:
+    """Times execute/executemany/fetch* of a DB-API cursor"""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def _run(self, method, sql, args, name):
+        start = time.perf_counter()
+        try:
+            getattr(self._cursor, method)(sql, *args)
+        finally:
+            seconds = time.perf_counter() - start
+            rowcount = getattr(self._cursor, "rowcount", -1)
+            rows = rowcount if isinstance(rowcount, int) and rowcount > 0 else None
+            _record(_statement_key(name, sql), seconds, rows)
+            if slow_seconds is not None and seconds >= slow_seconds:
+                _slow(seconds, sql, rows)
+        return self
+
+    def execute(self, sql, *args):
+        return self._run("execute", sql, args, "db.execute")
+
+    def executemany(self, sql, *args):
+        return self._run("executemany", sql, args, "db.executemany")
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        rows = (0 if result is None else 1) if method == "fetchone" else len(result)
+        _record(_FETCH_KEY, time.perf_counter() - start, rows)
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class Connection:
+    """Hands out timed cursors and times commits of a DB-API connection"""
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def cursor(self, *args, **kwargs):
+        return Cursor(self._conn.cursor(*args, **kwargs))
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            _record(_COMMIT_KEY, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+def instrument(conn):
+    """The connection, wrapped for timing when telemetry is on"""
+    return Connection(conn) if enabled else conn
+
+
+def unwrap(conn):
+    """The raw connection behind instrument()"""
+    return conn._conn if type(conn) is Connection else conn
+
+
+# ------------------ CONTROL & EXPORT ------------------
+def enable(slow_ms=None, log=None, export=None):
+    """Turn telemetry on; optionally set the slow-query threshold, the
+    JSON-lines log file and the metrics file written at exit"""
+    global enabled, slow_seconds, log_path, export_path
+    enabled = True
+    if slow_ms is not None:
+        slow_seconds = slow_ms / 1000
+    if log is not None:
+        log_path = log
+    if export is not None:
+        export_path = export
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
+
+
+def snapshot():
+    """{name: [{"labels": {...}, count, p50_ms, ...}]} of everything recorded"""
+    with _lock:
+        items = sorted(_metrics.items())
+        result = {}
+        for (name, labels), metric in items:
+            result.setdefault(name, []).append({"labels": dict(labels), **metric.as_dict()})
+    return result
+
+
+def _prom_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prom_value(value):
+    """A label value escaped as the exposition format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{_prom_name(k)}="{_prom_value(v)}"' for k, v in pairs) + "}"
+
+
+def to_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        items = sorted(_metrics.items())
+    names = sorted({name for (name, _), _ in items})
+    for name in names:
+        base = _prom_name(name)
+        series = [(labels, metric) for (metric_name, labels), metric in items if metric_name == name]
+        lines.append(f"# TYPE {base}_seconds histogram")
+        for labels, metric in series:
+            cumulative = 0
+            for le, n in zip(BUCKET_LABELS, metric.buckets):
+                cumulative += n
+                lines.append(f"{base}_seconds_bucket{_prom_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{base}_seconds_sum{_prom_labels(labels)} {metric.sum:.6f}")
+            lines.append(f"{base}_seconds_count{_prom_labels(labels)} {metric.count}")
+        # Each counter is its own family, after the histogram's samples
+        for counter in ("rows", "bytes"):
+            samples = [(labels, getattr(metric, counter)) for labels, metric in series
+                       if getattr(metric, counter)]
+            if samples:
+                lines.append(f"# TYPE {base}_{counter}_total counter")
+                lines += [f"{base}_{counter}_total{_prom_labels(labels)} {value}"
+                          for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Write the metrics to path: Prometheus text for .prom/.txt, else JSON"""
+    if path.endswith((".prom", ".txt")):
+        text = to_prometheus()
+    else:
+        text = json.dumps({"created_at": datetime.now().isoformat(timespec="seconds"),
+                           "pid": os.getpid(), "metrics": snapshot()}, indent=2)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def report(file=None):
+    """Print one line per metric: count, p50/p99/max latency, rows, bytes"""
+    file = file or sys.stdout
+    print(f"{'metric':<40}{'count':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'rows':>11}{'bytes':>13}",
+          file=file)
+    for name, series in snapshot().items():
+        for m in series:
+            label = name + (_prom_labels(tuple(m["labels"].items())) if m["labels"] else "")
+            print(f"{label:<40}{m['count']:>8}{m['p50_ms']:>9g}{m['p99_ms']:>9g}"
+                  f"{m['max_ms']:>9.1f}{m['rows']:>11}{m['bytes']:>13}", file=file)
+
+
+@atexit.register
+def _export_at_exit():
+    if enabled and export_path and _metrics:
+        write(export_path)
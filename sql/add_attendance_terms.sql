@@ -0,0 +1,21 @@
+-- sql/add_attendance_terms.sql
+-- Adds the archived-term tables written by records/partitions.py to
+-- databases created before they were part of create_tables.sql. Run it
+-- before view.sql, whose vw_term_attendance_summary reads them.
+CREATE TABLE attendance_terms (
+    term_code VARCHAR(10) PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    row_count INT NOT NULL,
+    archive_file VARCHAR(260) NOT NULL,
+    archived_at DATETIME DEFAULT GETDATE()
+);
+
+CREATE TABLE attendance_term_counts (
+    term_code VARCHAR(10) NOT NULL REFERENCES attendance_terms(term_code),
+    enrollment_id INT NOT NULL REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    late_count INT NOT NULL,
+    total_count INT NOT NULL,
+    PRIMARY KEY (term_code, enrollment_id)
+);
@@ -0,0 +1,17 @@
+-- sql/add_attendance_unique_day.sql
+-- Limits attendance to one row per enrollment and day on databases created
+-- before create_tables.sql declared it. Where a day was marked more than
+-- once, the latest mark is kept. Afterwards rebuild the summary tables,
+-- whose counts included the removed rows:
+--
+--     python -m records.materialized rebuild
+DELETE a FROM attendance a
+WHERE EXISTS (
+    SELECT 1 FROM attendance later
+    WHERE later.enrollment_id = a.enrollment_id
+      AND later.attendance_date = a.attendance_date
+      AND later.attendance_id > a.attendance_id
+);
+
+DROP INDEX idx_attendance_enrollment_date ON attendance;
+CREATE UNIQUE INDEX idx_attendance_enrollment_date ON attendance(enrollment_id, attendance_date) INCLUDE (status);
@@ -0,0 +1,7 @@
+-- sql/add_key_indexes_postgres.sql
+-- PostgreSQL only. Emails and course codes are matched case-insensitively
+-- (app/bulk_ingest.py compares LOWER(email) and UPPER(course_code)); these
+-- expression indexes let those lookups seek instead of scanning. SQL Server
+-- and SQLite need nothing: their key columns already compare without case.
+CREATE INDEX idx_students_email_lower ON students (LOWER(email));
+CREATE INDEX idx_courses_code_upper ON courses (UPPER(course_code));
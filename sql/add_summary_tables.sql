@@ -0,0 +1,32 @@
+-- sql/add_summary_tables.sql
+-- Adds the summary tables maintained by records/materialized.py to
+-- databases created before they were part of create_tables.sql, and fills
+-- them from the current grades and attendance. Run it before view.sql,
+-- whose attendance and course views read these tables.
+CREATE TABLE mv_attendance_counts (
+    enrollment_id INT PRIMARY KEY REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    total_count INT NOT NULL
+);
+
+CREATE INDEX idx_mv_attendance_total ON mv_attendance_counts(total_count) INCLUDE (present_count);
+
+CREATE TABLE mv_course_grades (
+    course_id INT PRIMARY KEY REFERENCES courses(course_id),
+    grade_sum NUMERIC(18,2) NOT NULL,
+    grade_count INT NOT NULL
+);
+
+INSERT INTO mv_attendance_counts(enrollment_id, present_count, total_count)
+SELECT enrollment_id,
+       SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+       COUNT(*)
+FROM attendance
+GROUP BY enrollment_id;
+
+INSERT INTO mv_course_grades(course_id, grade_sum, grade_count)
+SELECT e.course_id, SUM(g.grade), COUNT(g.grade)
+FROM grades g
+JOIN enrollments e ON e.enrollment_id = g.enrollment_id
+WHERE g.grade IS NOT NULL
+GROUP BY e.course_id;
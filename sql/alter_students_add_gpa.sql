@@ -0,0 +1,4 @@
+-- sql/alter_students_add_gpa.sql
+-- Adds the GPA column filled by app/analytics.py to databases created
+-- before it was part of create_tables.sql.
+ALTER TABLE students ADD gpa NUMERIC(3,2) NULL;
@@ -6,6 +6,7 @@ CREATE TABLE students (
     last_name VARCHAR(100) NOT NULL,
     email VARCHAR(120) UNIQUE NOT NULL,
     dob DATE NOT NULL,
+    gpa NUMERIC(3,2) NULL,
     created_at DATETIME DEFAULT GETDATE(),
     CHECK (email LIKE '%@%')
 );
@@ -38,5 +39,49 @@ CREATE TABLE attendance (
     status VARCHAR(10) CHECK (status IN ('Present','Absent','Late'))
 );
 
-CREATE INDEX idx_student_course ON enrollments(student_id, course_id);
+-- Indexes for the hot join and filter paths (see index_advisor.py).
+-- UNIQUE(student_id, course_id) already serves lookups by student.
+CREATE INDEX idx_enrollments_course ON enrollments(course_id);
+CREATE INDEX idx_enrollments_date ON enrollments(enrollment_date) INCLUDE (student_id, course_id);
+CREATE INDEX idx_grades_enrollment ON grades(enrollment_id) INCLUDE (grade);
+-- One attendance row per enrollment and day (services.mark_attendance()
+-- updates a day already marked).
+CREATE UNIQUE INDEX idx_attendance_enrollment_date ON attendance(enrollment_id, attendance_date) INCLUDE (status);
+CREATE INDEX idx_students_gpa ON students(gpa);
 
+-- Summary tables behind vw_attendance_summary / vw_course_performance,
+-- maintained by records/materialized.py
+CREATE TABLE mv_attendance_counts (
+    enrollment_id INT PRIMARY KEY REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    total_count INT NOT NULL
+);
+
+CREATE INDEX idx_mv_attendance_total ON mv_attendance_counts(total_count) INCLUDE (present_count);
+
+CREATE TABLE mv_course_grades (
+    course_id INT PRIMARY KEY REFERENCES courses(course_id),
+    grade_sum NUMERIC(18,2) NOT NULL,
+    grade_count INT NOT NULL
+);
+
+-- Closed attendance terms, moved out of the attendance table by
+-- records/partitions.py: the rows go to a Parquet file per term and their
+-- per-enrollment counts stay here. end_date is exclusive.
+CREATE TABLE attendance_terms (
+    term_code VARCHAR(10) PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    row_count INT NOT NULL,
+    archive_file VARCHAR(260) NOT NULL,
+    archived_at DATETIME DEFAULT GETDATE()
+);
+
+CREATE TABLE attendance_term_counts (
+    term_code VARCHAR(10) NOT NULL REFERENCES attendance_terms(term_code),
+    enrollment_id INT NOT NULL REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    late_count INT NOT NULL,
+    total_count INT NOT NULL,
+    PRIMARY KEY (term_code, enrollment_id)
+);
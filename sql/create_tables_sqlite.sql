@@ -0,0 +1,181 @@
+-- sql/create_tables_sqlite.sql
+-- SQLite translation of create_tables.sql, used as a local stand-in
+-- for benchmarks. Keep it in step with create_tables.sql and view.sql.
+
+CREATE TABLE students (
+    student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) UNIQUE NOT NULL COLLATE NOCASE,
+    dob DATE NOT NULL,
+    gpa NUMERIC(3,2) NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    CHECK (email LIKE '%@%')
+);
+
+CREATE TABLE courses (
+    course_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_name VARCHAR(150) NOT NULL,
+    course_code VARCHAR(20) UNIQUE NOT NULL COLLATE NOCASE,
+    credits INT NOT NULL CHECK (credits BETWEEN 1 AND 10)
+);
+
+CREATE TABLE enrollments (
+    enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INT NOT NULL REFERENCES students(student_id),
+    course_id INT NOT NULL REFERENCES courses(course_id),
+    enrollment_date DATE NOT NULL,
+    UNIQUE(student_id, course_id)
+);
+
+CREATE TABLE grades (
+    grade_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enrollment_id INT UNIQUE NOT NULL REFERENCES enrollments(enrollment_id),
+    grade NUMERIC(5,2) CHECK (grade BETWEEN 0 AND 100)
+);
+
+CREATE TABLE attendance (
+    attendance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enrollment_id INT NOT NULL REFERENCES enrollments(enrollment_id),
+    attendance_date DATE NOT NULL,
+    status VARCHAR(10) CHECK (status IN ('Present','Absent','Late')),
+    -- One row per enrollment and day (services.mark_attendance() updates a
+    -- day already marked)
+    UNIQUE(enrollment_id, attendance_date)
+);
+
+-- Indexes for the hot join and filter paths (see index_advisor.py).
+-- UNIQUE(student_id, course_id) already serves lookups by student.
+CREATE INDEX idx_enrollments_course ON enrollments(course_id);
+CREATE INDEX idx_enrollments_date ON enrollments(enrollment_date, student_id, course_id);
+CREATE INDEX idx_grades_enrollment ON grades(enrollment_id, grade);
+CREATE INDEX idx_attendance_enrollment_date ON attendance(enrollment_id, attendance_date, status);
+CREATE INDEX idx_students_gpa ON students(gpa);
+
+-- Summary tables behind vw_attendance_summary / vw_course_performance,
+-- maintained by records/materialized.py
+CREATE TABLE mv_attendance_counts (
+    enrollment_id INT PRIMARY KEY REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    total_count INT NOT NULL
+);
+
+CREATE INDEX idx_mv_attendance_total ON mv_attendance_counts(total_count, present_count);
+
+CREATE TABLE mv_course_grades (
+    course_id INT PRIMARY KEY REFERENCES courses(course_id),
+    grade_sum NUMERIC(18,2) NOT NULL,
+    grade_count INT NOT NULL
+);
+
+-- Closed attendance terms, moved out of the attendance table by
+-- records/partitions.py. end_date is exclusive.
+CREATE TABLE attendance_terms (
+    term_code VARCHAR(10) PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    row_count INT NOT NULL,
+    archive_file VARCHAR(260) NOT NULL,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE attendance_term_counts (
+    term_code VARCHAR(10) NOT NULL REFERENCES attendance_terms(term_code),
+    enrollment_id INT NOT NULL REFERENCES enrollments(enrollment_id),
+    present_count INT NOT NULL,
+    late_count INT NOT NULL,
+    total_count INT NOT NULL,
+    PRIMARY KEY (term_code, enrollment_id)
+);
+
+-- Views from view.sql that the batch tools read
+CREATE VIEW vw_student_transcript AS
+SELECT
+    s.student_id,
+    s.first_name,
+    s.last_name,
+    s.email,
+    c.course_id,
+    c.course_name,
+    c.course_code,
+    g.grade
+FROM students s
+JOIN enrollments e
+    ON e.student_id = s.student_id
+JOIN courses c
+    ON c.course_id = e.course_id
+LEFT JOIN grades g
+    ON g.enrollment_id = e.enrollment_id;
+
+CREATE VIEW vw_course_roster AS
+SELECT
+    c.course_id,
+    c.course_name,
+    c.course_code,
+    s.student_id,
+    s.first_name,
+    s.last_name,
+    e.enrollment_date
+FROM courses c
+JOIN enrollments e
+    ON e.course_id = c.course_id
+JOIN students s
+    ON s.student_id = e.student_id;
+
+CREATE VIEW vw_attendance_summary AS
+SELECT
+    s.student_id,
+    s.first_name,
+    s.last_name,
+    c.course_id,
+    c.course_name,
+    ROUND(m.present_count * 100.0 / m.total_count, 2) AS attendance_percentage
+FROM mv_attendance_counts m
+JOIN enrollments e
+    ON e.enrollment_id = m.enrollment_id
+JOIN students s
+    ON s.student_id = e.student_id
+JOIN courses c
+    ON c.course_id = e.course_id
+WHERE m.total_count > 0;
+
+CREATE VIEW vw_course_performance AS
+SELECT
+    c.course_id,
+    c.course_name,
+    c.course_code,
+    ROUND(CAST(m.grade_sum AS FLOAT) / NULLIF(m.grade_count, 0), 2) AS average_grade
+FROM courses c
+LEFT JOIN mv_course_grades m
+    ON m.course_id = c.course_id;
+
+CREATE VIEW vw_at_risk_students AS
+SELECT
+    student_id,
+    first_name,
+    last_name,
+    course_name,
+    attendance_percentage
+FROM vw_attendance_summary
+WHERE attendance_percentage < 75;
+
+CREATE VIEW vw_term_attendance_summary AS
+SELECT
+    m.term_code,
+    s.student_id,
+    s.first_name,
+    s.last_name,
+    c.course_id,
+    c.course_name,
+    m.present_count,
+    m.late_count,
+    m.total_count,
+    ROUND(m.present_count * 100.0 / m.total_count, 2) AS attendance_percentage
+FROM attendance_term_counts m
+JOIN enrollments e
+    ON e.enrollment_id = m.enrollment_id
+JOIN students s
+    ON s.student_id = e.student_id
+JOIN courses c
+    ON c.course_id = e.course_id
+WHERE m.total_count > 0;
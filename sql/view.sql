@@ -1,6 +1,7 @@
 -- SQL Server Views for Student Records System
 
 -- Drop views if they exist (SQL Server syntax)
+IF OBJECT_ID('vw_term_attendance_summary', 'V') IS NOT NULL DROP VIEW vw_term_attendance_summary;
 IF OBJECT_ID('vw_at_risk_students', 'V') IS NOT NULL DROP VIEW vw_at_risk_students;
 IF OBJECT_ID('vw_course_performance', 'V') IS NOT NULL DROP VIEW vw_course_performance;
 IF OBJECT_ID('vw_attendance_summary', 'V') IS NOT NULL DROP VIEW vw_attendance_summary;
@@ -49,6 +50,8 @@ GO
 
 -- View 3: Attendance Summary
 -- Provides a summary of attendance percentages for each student in their enrolled courses
+-- Reads the running counts in mv_attendance_counts (one row per enrollment)
+-- instead of aggregating the attendance table on every query
 CREATE VIEW vw_attendance_summary AS
 SELECT
     s.student_id,
@@ -56,43 +59,29 @@ SELECT
     s.last_name,
     c.course_id,
     c.course_name,
-    ROUND(
-        (SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) * 100.0)
-        / COUNT(a.attendance_id),
-        2
-    ) AS attendance_percentage
-FROM attendance a
+    ROUND(m.present_count * 100.0 / m.total_count, 2) AS attendance_percentage
+FROM mv_attendance_counts m
 JOIN enrollments e
-    ON e.enrollment_id = a.enrollment_id
+    ON e.enrollment_id = m.enrollment_id
 JOIN students s
     ON s.student_id = e.student_id
 JOIN courses c
     ON c.course_id = e.course_id
-GROUP BY
-    s.student_id,
-    s.first_name,
-    s.last_name,
-    c.course_id,
-    c.course_name;
+WHERE m.total_count > 0;
 GO
 
 -- View 4: Course Performance
 -- Summarizes the average grade for each course
+-- Reads the running grade totals in mv_course_grades
 CREATE VIEW vw_course_performance AS
 SELECT
     c.course_id,
     c.course_name,
     c.course_code,
-    ROUND(AVG(CAST(g.grade AS FLOAT)), 2) AS average_grade
+    ROUND(CAST(m.grade_sum AS FLOAT) / NULLIF(m.grade_count, 0), 2) AS average_grade
 FROM courses c
-LEFT JOIN enrollments e
-    ON e.course_id = c.course_id
-LEFT JOIN grades g
-    ON g.enrollment_id = e.enrollment_id
-GROUP BY
-    c.course_id,
-    c.course_name,
-    c.course_code;
+LEFT JOIN mv_course_grades m
+    ON m.course_id = c.course_id;
 GO
 
 -- View 5: At-Risk Students
@@ -108,3 +97,28 @@ FROM vw_attendance_summary
 WHERE attendance_percentage < 75;
 GO
 
+-- View 6: Term Attendance Summary
+-- Attendance percentages of closed terms, read from the counts kept in
+-- attendance_term_counts when records/partitions.py archived the term;
+-- vw_attendance_summary covers the attendance still in the live table
+CREATE VIEW vw_term_attendance_summary AS
+SELECT
+    m.term_code,
+    s.student_id,
+    s.first_name,
+    s.last_name,
+    c.course_id,
+    c.course_name,
+    m.present_count,
+    m.late_count,
+    m.total_count,
+    ROUND(m.present_count * 100.0 / m.total_count, 2) AS attendance_percentage
+FROM attendance_term_counts m
+JOIN enrollments e
+    ON e.enrollment_id = m.enrollment_id
+JOIN students s
+    ON s.student_id = e.student_id
+JOIN courses c
+    ON c.course_id = e.course_id
+WHERE m.total_count > 0;
+GO
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+sys.path.insert(0, os.path.join(project_root, "app"))
+sys.path.insert(0, project_root)
+
+import standin  # noqa: E402
+from records import attendance_store, cache, db, materialized, search  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A seeded sqlite3 stand-in behind the process-wide pool, with every
+    in-process cache, index and store emptied; yields the file path"""
+    path = str(tmp_path / "records.db")
+    conn = standin.create_db(path)
+    standin.seed(conn, students=40, courses=4, per_student=2, sessions=3)
+    materialized.rebuild(conn)
+    conn.close()
+    standin.use_pool(path, maxsize=2)
+    cache.clear_all()
+    search.discard()
+    attendance_store.discard()
+    yield path
+    db.close()
+
+
+@pytest.fixture
+def rows(database):
+    """Run one query on a connection of its own; returns all rows"""
+    def run(sql, params=()):
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            return cur.fetchall()
+    return run
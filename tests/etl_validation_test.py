@@ -1,26 +1,31 @@
-import psycopg2
-from dotenv import load_dotenv
 import os
+import sys
 
-load_dotenv()
-
-conn = psycopg2.connect(
-    dbname=os.getenv("DB_NAME"),
-    user=os.getenv("DB_USER"),
-    password=os.getenv("DB_PASS"),
-    host=os.getenv("DB_HOST"),
-)
-cur = conn.cursor()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import db, quality  # noqa: E402
 
+# Post-load checks: every data-quality rule in records/quality.py runs as
+# one set-based query, concurrently on pooled connections.
 tests = [
-    ("Students loaded", "SELECT COUNT(*) > 0 FROM students"),
-    ("Courses loaded", "SELECT COUNT(*) > 0 FROM courses"),
-    ("No null emails", "SELECT COUNT(*) = 0 FROM students WHERE email IS NULL"),
+    ("Students loaded", "SELECT CASE WHEN COUNT(*) > 0 THEN 1 ELSE 0 END FROM students"),
+    ("Courses loaded", "SELECT CASE WHEN COUNT(*) > 0 THEN 1 ELSE 0 END FROM courses"),
 ]
 
-for name, query in tests:
-    cur.execute(query)
-    result = cur.fetchone()[0]
-    print(f"{name}: {'PASS' if result else 'FAIL'}")
+failed = 0
+with db.connection() as conn:
+    cur = conn.cursor()
+    for name, query in tests:
+        cur.execute(query)
+        result = cur.fetchone()[0]
+        failed += not result
+        print(f"{name}: {'PASS' if result else 'FAIL'}")
+
+for rule, bad, sample, seconds in quality.run_sql_checks(db.get_pool()):
+    failed += bool(bad)
+    print(f"{rule.table}.{rule.name}: {'PASS' if not bad else f'FAIL ({bad} rows)'}"
+          f" [{seconds * 1000:.0f} ms]")
+    for row in sample:
+        print(f"    {tuple(row)}")
 
-conn.close()
+db.close()
+sys.exit(1 if failed else 0)
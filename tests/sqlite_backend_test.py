@@ -0,0 +1,207 @@
+"""
+Services, bulk ingest and the in-process indexes against the sqlite3
+stand-in (benchmarks/standin.py):
+
+    python -m pytest -q tests/sqlite_backend_test.py
+"""
+
+import threading
+from datetime import date
+
+import pytest
+
+import bulk_ingest
+import services
+from records import db, partitions, search
+
+
+# ------------------ POOL ------------------
+def test_release_rolls_back_uncommitted_work(rows):
+    pool = db.ConnectionPool("sqlite3", dsn=db.get_pool().dsn, maxsize=1)
+    conn = pool.acquire()
+    conn.execute("UPDATE students SET first_name = 'Uncommitted' WHERE student_id = 1")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    try:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT first_name FROM students WHERE student_id = 1").fetchone() \
+            == ("First0",)
+    finally:
+        pool.release(conn)
+        pool.close()
+    assert rows("SELECT first_name FROM students WHERE student_id = 1") == [("First0",)]
+
+
+def test_failed_block_is_rolled_back(rows):
+    with pytest.raises(RuntimeError):
+        with db.connection() as conn:
+            conn.execute("UPDATE students SET first_name = 'Failed' WHERE student_id = 1")
+            raise RuntimeError("boom")
+    assert rows("SELECT first_name FROM students WHERE student_id = 1") == [("First0",)]
+
+
+# ------------------ CACHES ------------------
+def test_grade_write_invalidates_transcript(rows):
+    enrollment_id, student_id = rows("SELECT enrollment_id, student_id FROM enrollments LIMIT 1")[0]
+    before = services.transcript(student_id)
+    services.record_grade(enrollment_id, 12.5)
+    after = services.transcript(student_id)
+    assert 12.5 in [grade for _, grade in after["courses"]]
+    assert after["courses"] != before["courses"]
+
+
+def test_enrollment_invalidates_roster_and_transcript(rows):
+    student_id = services.add_student("Ada", "Lovelace", "ada@example.org", "2004-12-10")
+    course_id = rows("SELECT MIN(course_id) FROM courses")[0][0]
+    assert student_id not in [s["student_id"] for s in services.roster(course_id)["students"]]
+    assert services.transcript(student_id)["courses"] == []
+
+    services.enroll_student(student_id, course_id)
+    assert student_id in [s["student_id"] for s in services.roster(course_id)["students"]]
+    assert len(services.transcript(student_id)["courses"]) == 1
+
+
+def test_missing_records_raise_not_found(database):
+    with pytest.raises(services.NotFound):
+        services.transcript(10_000)
+    with pytest.raises(services.NotFound):
+        services.roster(10_000)
+
+
+# ------------------ ARCHIVED TERMS ------------------
+def _archive_marker(rows, end):
+    """A closed term ending on `end`, recorded as another process would:
+    without invalidating this process's cached hot_from()"""
+    with db.connection() as conn:
+        conn.execute("""
+            INSERT INTO attendance_terms(term_code, start_date, end_date, row_count, archive_file)
+            VALUES ('2020-T1', '2020-01-01', ?, 0, 'attendance_2020-T1.parquet')
+        """, (end,))
+        conn.commit()
+
+
+def test_check_hot_boundary(rows):
+    _archive_marker(rows, "2025-01-01")
+    partitions.check_hot("2025-01-01")
+    with pytest.raises(ValueError):
+        partitions.check_hot("2024-12-31")
+    assert partitions.hot_from() == date(2025, 1, 1)
+
+
+def test_writes_check_the_boundary_in_their_transaction(rows):
+    enrollment_id = rows("SELECT MIN(enrollment_id) FROM enrollments")[0][0]
+    assert partitions.hot_from() == date.min  # now cached
+    _archive_marker(rows, "2025-01-01")
+
+    with pytest.raises(ValueError):
+        services.mark_attendance(enrollment_id, "2024-12-31", "Present")
+    with pytest.raises(bulk_ingest.IngestError):
+        bulk_ingest.ingest_attendance([{"enrollment_id": enrollment_id,
+                                        "attendance_date": "2024-12-31", "status": "Present"}])
+    assert services.mark_attendance(enrollment_id, "2025-01-01", "Present")
+
+
+def test_marking_a_day_again_replaces_it(rows):
+    enrollment_id = rows("SELECT MIN(enrollment_id) FROM enrollments")[0][0]
+    first = services.mark_attendance(enrollment_id, "2026-03-02", "Present")
+    assert services.mark_attendance(enrollment_id, "2026-03-02", "Absent") == first
+    assert rows("SELECT COUNT(*), MIN(status) FROM attendance "
+                "WHERE enrollment_id = ? AND attendance_date = '2026-03-02'",
+                (enrollment_id,)) == [(1, "Absent")]
+    assert rows("SELECT total_count, present_count FROM mv_attendance_counts WHERE enrollment_id = ?",
+                (enrollment_id,)) == rows("""
+        SELECT COUNT(*), SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END)
+        FROM attendance WHERE enrollment_id = ?
+    """, (enrollment_id,))
+
+
+# ------------------ BULK INGEST ------------------
+def _enrollment_keys(rows, n=2):
+    return rows("""
+        SELECT e.enrollment_id, s.email, c.course_code
+        FROM enrollments e
+        JOIN students s ON s.student_id = e.student_id
+        JOIN courses c ON c.course_id = e.course_id
+        ORDER BY e.enrollment_id
+        LIMIT ?
+    """, (n,))
+
+
+def test_ingest_resolves_email_and_code_without_case(rows):
+    (first, email, code), (second, *_) = _enrollment_keys(rows)
+    applied, errors = bulk_ingest.ingest_grades([
+        {"student_email": email.upper(), "course_code": code.lower(), "grade": 81},
+        {"enrollment_id": second, "grade": "64.5"},
+    ])
+    assert (applied, errors) == (2, [])
+    assert rows("SELECT enrollment_id, grade FROM grades WHERE enrollment_id IN (?, ?) "
+                "ORDER BY enrollment_id", (first, second)) == [(first, 81), (second, 64.5)]
+
+
+def test_ingest_reports_unresolved_and_repeated_rows(rows):
+    (first, email, code), _ = _enrollment_keys(rows)
+    batch = [
+        {"student_email": "nobody@example.org", "course_code": code, "grade": 50},
+        {"enrollment_id": first, "grade": 60},
+        {"student_email": email, "course_code": code, "grade": 70},
+    ]
+    grade = rows("SELECT grade FROM grades WHERE enrollment_id = ?", (first,))
+    with pytest.raises(bulk_ingest.IngestError) as failure:
+        bulk_ingest.ingest_grades(batch)
+    assert [n for n, _ in failure.value.errors] == [1, 2, 3]
+    assert rows("SELECT grade FROM grades WHERE enrollment_id = ?", (first,)) == grade
+
+    applied, errors = bulk_ingest.ingest_grades(batch[:1] + [batch[1]], skip_invalid=True)
+    assert (applied, [n for n, _ in errors]) == (1, [1])
+
+
+def test_resubmitted_roster_inserts_nothing(rows):
+    (enrollment_id, email, code), _ = _enrollment_keys(rows)
+    roster = [{"student_email": email, "course_code": code}]
+    defaults = {"attendance_date": "2026-03-09", "status": "Late"}
+    assert bulk_ingest.ingest_attendance(roster, defaults=defaults) == (1, [])
+    assert bulk_ingest.ingest_attendance(roster, defaults=defaults) == (0, [])
+
+
+# ------------------ SEARCH INDEX ------------------
+def test_id_scores_only_with_the_other_terms(database):
+    index = search.shared()
+    index.add_student(1000, "Grace", "Smith", "grace@example.org")
+    index.add_student(1001, "Alan", "Smith", "alan@example.org")
+    assert [s["student_id"] for s in index.find_students("smith 1001")] == [1001]
+    assert index.find_students("last1 1001") == []
+    assert index.find_students("1001")[0]["student_id"] == 1001
+
+
+def test_index_reads_during_writes(database):
+    index = search.shared()
+    course_id = next(iter(index.courses))
+    errors = []
+    done = threading.Event()
+
+    def write():
+        for i in range(2000):
+            student_id = 10_000 + i
+            index.add_student(student_id, f"Reader{i}", "Writer", f"rw{i}@example.org")
+            index.add_enrollment(50_000 + i, student_id, course_id)
+        done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                for found in index.find_students("reader"):
+                    index.enrollments_of(found["student_id"])
+        except Exception as e:  # noqa: BLE001 - any failure is the finding
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writer = threading.Thread(target=write)
+    for t in readers + [writer]:
+        t.start()
+    for t in readers + [writer]:
+        t.join()
+
+    assert errors == []
+    assert len(index.find_students("writer", limit=5000)) == 2000
+    assert index.enrollment_id(11_999, course_id) == 51_999